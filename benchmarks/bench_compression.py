@@ -0,0 +1,93 @@
+"""
+Benchmark the token and latency trade-off of TextRank chunk compression.
+
+Builds chunk summarization prompts from pseudo-random chunks of several sizes,
+with and without compression, and prints the prompt tokens of each call, the
+time spent compressing each chunk, and the estimated latency of each call:
+the compression time plus the time to process the prompt tokens at
+`--prefill-tokens-per-second`, a throughput to set for the model and hardware
+at hand (the LLM is not called).
+
+Usage:
+    python benchmarks/bench_compression.py [--chunk-sizes 2000 4000 8000]
+        [--ratios 0.7 0.5 0.3] [--chunks 20] [--prefill-tokens-per-second 2000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+from omegaconf import OmegaConf
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from doc2image.docs import compress_text  # noqa: E402
+from doc2image.prompt import Prompt  # noqa: E402
+from doc2image.tokenizer import count_message_tokens  # noqa: E402
+
+
+def make_chunk(size: int, rng: random.Random, words: list[str]) -> str:
+    sentences, length = [], 0
+    while length < size:
+        sentence = " ".join(rng.choice(words) for _ in range(rng.randint(5, 35)))
+        sentences.append(sentence.capitalize() + ".")
+        length += len(sentences[-1]) + 1
+    return " ".join(sentences)[:size]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[2000, 4000, 8000])
+    parser.add_argument("--ratios", type=float, nargs="+", default=[0.7, 0.5, 0.3])
+    parser.add_argument("--chunks", type=int, default=20)
+    parser.add_argument("--prefill-tokens-per-second", type=float, default=2000)
+    args = parser.parse_args()
+
+    prompts = OmegaConf.load(ROOT / "doc2image" / "configs" / "prompts" / "default.yaml")
+    prompt = Prompt(
+        messages=list(prompts.summarize_chunk.messages),
+        parameters=list(prompts.summarize_chunk.parameters),
+    )
+    rng = random.Random(0)
+    words = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(1, 12)))
+        for _ in range(2000)
+    ]
+
+    print(
+        f"{'chunk':>7}{'ratio':>7}{'prompt tokens':>15}{'saved':>8}"
+        f"{'compress (ms)':>15}{'est. call (ms)':>16}"
+    )
+    for chunk_size in args.chunk_sizes:
+        chunks = [make_chunk(chunk_size, rng, words) for _ in range(args.chunks)]
+        baseline_tokens = None
+        for ratio in [None, *args.ratios]:
+            tokens = compress_time = 0.0
+            for chunk in chunks:
+                start = time.perf_counter()
+                text = compress_text(chunk, ratio) if ratio is not None else chunk
+                compress_time += time.perf_counter() - start
+                tokens += count_message_tokens(
+                    prompt.format(
+                        {
+                            "chunk_text": text,
+                            "max_chunk_summary_size": 200,
+                            "chunks_summaries": "",
+                        }
+                    )
+                )
+            tokens /= len(chunks)
+            compress_ms = 1000 * compress_time / len(chunks)
+            call_ms = compress_ms + 1000 * tokens / args.prefill_tokens_per_second
+            baseline_tokens = baseline_tokens or tokens
+            print(
+                f"{chunk_size:>7}{ratio or '-':>7}{tokens:>15.0f}"
+                f"{1 - tokens / baseline_tokens:>8.0%}{compress_ms:>15.2f}{call_ms:>16.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark parallel PDF text extraction by page count.
+
+Generates PDFs of several page counts and prints, for each number of worker
+processes, the time to extract the whole text, the time until the first page
+is yielded and the speedup over a single worker. Speedups need as many CPU
+cores as workers.
+
+Usage:
+    python benchmarks/bench_pdf_parser.py [--pages 10 100 400] [--workers 1 2 4]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from pypdf import PdfWriter
+from pypdf.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    NameObject,
+)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from doc2image.docs.parser import PdfParser  # noqa: E402
+
+
+def make_pdf(path: str, pages: int, lines_per_page: int = 45, seed: int = 0) -> None:
+    """Write a PDF of `pages` pages, each holding `lines_per_page` lines of text."""
+    rng = random.Random(seed)
+    words = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(1, 12)))
+        for _ in range(2000)
+    ]
+    writer = PdfWriter()
+    font = writer._add_object(
+        DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Font"),
+                NameObject("/Subtype"): NameObject("/Type1"),
+                NameObject("/BaseFont"): NameObject("/Helvetica"),
+            }
+        )
+    )
+    for _ in range(pages):
+        page = writer.add_blank_page(width=612, height=792)
+        lines = [
+            " ".join(rng.choice(words) for _ in range(12)) for _ in range(lines_per_page)
+        ]
+        content = DecodedStreamObject()
+        content.set_data(
+            (
+                "BT /F1 10 Tf 12 TL 50 750 Td "
+                + " ".join(f"({line}) Tj T*" for line in lines)
+                + " ET"
+            ).encode()
+        )
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = DictionaryObject(
+            {
+                NameObject("/Font"): DictionaryObject({NameObject("/F1"): font}),
+                NameObject("/ProcSet"): ArrayObject([NameObject("/Text")]),
+            }
+        )
+    with open(path, "wb") as file:
+        writer.write(file)
+
+
+def measure(parser: PdfParser, path: str) -> tuple[float, float]:
+    """Time the extraction of the whole document and of its first page."""
+    start = time.perf_counter()
+    first_page = None
+    for _ in parser.iter_pages(path):
+        if first_page is None:
+            first_page = time.perf_counter() - start
+    return time.perf_counter() - start, first_page
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 400])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    print(f"CPU cores: {os.cpu_count()}")
+    print(f"{'pages':>6}{'workers':>9}{'total (s)':>11}{'first page (s)':>16}{'speedup':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for pages in args.pages:
+            path = os.path.join(directory, f"{pages}.pdf")
+            make_pdf(path, pages)
+            baseline = None
+            for workers in args.workers:
+                total, first_page = measure(PdfParser(workers=workers), path)
+                baseline = baseline or total
+                print(
+                    f"{pages:>6}{workers:>9}{total:>11.3f}{first_page:>16.3f}"
+                    f"{baseline / total:>8.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark the TextSplitter against the implementation it replaced.
+
+Splits multi-megabyte texts with and without paragraph breaks (a text without
+them is split on words, the case where the legacy merging was quadratic) and
+prints the time taken by each implementation.
+
+Usage:
+    python benchmarks/bench_text_splitter.py [--size-mb 3] [--repeat 3]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "tests"))
+
+from doc2image.docs.text_splitter import TextSplitter  # noqa: E402
+from legacy_text_splitter import TextSplitter as LegacyTextSplitter  # noqa: E402
+
+SETTINGS = [(200, 50), (1000, 200), (4000, 400), (8000, 800)]
+
+
+def make_text(size: int, paragraph_breaks: bool, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(1, 12)))
+        for _ in range(2000)
+    ]
+    paragraphs, total = [], 0
+    while total < size:
+        paragraph = " ".join(rng.choice(words) for _ in range(rng.randint(5, 120)))
+        paragraphs.append(paragraph)
+        total += len(paragraph) + 2
+    return ("\n\n" if paragraph_breaks else " ").join(paragraphs)
+
+
+def best_time(split, text: str, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            split(text)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size-mb", type=float, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'text':<12}{'chunk':>8}{'overlap':>9}{'legacy (s)':>12}{'current (s)':>13}{'speedup':>9}")
+    for paragraph_breaks in (True, False):
+        text = make_text(int(args.size_mb * 1_000_000), paragraph_breaks)
+        for chunk_size, chunk_overlap in SETTINGS:
+            kwargs = dict(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                separators=["\n\n", "\n", " ", ""],
+                is_separator_regex=False,
+                keep_separator=True,
+                strip_whitespace=True,
+            )
+            legacy = best_time(LegacyTextSplitter(**kwargs).split_text, text, args.repeat)
+            current = best_time(TextSplitter(**kwargs).split_text, text, args.repeat)
+            print(
+                f"{'paragraphs' if paragraph_breaks else 'flat':<12}{chunk_size:>8}{chunk_overlap:>9}"
+                f"{legacy:>12.3f}{current:>13.3f}{legacy / current:>8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
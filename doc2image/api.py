@@ -1,9 +1,23 @@
+import hashlib
+import json
 import os
+from functools import lru_cache
 from time import time
-from datetime import datetime
-from typing import List
-
-from .docs import chunkenize_document, AVAILABLE_FORMATS
+from datetime import datetime, timedelta
+from typing import Any, Callable, List, Optional
+
+import sqlalchemy as sa
+
+from .docs import (
+    Chunk,
+    chunkenize_document,
+    deduplicate_chunks,
+    parse_short_document,
+    sample_chunks,
+    DocumentCache,
+    AVAILABLE_FORMATS,
+    hash_file,
+)
 from .prompt import Prompt
 from .database import (
     LlmModel,
@@ -13,11 +27,30 @@ from .database import (
     ChunkSummary,
     ImagePromptsSession,
     ImagePrompt,
+    PipelineJob,
     Session,
     database_session_decorator,
 )
-from .pipeline import DocumentSummarizer, ImagePromptsGenerator
-from .llm import create_llm, PROVIDER_TO_LLM, PROVIDERS, BaseLLM
+from .pipeline import (
+    ChunkSummaryResult,
+    DocumentSummarizer,
+    ImagePromptsGenerator,
+    SummaryAndImagePromptsGenerator,
+    INDEPENDENT_CHUNK_STRATEGIES,
+    SUMMARIZATION_STRATEGIES,
+    fit_chunk_size,
+    fits_single_call,
+    max_single_call_document_length,
+)
+from .llm import (
+    create_llm,
+    PROVIDER_TO_LLM,
+    PROVIDERS,
+    BaseLLM,
+    LLMCache,
+    ModelCapabilities,
+    REGISTRY_VERSION,
+)
 
 
 @database_session_decorator
@@ -61,6 +94,55 @@ def get_available_doc_formats() -> list[str]:
     return AVAILABLE_FORMATS
 
 
+def get_summarization_strategies() -> list[str]:
+    """
+    Get a list of available chunk summarization strategies.
+
+    Returns:
+        list[str]: A list of supported summarization strategies.
+    """
+    return SUMMARIZATION_STRATEGIES
+
+
+@lru_cache(maxsize=None)
+def get_llm_cache(
+    path: str, max_size_bytes: int, ttl_seconds: Optional[float] = None
+) -> LLMCache:
+    """
+    Get the LLM response cache stored at the given path.
+
+    The same instance is returned for the same arguments, so its hit and miss
+    counters accumulate across pipeline runs.
+
+    Args:
+        path (str): Path to the SQLite cache file.
+        max_size_bytes (int): Maximum total size of the cached responses.
+        ttl_seconds (Optional[float]): Time to live of each entry, or None to keep entries until evicted.
+
+    Returns:
+        LLMCache: The LLM response cache.
+    """
+    return LLMCache(path=path, max_size_bytes=max_size_bytes, ttl_seconds=ttl_seconds)
+
+
+@lru_cache(maxsize=None)
+def get_document_cache(directory: str, max_size_bytes: int) -> DocumentCache:
+    """
+    Get the cache of parsed and chunked documents stored in the given directory.
+
+    The same instance is returned for the same arguments, so its hit and miss
+    counters accumulate across pipeline runs.
+
+    Args:
+        directory (str): Directory where the cache entries are stored.
+        max_size_bytes (int): Maximum total size of the cache entries.
+
+    Returns:
+        DocumentCache: The document cache.
+    """
+    return DocumentCache(directory=directory, max_size_bytes=max_size_bytes)
+
+
 def get_provider_api_key(session: Session, provider_name: str) -> str | None:
     """
     Get the API key for a specific LLM provider.
@@ -170,10 +252,15 @@ def add_llm_model(
         return existing_models[0]
 
     # Create a new LLM model entry
+    capabilities = llm_cls.get_capabilities(model_name=model_name, api_key=api_key)
     llm_model = LlmModel(
         name=model_name,
         available=available,
         provider_id=llm_provider.id,
+        context_window=capabilities.context_window,
+        max_output_tokens=capabilities.max_output_tokens,
+        supports_structured_output=capabilities.supports_structured_output,
+        capabilities_version=REGISTRY_VERSION,
     )
 
     session.add(llm_model)
@@ -184,6 +271,43 @@ def add_llm_model(
     return llm_model
 
 
+def get_llm_model_capabilities(
+    session: Session, llm_model: LlmModel, api_key: Optional[str] = None
+) -> ModelCapabilities:
+    """
+    Get the capabilities of an LLM model, looking them up if they are not stored yet.
+
+    Models added before capabilities were recorded, or whose capabilities were looked up with an older registry of known models, are updated in place.
+
+    Args:
+        session (Session): The database session.
+        llm_model (LlmModel): The LLM model entry.
+        api_key (Optional[str]): The API key for the model.
+
+    Returns:
+        ModelCapabilities: The capabilities of the model.
+    """
+    if (
+        llm_model.context_window is None
+        or llm_model.capabilities_version != REGISTRY_VERSION
+    ):
+        llm_cls: type[BaseLLM] = PROVIDER_TO_LLM[llm_model.provider.name]
+        capabilities = llm_cls.get_capabilities(
+            model_name=llm_model.name, api_key=api_key
+        )
+        llm_model.context_window = capabilities.context_window
+        llm_model.max_output_tokens = capabilities.max_output_tokens
+        llm_model.supports_structured_output = capabilities.supports_structured_output
+        llm_model.capabilities_version = REGISTRY_VERSION
+        session.flush()
+
+    return ModelCapabilities(
+        context_window=llm_model.context_window,
+        max_output_tokens=llm_model.max_output_tokens,
+        supports_structured_output=llm_model.supports_structured_output,
+    )
+
+
 def get_all_llm_models(session: Session) -> List[LlmModel]:
     """
     Get all LLM models from the database.
@@ -215,13 +339,37 @@ def summerize_document(
     summarize_chunk_prompt_parameters: list[str],
     generate_document_summary_prompt_messages: list[dict[str, str]],
     generate_document_summary_prompt_parameters: list[str],
+    strategy: str = "sequential",
+    max_concurrency: int = 4,
+    tree_reduce_group_size: int = 4,
+    lookahead: int = 2,
+    context_token_budget: Optional[int] = None,
+    llm_cache: Optional[LLMCache] = None,
+    stream: bool = False,
+    parser_workers: int = 1,
+    document_cache: Optional[DocumentCache] = None,
+    tokenizer: Optional[str] = None,
+    auto_chunk_size: bool = False,
+    dedup_threshold: Optional[float] = None,
+    max_chunks: Optional[int] = None,
+    compression_ratio: Optional[float] = None,
+    max_batch_size: int = 1,
+    summarize_chunks_batch_prompt_messages: Optional[list[dict[str, str]]] = None,
+    summarize_chunks_batch_prompt_parameters: Optional[list[str]] = None,
+    check_summaries_sufficiency_prompt_messages: Optional[list[dict[str, str]]] = None,
+    check_summaries_sufficiency_prompt_parameters: Optional[list[str]] = None,
+    on_chunk_summary: Optional[Callable[[int, int], None]] = None,
+    checkpoint: bool = False,
+    content_defined_chunking: bool = False,
+    reuse_chunk_summaries: bool = True,
+    memoize: bool = True,
 ) -> DocumentSummarySession:
     """
     Summarizes a document by splitting it into chunks and generating summaries.
 
     Args:
         document_path (str): Path to the document.
-        chunk_size (int): Maximum size of chunks to return.
+        chunk_size (int): Maximum size of chunks to return. Ignored if `auto_chunk_size` is set.
         chunk_overlap (int): Overlap in characters between chunks.
         separators (list[str]): List of separators to use for splitting.
         is_separator_regex (bool): Whether the separators are regex patterns.
@@ -239,10 +387,123 @@ def summerize_document(
         summarize_chunk_prompt_parameters (list[str]): A list of parameter names to be used in the prompt.
         generate_document_summary_prompt_messages (list[dict[str, str]]): Messages for generating the document summary.
         generate_document_summary_prompt_parameters (list[str]): A list of parameter names to be used in the prompt.
+        strategy (str): The chunk summarization strategy ("sequential", "map_reduce", "tree_reduce" or "lookahead").
+        max_concurrency (int): Maximum number of LLM calls in flight for concurrent strategies.
+        tree_reduce_group_size (int): Number of summaries merged per call by the "tree_reduce" strategy.
+        lookahead (int): Number of chunks summarized ahead of the current one by the "lookahead" strategy.
+        context_token_budget (Optional[int]): Maximum number of tokens of previous chunk summaries sent with each chunk. Older summaries are compacted into a digest when it is exceeded.
+        llm_cache (Optional[LLMCache]): If given, LLM responses are served from and stored in this cache.
+        stream (bool): If `True`, the document is parsed and split page by page instead of as a single string.
+        parser_workers (int): Number of processes extracting PDF text in parallel.
+        document_cache (Optional[DocumentCache]): If given, parsed text and chunks are served from and stored in this cache.
+        tokenizer (Optional[str]): Name of the tokenizer measuring chunks (e.g., "approximate", "tiktoken"). If given, `chunk_size` and `chunk_overlap` are in tokens; otherwise they are in characters.
+        auto_chunk_size (bool): If `True`, the chunk size is the largest one whose summarization call fits the context window of the model, so the document is summarized with the fewest LLM calls.
+        dedup_threshold (Optional[float]): If given, chunks whose estimated similarity with an earlier chunk reaches this threshold (between 0 and 1) are not summarized. The number of skipped chunks is stored in the session.
+        max_chunks (Optional[int]): If given, at most this many chunks are summarized. They are picked across the whole document, preferring the chunks closest to its overall topic, and kept in their original order, so the cost of large documents is bounded.
+        compression_ratio (Optional[float]): If given, each chunk is shrunk to about this fraction of its length with extractive summarization (TextRank) before being sent to the LLM.
+        max_batch_size (int): Maximum number of consecutive chunks summarized together in a single call. Batches are also limited to what fits the context window of the model.
+        summarize_chunks_batch_prompt_messages (Optional[list[dict[str, str]]]): Messages for summarizing a batch of chunks. Required if `max_batch_size` > 1.
+        summarize_chunks_batch_prompt_parameters (Optional[list[str]]): A list of parameter names to be used in the batch prompt.
+        check_summaries_sufficiency_prompt_messages (Optional[list[dict[str, str]]]): Messages for checking whether chunk summaries are sufficient to infer the document's main idea. Required by the "lookahead" strategy.
+        check_summaries_sufficiency_prompt_parameters (Optional[list[str]]): A list of parameter names to be used in the sufficiency check prompt.
+        on_chunk_summary (Optional[Callable[[int, int], None]]): If given, called after each chunk is summarized with the number of chunks summarized so far and the number of chunks to summarize, e.g. to report progress.
+        checkpoint (bool): If `True`, the session is created up front with the "in_progress" status and each chunk summary is committed as soon as it is generated, so an interrupted run loses no LLM work. Calling this function again with the same document and settings resumes the interrupted session from the chunks it already summarized. Note that this commits the database session.
+        content_defined_chunking (bool): If `True`, chunk boundaries are chosen from the content of the text, so editing a part of the document only changes the chunks around it instead of every chunk after it.
+        reuse_chunk_summaries (bool): If `True` and the strategy summarizes each chunk on its own ("map_reduce" or "tree_reduce"), chunks whose content was already summarized with the same settings, e.g. in a previous version of the document, are not summarized again: their stored summaries are reused, and so are the merged summaries of unchanged groups. The number of reused chunks is stored in the session.
+        memoize (bool): If `True` and a document with the same content was already summarized with the same settings (model, sampling, chunking and prompts), its completed session is returned instead of summarizing the document again.
 
     Returns:
-        DocumentSummarySession: The document summary session created.
+        DocumentSummarySession: The document summary session created, or the stored one if `memoize` found it.
     """
+    # Retrieve LLM provider from the database
+    llm_providers: List[LlmProvider] = (
+        session.query(LlmProvider).filter_by(name=llm_provider).all()
+    )
+    assert bool(
+        llm_providers
+    ), f"LLM provider {llm_provider} not found in the database."
+    assert len(llm_providers) == 1, "Multiple LLM providers found with the same name."
+    llm_provider_obj: LlmProvider = llm_providers[0]
+
+    # Retrieve LLM model from the database
+    llm_models: List[LlmModel] = (
+        session.query(LlmModel)
+        .filter_by(name=llm_model_name, provider_id=llm_provider_obj.id)
+        .all()
+    )
+    assert bool(llm_models), f"LLM model {llm_model_name} not found in the database."
+    assert len(llm_models) == 1, "Multiple LLM models found with the same name."
+    llm_model: LlmModel = llm_models[0]
+
+    summarize_chunk_prompt = Prompt(
+        messages=summarize_chunk_prompt_messages,
+        parameters=summarize_chunk_prompt_parameters,
+    )
+    capabilities = None
+    if auto_chunk_size or max_batch_size > 1:
+        capabilities = get_llm_model_capabilities(session, llm_model, llm_api_key)
+    if auto_chunk_size:
+        chunk_size = fit_chunk_size(
+            capabilities=capabilities,
+            summarize_chunk_prompt=summarize_chunk_prompt,
+            max_chunk_summary_size=max_chunk_summary_size,
+            strategy=strategy,
+            context_token_budget=context_token_budget,
+            in_tokens=tokenizer is not None,
+        )
+
+    document = _get_or_create_document(session, document_path)
+
+    # The document content is part of the hash, so a session is only resumed
+    # or reused for the exact file it was created for
+    parameters_hash = _hash_parameters(
+        {
+            "document_hash": document.content_hash,
+            "llm_model_id": llm_model.id,
+            "llm_temperature": llm_temperature,
+            "llm_top_p": llm_top_p,
+            "llm_top_k": llm_top_k,
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "separators": separators,
+            "is_separator_regex": is_separator_regex,
+            "keep_separator": keep_separator,
+            "strip_whitespace": strip_whitespace,
+            "stream": stream,
+            "tokenizer": tokenizer,
+            "content_defined_chunking": content_defined_chunking,
+            "dedup_threshold": dedup_threshold,
+            "max_chunks": max_chunks,
+            "compression_ratio": compression_ratio,
+            "max_batch_size": max_batch_size,
+            "strategy": strategy,
+            "tree_reduce_group_size": tree_reduce_group_size,
+            "lookahead": lookahead,
+            "context_token_budget": context_token_budget,
+            "max_chunk_summary_size": max_chunk_summary_size,
+            "max_document_summary_size": max_document_summary_size,
+            "summarize_chunk_prompt": summarize_chunk_prompt_messages,
+            "generate_document_summary_prompt": generate_document_summary_prompt_messages,
+            "summarize_chunks_batch_prompt": summarize_chunks_batch_prompt_messages,
+            "check_summaries_sufficiency_prompt": check_summaries_sufficiency_prompt_messages,
+        }
+    )
+
+    # Identical documents summarized with identical settings are not summarized again
+    if memoize:
+        summary_session = (
+            session.query(DocumentSummarySession)
+            .filter_by(
+                document_id=document.id,
+                parameters_hash=parameters_hash,
+                status="completed",
+            )
+            .order_by(DocumentSummarySession.id.desc())
+            .first()
+        )
+        if summary_session is not None:
+            return summary_session
+
     chunks = chunkenize_document(
         document_path,
         chunk_size=chunk_size,
@@ -251,8 +512,132 @@ def summerize_document(
         is_separator_regex=is_separator_regex,
         keep_separator=keep_separator,
         strip_whitespace=strip_whitespace,
+        stream=stream,
+        parser_workers=parser_workers,
+        cache=document_cache,
+        tokenizer=tokenizer,
+        content_defined=content_defined_chunking,
     )
 
+    # Near-duplicate chunks (e.g. repeated boilerplate) are skipped, saving one
+    # LLM call each
+    duplicate_chunks = None
+    if dedup_threshold is not None:
+        chunks, duplicate_chunks = deduplicate_chunks(chunks, dedup_threshold)
+
+    if max_chunks is not None:
+        chunks = sample_chunks(chunks, max_chunks)
+
+    # Summaries of strategies summarizing each chunk on its own only depend on
+    # the chunk content and these settings, so they can be shared by sessions
+    chunk_summary_parameters_hash = None
+    if strategy in INDEPENDENT_CHUNK_STRATEGIES:
+        chunk_summary_parameters_hash = _hash_parameters(
+            {
+                "llm_model_id": llm_model.id,
+                "llm_temperature": llm_temperature,
+                "llm_top_p": llm_top_p,
+                "llm_top_k": llm_top_k,
+                "compression_ratio": compression_ratio,
+                "max_chunk_summary_size": max_chunk_summary_size,
+                "max_document_summary_size": max_document_summary_size,
+                "summarize_chunk_prompt": summarize_chunk_prompt_messages,
+                "generate_document_summary_prompt": generate_document_summary_prompt_messages,
+                "summarize_chunks_batch_prompt": summarize_chunks_batch_prompt_messages,
+            }
+        )
+
+    # A checkpointed run stores each chunk summary as soon as it is generated,
+    # under an in-progress session. Running it again with the same document and
+    # settings resumes that session instead of summarizing the chunks again.
+    summary_session = None
+    completed_chunk_summaries = {}
+    if checkpoint:
+        summary_session = (
+            session.query(DocumentSummarySession)
+            .filter_by(
+                document_id=document.id,
+                parameters_hash=parameters_hash,
+                status="in_progress",
+            )
+            .order_by(DocumentSummarySession.id.desc())
+            .first()
+        )
+        if summary_session is None:
+            summary_session = DocumentSummarySession(
+                document_id=document.id,
+                document_summary="",
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                max_chunk_summary_size=max_chunk_summary_size,
+                max_document_summary_size=max_document_summary_size,
+                llm_model_id=llm_model.id,
+                llm_temperature=llm_temperature,
+                llm_top_p=llm_top_p,
+                llm_top_k=llm_top_k,
+                generation_date=datetime.now(),
+                session_time=0,
+                duplicate_chunks=duplicate_chunks,
+                status="in_progress",
+                parameters_hash=parameters_hash,
+                chunk_summary_parameters_hash=chunk_summary_parameters_hash,
+            )
+            session.add(summary_session)
+            session.flush()
+        else:
+            for chunk_summary in summary_session.chunk_summaries:
+                if chunk_summary.level or chunk_summary.chunk_index is None:
+                    continue
+                # Summaries are only resumed for chunks with the same content
+                if (
+                    chunk_summary.chunk_index >= len(chunks)
+                    or chunk_summary.chunk_hash
+                    != chunks[chunk_summary.chunk_index].content_hash
+                ):
+                    session.delete(chunk_summary)
+                    continue
+                completed_chunk_summaries[chunk_summary.chunk_index] = (
+                    ChunkSummaryResult(
+                        summary=chunk_summary.chunk_summary,
+                        prompt_tokens=chunk_summary.prompt_tokens,
+                        page=chunk_summary.page,
+                        chunk_index=chunk_summary.chunk_index,
+                        content_hash=chunk_summary.chunk_hash,
+                        is_sufficient=chunk_summary.is_sufficient,
+                    )
+                )
+        session.commit()
+
+    # Chunks with the same content as chunks summarized by earlier sessions
+    # (e.g., the unchanged parts of an edited document) are not summarized again
+    reused_chunks = 0
+    completed_merged_summaries = {}
+    if reuse_chunk_summaries and chunk_summary_parameters_hash is not None:
+        reused_chunk_summaries, completed_merged_summaries = _find_reusable_summaries(
+            session,
+            chunk_summary_parameters_hash,
+            {
+                index: chunk
+                for index, chunk in enumerate(chunks)
+                if index not in completed_chunk_summaries
+            },
+        )
+        completed_chunk_summaries.update(reused_chunk_summaries)
+        reused_chunks = len(reused_chunk_summaries)
+
+    summarized_chunks = len(completed_chunk_summaries)
+
+    def report_chunk_summary(chunk_summary_result: ChunkSummaryResult):
+        nonlocal summarized_chunks
+        if checkpoint:
+            session.add(
+                _create_chunk_summary(chunk_summary_result, summary_session.id)
+            )
+            session.commit()
+        if on_chunk_summary is not None:
+            summarized_chunks += 1
+            on_chunk_summary(summarized_chunks, len(chunks))
+
     doc_summerizer = DocumentSummarizer(
         llm=create_llm(
             model_name=llm_model_name,
@@ -261,18 +646,43 @@ def summerize_document(
             top_p=llm_top_p,
             top_k=llm_top_k,
             api_key=llm_api_key,
+            cache=llm_cache,
         ),
         document_chunks=chunks,
         max_document_summary_size=max_document_summary_size,
         max_chunk_summary_size=max_chunk_summary_size,
-        summarize_chunk_prompt=Prompt(
-            messages=summarize_chunk_prompt_messages,
-            parameters=summarize_chunk_prompt_parameters,
-        ),
+        summarize_chunk_prompt=summarize_chunk_prompt,
         generate_document_summary_prompt=Prompt(
             messages=generate_document_summary_prompt_messages,
             parameters=generate_document_summary_prompt_parameters,
         ),
+        strategy=strategy,
+        max_concurrency=max_concurrency,
+        tree_reduce_group_size=tree_reduce_group_size,
+        lookahead=lookahead,
+        context_token_budget=context_token_budget,
+        compression_ratio=compression_ratio,
+        max_batch_size=max_batch_size,
+        summarize_chunks_batch_prompt=(
+            Prompt(
+                messages=summarize_chunks_batch_prompt_messages,
+                parameters=summarize_chunks_batch_prompt_parameters,
+            )
+            if summarize_chunks_batch_prompt_messages is not None
+            else None
+        ),
+        check_summaries_sufficiency_prompt=(
+            Prompt(
+                messages=check_summaries_sufficiency_prompt_messages,
+                parameters=check_summaries_sufficiency_prompt_parameters,
+            )
+            if check_summaries_sufficiency_prompt_messages is not None
+            else None
+        ),
+        capabilities=capabilities,
+        on_chunk_summary=report_chunk_summary,
+        completed_chunk_summaries=completed_chunk_summaries,
+        completed_merged_summaries=completed_merged_summaries,
     )
 
     start_time = time()
@@ -280,65 +690,56 @@ def summerize_document(
     session_time = time() - start_time
     generation_date = datetime.now()
 
-    # Retrieve LLM provider from the database
-    llm_providers: List[LlmProvider] = (
-        session.query(LlmProvider).filter_by(name=llm_provider).all()
-    )
-    assert bool(
-        llm_providers
-    ), f"LLM provider {llm_provider} not found in the database."
-    assert len(llm_providers) == 1, "Multiple LLM providers found with the same name."
-    llm_provider_obj: LlmProvider = llm_providers[0]
-
-    # Retrieve LLM model from the database
-    llm_models: List[LlmModel] = (
-        session.query(LlmModel)
-        .filter_by(name=llm_model_name, provider_id=llm_provider_obj.id)
-        .all()
-    )
-    assert bool(llm_models), f"LLM model {llm_model_name} not found in the database."
-    assert len(llm_models) == 1, "Multiple LLM models found with the same name."
-    llm_model: LlmModel = llm_models[0]
-
-    # Retrieve or create the document entry in the database
-    documents: List[Document] = (
-        session.query(Document).filter_by(name=os.path.basename(document_path)).all()
-    )
-    if not documents:
-        document = Document(
-            name=os.path.basename(document_path), upload_date=generation_date
+    if summary_session is None:
+        summary_session = DocumentSummarySession(
+            document_id=document.id,
+            document_summary=document_summary,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            max_chunk_summary_size=max_chunk_summary_size,
+            max_document_summary_size=max_document_summary_size,
+            llm_model_id=llm_model.id,
+            llm_temperature=llm_temperature,
+            llm_top_p=llm_top_p,
+            llm_top_k=llm_top_k,
+            generation_date=generation_date,
+            session_time=session_time,
+            duplicate_chunks=duplicate_chunks,
+            status="completed",
+            parameters_hash=parameters_hash,
+            chunk_summary_parameters_hash=chunk_summary_parameters_hash,
+            reused_chunks=reused_chunks,
         )
-        session.add(document)
+        session.add(summary_session)
         session.flush()
+        new_chunk_summaries = chunk_summaries
     else:
-        assert len(documents) == 1, "Multiple documents found with the same name."
-        document: Document = documents[0]
-
-    # Create a new document summary session
-    summary_session = DocumentSummarySession(
-        document_id=document.id,
-        document_summary=document_summary,
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        max_chunk_summary_size=max_chunk_summary_size,
-        max_document_summary_size=max_document_summary_size,
-        llm_model_id=llm_model.id,
-        llm_temperature=llm_temperature,
-        llm_top_p=llm_top_p,
-        llm_top_k=llm_top_k,
-        generation_date=generation_date,
-        session_time=session_time,
-    )
-    session.add(summary_session)
-    session.flush()
+        summary_session.document_summary = document_summary
+        summary_session.generation_date = generation_date
+        summary_session.session_time += session_time
+        summary_session.status = "completed"
+        summary_session.reused_chunks = reused_chunks
+
+        # Chunk summaries were stored as they were generated. Those computed
+        # ahead of time but not used (e.g., by the "lookahead" strategy) are
+        # dropped so the session matches a run without checkpoints.
+        used_chunks = {c.chunk_index for c in chunk_summaries if not c.level}
+        stored_chunks = set()
+        for chunk_summary in summary_session.chunk_summaries:
+            if chunk_summary.level:
+                continue
+            if chunk_summary.chunk_index in used_chunks:
+                stored_chunks.add(chunk_summary.chunk_index)
+            else:
+                session.delete(chunk_summary)
+        # Merged and reused summaries are not stored as they are generated
+        new_chunk_summaries = [
+            c for c in chunk_summaries if c.level or c.chunk_index not in stored_chunks
+        ]
 
     # Add chunk summaries to the database
-    for chunk_summary_str in chunk_summaries:
-        chunk_summary = ChunkSummary(
-            chunk_summary=chunk_summary_str,
-            document_summary_session_id=summary_session.id,
-        )
-        session.add(chunk_summary)
+    for chunk_summary_result in new_chunk_summaries:
+        session.add(_create_chunk_summary(chunk_summary_result, summary_session.id))
     session.flush()
 
     return summary_session
@@ -358,6 +759,14 @@ def generate_image_prompts(
     llm_top_p: float,
     llm_top_k: int,
     provider_name: str,
+    llm_cache: Optional[LLMCache] = None,
+    max_prompts_per_call: Optional[int] = None,
+    max_concurrency: int = 4,
+    max_top_up_calls: int = 0,
+    generate_image_prompts_shard_prompt_messages: Optional[list[dict[str, str]]] = None,
+    generate_image_prompts_shard_prompt_parameters: Optional[list[str]] = None,
+    on_image_prompt: Optional[Callable[[str], None]] = None,
+    memoize: bool = True,
 ) -> ImagePromptsSession:
     """
     Generates image prompts based on the document summary.
@@ -375,10 +784,62 @@ def generate_image_prompts(
         llm_top_p (float): The top-p setting for the model.
         llm_top_k (int): The top-k setting for the model.
         provider_name (str): The name of the API to use (e.g., "ollama", "openai").
+        llm_cache (Optional[LLMCache]): If given, LLM responses are served from and stored in this cache.
+        max_prompts_per_call (Optional[int]): Maximum number of prompts requested by a single call. Larger counts are split into shards generated concurrently. If `None`, all the prompts are requested by one call.
+        max_concurrency (int): Maximum number of LLM calls in flight.
+        max_top_up_calls (int): Maximum number of follow-up calls made to replace duplicated or missing prompts.
+        generate_image_prompts_shard_prompt_messages (Optional[list[dict[str, str]]]): Message appended to each shard and follow-up call. Required to shard or top up the prompts.
+        generate_image_prompts_shard_prompt_parameters (Optional[list[str]]): A list of parameter names to be used in the shard prompt.
+        on_image_prompt (Optional[Callable[[str], None]]): If given, called with each image prompt as soon as it is generated.
+        memoize (bool): If `True` and prompts were already generated for this document summary session with the same settings (model, sampling, number of prompts and prompts), the stored image prompts session is returned instead of generating them again.
 
     Returns:
-        ImagePromptsSession: The image prompts session created.
+        ImagePromptsSession: The image prompts session created, or the stored one if `memoize` found it.
     """
+    # Check if the provider exists in the database
+    providers: List[LlmProvider] = (
+        session.query(LlmProvider).filter_by(name=provider_name).all()
+    )
+    assert len(providers) == 1, "Multiple LLM providers found with the same name."
+    llm_provider: LlmProvider = providers[0]
+    assert llm_provider.available, f"LLM provider '{provider_name}' is unavailable."
+
+    # Retrieve LLM model from the database
+    llm_models: List[LlmModel] = (
+        session.query(LlmModel)
+        .filter_by(name=llm_model_name, provider_id=llm_provider.id)
+        .all()
+    )
+    assert bool(llm_models), f"LLM model {llm_model_name} not found in the database."
+    assert len(llm_models) == 1, "Multiple LLM models found with the same name."
+    llm_model: LlmModel = llm_models[0]
+
+    parameters_hash = _hash_parameters(
+        {
+            "llm_model_id": llm_model.id,
+            "llm_temperature": llm_temperature,
+            "llm_top_p": llm_top_p,
+            "llm_top_k": llm_top_k,
+            "total_prompts_to_generate": total_prompts_to_generate,
+            "max_prompts_per_call": max_prompts_per_call,
+            "max_top_up_calls": max_top_up_calls,
+            "generate_image_prompts_prompt": generate_image_prompts_prompt_messages,
+            "generate_image_prompts_shard_prompt": generate_image_prompts_shard_prompt_messages,
+        }
+    )
+    if memoize:
+        image_prompts_session = (
+            session.query(ImagePromptsSession)
+            .filter_by(
+                document_summary_id=summary_session.id,
+                parameters_hash=parameters_hash,
+            )
+            .order_by(ImagePromptsSession.id.desc())
+            .first()
+        )
+        if image_prompts_session is not None:
+            return image_prompts_session
+
     image_prompts_generator = ImagePromptsGenerator(
         llm=create_llm(
             model_name=llm_model_name,
@@ -387,6 +848,7 @@ def generate_image_prompts(
             top_k=llm_top_k,
             api_key=llm_api_key,
             provider=provider_name,
+            cache=llm_cache,
         ),
         document_summary=document_summary,
         total_prompts_to_generate=total_prompts_to_generate,
@@ -394,76 +856,629 @@ def generate_image_prompts(
             messages=generate_image_prompts_prompt_messages,
             parameters=generate_image_prompts_prompt_parameters,
         ),
+        max_prompts_per_call=max_prompts_per_call,
+        max_concurrency=max_concurrency,
+        max_top_up_calls=max_top_up_calls,
+        generate_image_prompts_shard_prompt=(
+            Prompt(
+                messages=generate_image_prompts_shard_prompt_messages,
+                parameters=generate_image_prompts_shard_prompt_parameters,
+            )
+            if generate_image_prompts_shard_prompt_messages is not None
+            else None
+        ),
     )
 
     start = time()
-    image_prompts = image_prompts_generator.run()
+    image_prompts = []
+    time_to_first_prompt = None
+    for prompt in image_prompts_generator.stream():
+        if time_to_first_prompt is None:
+            time_to_first_prompt = time() - start
+        image_prompts.append(prompt)
+        if on_image_prompt is not None:
+            on_image_prompt(prompt)
     session_time = time() - start
     generation_date = datetime.now()
 
-    # Check if the provider exists in the database
-    providers: List[LlmProvider] = (
-        session.query(LlmProvider).filter_by(name=provider_name).all()
+    # Create a new image prompts session
+    image_prompts_session = ImagePromptsSession(
+        document_summary_id=summary_session.id,
+        llm_model_id=llm_model.id,
+        llm_temperature=llm_temperature,
+        llm_top_p=llm_top_p,
+        llm_top_k=llm_top_k,
+        generation_date=generation_date,
+        session_time=session_time,
+        time_to_first_prompt=time_to_first_prompt,
+        parameters_hash=parameters_hash,
     )
-    assert len(providers) == 1, "Multiple LLM providers found with the same name."
-    llm_provider: LlmProvider = providers[0]
-    assert llm_provider.available, f"LLM provider '{provider_name}' is unavailable."
+
+    session.add(image_prompts_session)
+    session.flush()
+
+    # Create image prompts and add them to the database
+    for prompt in image_prompts:
+        image_prompt = ImagePrompt(
+            image_prompts_session_id=image_prompts_session.id,
+            prompt=prompt,
+        )
+        session.add(image_prompt)
+    session.flush()
+
+    return image_prompts_session
+
+
+def summerize_document_and_generate_image_prompts(
+    session: Session,
+    document_path: str,
+    llm_api_key: str,
+    llm_model_name: str,
+    llm_temperature: float,
+    llm_top_p: float,
+    llm_top_k: int,
+    llm_provider: str,
+    max_document_summary_size: int,
+    total_prompts_to_generate: int,
+    summarize_and_generate_image_prompts_prompt_messages: list[dict[str, str]],
+    summarize_and_generate_image_prompts_prompt_parameters: list[str],
+    llm_cache: Optional[LLMCache] = None,
+    parser_workers: int = 1,
+    document_cache: Optional[DocumentCache] = None,
+    memoize: bool = True,
+) -> Optional[tuple[DocumentSummarySession, ImagePromptsSession]]:
+    """
+    Summarizes a short document and generates image prompts from it in a single LLM call.
+
+    The sessions are stored like the ones of `summerize_document` and
+    `generate_image_prompts`. The whole document is stored as a single chunk,
+    whose summary is the document summary, and the chunking settings, which do
+    not apply, are left empty.
+
+    Args:
+        document_path (str): Path to the document.
+        llm_api_key (str): The API key for the model (if required).
+        llm_model_name (str): The name of the model to load.
+        llm_temperature (float): The temperature setting for the model.
+        llm_top_p (float): The top-p setting for the model.
+        llm_top_k (int): The top-k setting for the model.
+        llm_provider (str): The name of the API to use (e.g., "ollama", "openai").
+        max_document_summary_size (int): Maximum size of the document summary.
+        total_prompts_to_generate (int): The total number of prompts to generate.
+        summarize_and_generate_image_prompts_prompt_messages (list[dict[str, str]]): Messages for the fused call.
+        summarize_and_generate_image_prompts_prompt_parameters (list[str]): A list of parameter names to be used in the prompt.
+        llm_cache (Optional[LLMCache]): If given, LLM responses are served from and stored in this cache.
+        parser_workers (int): Number of processes extracting PDF text in parallel.
+        document_cache (Optional[DocumentCache]): If given, parsed text is served from and stored in this cache.
+        memoize (bool): If `True` and a document with the same content was already processed by this function with the same settings, its stored sessions are returned instead of calling the LLM again.
+
+    Returns:
+        Optional[tuple[DocumentSummarySession, ImagePromptsSession]]: The document
+            summary and image prompts sessions created (or stored), or None if the document
+            does not fit in a single call of the model, in which case nothing is
+            generated and `summerize_document` should be used instead.
+    """
+    # Retrieve LLM provider from the database
+    llm_providers: List[LlmProvider] = (
+        session.query(LlmProvider).filter_by(name=llm_provider).all()
+    )
+    assert bool(
+        llm_providers
+    ), f"LLM provider {llm_provider} not found in the database."
+    assert len(llm_providers) == 1, "Multiple LLM providers found with the same name."
+    llm_provider_obj: LlmProvider = llm_providers[0]
 
     # Retrieve LLM model from the database
     llm_models: List[LlmModel] = (
         session.query(LlmModel)
-        .filter_by(name=llm_model_name, provider_id=llm_provider.id)
+        .filter_by(name=llm_model_name, provider_id=llm_provider_obj.id)
         .all()
     )
     assert bool(llm_models), f"LLM model {llm_model_name} not found in the database."
     assert len(llm_models) == 1, "Multiple LLM models found with the same name."
     llm_model: LlmModel = llm_models[0]
 
-    # Retrieve or create the document entry in the database
-    documents: List[Document] = (
-        session.query(Document).filter_by(name=os.path.basename(document_path)).all()
+    content_hash = hash_file(document_path)
+    parameters_hash = _hash_parameters(
+        {
+            "single_call": True,
+            "llm_model_id": llm_model.id,
+            "llm_temperature": llm_temperature,
+            "llm_top_p": llm_top_p,
+            "llm_top_k": llm_top_k,
+            "max_document_summary_size": max_document_summary_size,
+            "total_prompts_to_generate": total_prompts_to_generate,
+            "summarize_and_generate_image_prompts_prompt": summarize_and_generate_image_prompts_prompt_messages,
+        }
     )
-    if not documents:
-        document = Document(
-            name=os.path.basename(document_path), upload_date=generation_date
+    if memoize:
+        image_prompts_session = (
+            session.query(ImagePromptsSession)
+            .join(ImagePromptsSession.document_summary)
+            .join(DocumentSummarySession.document)
+            .filter(
+                Document.content_hash == content_hash,
+                DocumentSummarySession.parameters_hash == parameters_hash,
+                DocumentSummarySession.status == "completed",
+            )
+            .order_by(ImagePromptsSession.id.desc())
+            .first()
         )
-        session.add(document)
-        session.flush()
-    else:
-        assert len(documents) == 1, "Multiple documents found with the same name."
-        document: Document = documents[0]
+        if image_prompts_session is not None:
+            return image_prompts_session.document_summary, image_prompts_session
 
-    # Create a new image prompts session
-    image_prompts_session = ImagePromptsSession(
-        document_summary_id=summary_session.id,
+    capabilities = get_llm_model_capabilities(session, llm_model, llm_api_key)
+    if not capabilities.supports_structured_output:
+        return None
+
+    # Documents too long for the model are only parsed until that is known
+    parsed_document = parse_short_document(
+        document_path,
+        max_length=max_single_call_document_length(capabilities),
+        parser_workers=parser_workers,
+        cache=document_cache,
+    )
+    if parsed_document is None:
+        return None
+    document_text, _ = parsed_document
+
+    prompt = Prompt(
+        messages=summarize_and_generate_image_prompts_prompt_messages,
+        parameters=summarize_and_generate_image_prompts_prompt_parameters,
+    )
+    if not fits_single_call(
+        capabilities=capabilities,
+        summarize_and_generate_image_prompts_prompt=prompt,
+        document_text=document_text,
+        max_document_summary_size=max_document_summary_size,
+        total_prompts_to_generate=total_prompts_to_generate,
+    ):
+        return None
+
+    generator = SummaryAndImagePromptsGenerator(
+        llm=create_llm(
+            model_name=llm_model_name,
+            provider=llm_provider,
+            temperature=llm_temperature,
+            top_p=llm_top_p,
+            top_k=llm_top_k,
+            api_key=llm_api_key,
+            cache=llm_cache,
+        ),
+        document_text=document_text,
+        max_document_summary_size=max_document_summary_size,
+        total_prompts_to_generate=total_prompts_to_generate,
+        summarize_and_generate_image_prompts_prompt=prompt,
+    )
+
+    start_time = time()
+    document_summary, image_prompts, prompt_tokens = generator.run()
+    session_time = time() - start_time
+    generation_date = datetime.now()
+
+    # The document is stored after the call, so no write is pending meanwhile
+    document = _get_or_create_document(session, document_path, content_hash)
+    summary_session = DocumentSummarySession(
+        document_id=document.id,
+        document_summary=document_summary,
+        chunk_size=None,
+        chunk_overlap=0,
+        max_chunk_summary_size=None,
+        max_document_summary_size=max_document_summary_size,
         llm_model_id=llm_model.id,
         llm_temperature=llm_temperature,
         llm_top_p=llm_top_p,
         llm_top_k=llm_top_k,
         generation_date=generation_date,
         session_time=session_time,
+        status="completed",
+        parameters_hash=parameters_hash,
+    )
+    session.add(summary_session)
+    session.flush()
+
+    # The whole document is a single chunk, summarized by the same call
+    session.add(
+        _create_chunk_summary(
+            ChunkSummaryResult(
+                summary=document_summary,
+                prompt_tokens=prompt_tokens,
+                page=0,
+                chunk_index=0,
+                content_hash=Chunk(document_text, 0, len(document_text)).content_hash,
+            ),
+            summary_session.id,
+        )
     )
 
+    # The call time is accounted to the summary session only, so the sessions
+    # of a document still add up to the time it took to process it
+    image_prompts_session = ImagePromptsSession(
+        document_summary_id=summary_session.id,
+        llm_model_id=llm_model.id,
+        llm_temperature=llm_temperature,
+        llm_top_p=llm_top_p,
+        llm_top_k=llm_top_k,
+        generation_date=generation_date,
+        session_time=0,
+        parameters_hash=parameters_hash,
+    )
     session.add(image_prompts_session)
     session.flush()
 
-    # Create image prompts and add them to the database
-    for prompt in image_prompts:
-        image_prompt = ImagePrompt(
-            image_prompts_session_id=image_prompts_session.id,
-            prompt=prompt,
+    for prompt_text in image_prompts:
+        session.add(
+            ImagePrompt(
+                image_prompts_session_id=image_prompts_session.id,
+                prompt=prompt_text,
+            )
         )
-        session.add(image_prompt)
     session.flush()
 
-    return image_prompts_session
+    return summary_session, image_prompts_session
 
 
 def get_all_document_summary_sessions(session: Session) -> List[DocumentSummarySession]:
     """
-    Get all document summary sessions from the database.
+    Get all the completed document summary sessions with image prompts from the database.
 
     Returns:
         list[DocumentSummarySession]: A list of document summary sessions.
     """
-    return session.query(DocumentSummarySession).all()
+    return (
+        session.query(DocumentSummarySession)
+        .filter(
+            sa.or_(
+                DocumentSummarySession.status.is_(None),
+                DocumentSummarySession.status == "completed",
+            ),
+            DocumentSummarySession.image_prompt_sessions.any(),
+        )
+        .all()
+    )
+
+
+def get_in_progress_summary_sessions(session: Session) -> List[DocumentSummarySession]:
+    """
+    Get the document summary sessions of checkpointed runs that were interrupted.
+
+    They are resumed by calling `summerize_document` again with `checkpoint=True` and the same document and settings.
+
+    Returns:
+        list[DocumentSummarySession]: A list of in-progress document summary sessions.
+    """
+    return session.query(DocumentSummarySession).filter_by(status="in_progress").all()
+
+
+def _hash_parameters(parameters: dict[str, Any]) -> str:
+    """
+    Hash the settings of a run as a SHA-256 hash of their canonical JSON form.
+
+    Args:
+        parameters (dict[str, Any]): The settings. Config containers (e.g., from Hydra) are hashed like dicts and lists.
+
+    Returns:
+        str: The hexadecimal hash.
+    """
+    canonical = json.dumps(
+        parameters,
+        sort_keys=True,
+        separators=(",", ":"),
+        default=lambda value: dict(value) if hasattr(value, "items") else list(value),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _create_chunk_summary(
+    chunk_summary_result: ChunkSummaryResult, summary_session_id: int
+) -> ChunkSummary:
+    """
+    Create the database entry of a chunk summary.
+
+    Args:
+        chunk_summary_result (ChunkSummaryResult): The chunk summary.
+        summary_session_id (int): The ID of its document summary session.
+
+    Returns:
+        ChunkSummary: The chunk summary entry.
+    """
+    return ChunkSummary(
+        chunk_summary=chunk_summary_result.summary,
+        level=chunk_summary_result.level,
+        prompt_tokens=chunk_summary_result.prompt_tokens,
+        page=chunk_summary_result.page,
+        chunk_index=chunk_summary_result.chunk_index,
+        chunk_hash=chunk_summary_result.content_hash,
+        is_sufficient=chunk_summary_result.is_sufficient,
+        document_summary_session_id=summary_session_id,
+    )
+
+
+def _get_or_create_document(
+    session: Session, document_path: str, content_hash: Optional[str] = None
+) -> Document:
+    """
+    Retrieve the document entry of a file, identified by the hash of its content, or create it.
+
+    Documents stored before content hashes were introduced are identified by their name, and get the hash of the first file matching it.
+
+    Args:
+        session (Session): The database session.
+        document_path (str): Path to the document.
+        content_hash (Optional[str]): The hash of the document content, if already computed.
+
+    Returns:
+        Document: The document entry.
+    """
+    if content_hash is None:
+        content_hash = hash_file(document_path)
+    document = session.query(Document).filter_by(content_hash=content_hash).first()
+    if document is not None:
+        return document
+
+    name = os.path.basename(document_path)
+    document = (
+        session.query(Document)
+        .filter_by(name=name, content_hash=None)
+        .order_by(Document.id)
+        .first()
+    )
+    try:
+        with session.begin_nested():
+            if document is None:
+                document = Document(name=name, upload_date=datetime.now())
+                session.add(document)
+            document.content_hash = content_hash
+            document.size = os.path.getsize(document_path)
+    except sa.exc.IntegrityError:
+        # Another worker stored the same document in the meantime
+        document = session.query(Document).filter_by(content_hash=content_hash).one()
+    return document
+
+
+def _find_reusable_summaries(
+    session: Session, chunk_summary_parameters_hash: str, chunks: dict[int, Chunk]
+) -> tuple[dict[int, ChunkSummaryResult], dict[str, ChunkSummaryResult]]:
+    """
+    Find the stored summaries of chunks with the same content, generated with the same settings.
+
+    Args:
+        session (Session): The database session.
+        chunk_summary_parameters_hash (str): The hash of the settings chunk summaries depend on.
+        chunks (dict[int, Chunk]): The chunks to find a summary for, keyed by chunk index.
+
+    Returns:
+        tuple[dict[int, ChunkSummaryResult], dict[str, ChunkSummaryResult]]: The reused chunk summaries, keyed by chunk index, and the merged summaries of the sessions they come from, keyed by the hash of the summaries they merged. Reused summaries cost no prompt tokens.
+    """
+    chunk_hashes = {index: chunk.content_hash for index, chunk in chunks.items()}
+    if not chunk_hashes:
+        return {}, {}
+
+    # The most recent summary of each chunk content wins
+    rows: List[ChunkSummary] = (
+        session.query(ChunkSummary)
+        .join(ChunkSummary.document_summary)
+        .filter(
+            DocumentSummarySession.chunk_summary_parameters_hash
+            == chunk_summary_parameters_hash,
+            ChunkSummary.level == 0,
+            ChunkSummary.chunk_hash.in_(set(chunk_hashes.values())),
+        )
+        .order_by(ChunkSummary.id)
+        .all()
+    )
+    summaries_by_hash = {row.chunk_hash: row for row in rows}
+    chunk_summaries = {
+        index: ChunkSummaryResult(
+            summary=summaries_by_hash[chunk_hash].chunk_summary,
+            prompt_tokens=0,
+            page=chunks[index].page,
+            chunk_index=index,
+            content_hash=chunk_hash,
+        )
+        for index, chunk_hash in chunk_hashes.items()
+        if chunk_hash in summaries_by_hash
+    }
+
+    merged_rows: List[ChunkSummary] = (
+        session.query(ChunkSummary)
+        .filter(
+            ChunkSummary.document_summary_session_id.in_(
+                {row.document_summary_session_id for row in summaries_by_hash.values()}
+            ),
+            ChunkSummary.level > 0,
+            ChunkSummary.chunk_hash.is_not(None),
+        )
+        .all()
+    )
+    merged_summaries = {
+        row.chunk_hash: ChunkSummaryResult(
+            summary=row.chunk_summary,
+            level=row.level,
+            prompt_tokens=0,
+            content_hash=row.chunk_hash,
+        )
+        for row in merged_rows
+    }
+    return chunk_summaries, merged_summaries
+
+
+def submit_pipeline_job(
+    session: Session,
+    document_path: str,
+    parameters: dict[str, Any],
+    llm_api_key: Optional[str] = None,
+) -> PipelineJob:
+    """
+    Queue a pipeline job to be run by a worker (see `doc2image.worker`).
+
+    Args:
+        session (Session): The database session.
+        document_path (str): Path to the document. It must stay available until the job finishes, and be readable by the workers.
+        parameters (dict[str, Any]): The pipeline settings of the job. They must be JSON serializable.
+        llm_api_key (Optional[str]): The API key for the model (if required). It is deleted once the job finishes.
+
+    Returns:
+        PipelineJob: The pending job created.
+    """
+    job = PipelineJob(
+        status="pending",
+        document_path=document_path,
+        parameters=parameters,
+        llm_api_key=llm_api_key,
+        created_at=datetime.now(),
+    )
+    session.add(job)
+    session.flush()
+    return job
+
+
+def get_pipeline_job(session: Session, job_id: int) -> PipelineJob | None:
+    """
+    Get a pipeline job by its ID.
+
+    Args:
+        session (Session): The database session.
+        job_id (int): The ID of the job.
+
+    Returns:
+        PipelineJob | None: The job, or None if not found.
+    """
+    return session.get(PipelineJob, job_id)
+
+
+def claim_pipeline_job(
+    session: Session, worker_id: str, stale_after_seconds: Optional[float] = None
+) -> PipelineJob | None:
+    """
+    Claim the oldest pending job for a worker.
+
+    Jobs are claimed with a conditional update, so concurrent workers never claim the same job. The claim must be committed right away for other workers to see it.
+
+    Args:
+        session (Session): The database session.
+        worker_id (str): Identifier of the worker claiming the job.
+        stale_after_seconds (Optional[float]): If given, running jobs whose worker has not reported progress for this long are considered abandoned and can be claimed again.
+
+    Returns:
+        PipelineJob | None: The claimed job, or None if there are no jobs to run.
+    """
+    now = datetime.now()
+    claimable = PipelineJob.status == "pending"
+    if stale_after_seconds is not None:
+        stale_before = now - timedelta(seconds=stale_after_seconds)
+        claimable = sa.or_(
+            claimable,
+            sa.and_(
+                PipelineJob.status == "running",
+                PipelineJob.heartbeat_at < stale_before,
+            ),
+        )
+
+    candidate_ids = session.scalars(
+        sa.select(PipelineJob.id).where(claimable).order_by(PipelineJob.id).limit(10)
+    ).all()
+    for job_id in candidate_ids:
+        # The condition is checked again by the update itself: another worker
+        # may have claimed the job since it was selected
+        claimed = session.execute(
+            sa.update(PipelineJob)
+            .where(PipelineJob.id == job_id, claimable)
+            .values(
+                status="running",
+                worker_id=worker_id,
+                progress=0.0,
+                progress_message=None,
+                image_prompts=None,
+                error=None,
+                started_at=now,
+                heartbeat_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if claimed == 1:
+            return session.get(PipelineJob, job_id, populate_existing=True)
+    return None
+
+
+def update_pipeline_job_progress(
+    session: Session,
+    job: PipelineJob,
+    progress: float,
+    message: str,
+    image_prompts: Optional[list[str]] = None,
+) -> None:
+    """
+    Report the progress of a running job, which also tells other workers that it is not abandoned.
+
+    Args:
+        session (Session): The database session.
+        job (PipelineJob): The running job.
+        progress (float): Fraction of the job completed, between 0 and 1.
+        message (str): Description of the current step of the job.
+        image_prompts (Optional[list[str]]): If given, the image prompts generated so far.
+    """
+    job.progress = min(max(progress, 0.0), 1.0)
+    job.progress_message = message[:200]
+    if image_prompts is not None:
+        job.image_prompts = list(image_prompts)
+    job.heartbeat_at = datetime.now()
+    session.flush()
+
+
+def refresh_pipeline_job_heartbeat(
+    session: Session, job_id: int, worker_id: str
+) -> bool:
+    """
+    Tell other workers that a running job is not abandoned, without changing its progress.
+
+    Unlike `update_pipeline_job_progress`, it only updates the heartbeat column, so it can run from another thread and database session than the one running the job.
+
+    Args:
+        session (Session): The database session.
+        job_id (int): The ID of the running job.
+        worker_id (str): Identifier of the worker running the job.
+
+    Returns:
+        bool: Whether the job is still running on this worker.
+    """
+    refreshed = session.execute(
+        sa.update(PipelineJob)
+        .where(
+            PipelineJob.id == job_id,
+            PipelineJob.worker_id == worker_id,
+            PipelineJob.status == "running",
+        )
+        .values(heartbeat_at=datetime.now())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    return refreshed == 1
+
+
+def finish_pipeline_job(
+    session: Session,
+    job: PipelineJob,
+    summary_session: Optional[DocumentSummarySession] = None,
+    error: Optional[str] = None,
+) -> None:
+    """
+    Mark a job as completed or, if an error is given, as failed.
+
+    Args:
+        session (Session): The database session.
+        job (PipelineJob): The running job.
+        summary_session (Optional[DocumentSummarySession]): The document summary session created by the job.
+        error (Optional[str]): The error that made the job fail.
+    """
+    now = datetime.now()
+    job.status = "failed" if error is not None else "completed"
+    job.error = error[:10_000] if error is not None else None
+    if error is None:
+        job.progress = 1.0
+        job.progress_message = "Completed"
+    if summary_session is not None:
+        job.summary_session_id = summary_session.id
+    job.llm_api_key = None
+    job.finished_at = now
+    job.heartbeat_at = now
+    session.flush()
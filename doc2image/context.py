@@ -0,0 +1,84 @@
+from typing import Awaitable, Callable, Optional
+
+from .tokenizer import CHARS_PER_TOKEN, count_tokens
+
+
+class RollingContext:
+    """
+    Rolling context of chunk summaries kept under a token budget.
+
+    Summaries are appended in document order. When the rendered context goes
+    over the budget, every summary but the newest one is replaced by a single
+    compacted digest of at most half the budget, so the context sent with each
+    prompt stays bounded no matter how many chunks have been summarized, and
+    several summaries fit after each compaction before the next one.
+    """
+
+    def __init__(
+        self,
+        token_budget: Optional[int],
+        compact: Callable[[list[str], int], Awaitable[tuple[str, int]]],
+        separator: str = "\n\n",
+    ) -> None:
+        """
+        Initialize the rolling context.
+
+        Args:
+            token_budget (Optional[int]): Maximum number of tokens of the rendered
+                context. If `None`, the context grows without limit.
+            compact (Callable[[list[str], int], Awaitable[tuple[str, int]]]):
+                Coroutine function merging a list of summaries into a single
+                digest of at most the given number of tokens. Returns the digest
+                and the number of tokens sent to the LLM to produce it.
+            separator (str): Separator used to join the summaries.
+        """
+        self.token_budget = token_budget
+        self.compact = compact
+        self.separator = separator
+        self.compactions = 0
+        self.prompt_tokens = 0
+        self._summaries: list[str] = []
+
+    @property
+    def text(self) -> str:
+        """
+        The context rendered as a single string.
+        """
+        return self.separator.join(self._summaries)
+
+    @property
+    def tokens(self) -> int:
+        """
+        The estimated number of tokens of the rendered context.
+        """
+        return count_tokens(self.text)
+
+    async def append(self, summary: str) -> int:
+        """
+        Append a summary to the context, compacting older summaries into a
+        digest if the token budget is exceeded.
+
+        Args:
+            summary (str): The summary to append.
+
+        Returns:
+            int: The number of tokens sent to the LLM to compact the context (0
+                if it was not compacted). They are also added to `prompt_tokens`.
+        """
+        self._summaries.append(summary)
+        if self.token_budget is None or len(self._summaries) < 2:
+            return 0
+
+        if self.tokens <= self.token_budget:
+            return 0
+
+        digest_tokens = max(self.token_budget // 2, 1)
+        digest, prompt_tokens = await self.compact(self._summaries[:-1], digest_tokens)
+        # A digest longer than requested would trigger a compaction on every
+        # append, so it is cut to size
+        if count_tokens(digest) > digest_tokens:
+            digest = digest[: digest_tokens * CHARS_PER_TOKEN]
+        self._summaries = [digest, self._summaries[-1]]
+        self.compactions += 1
+        self.prompt_tokens += prompt_tokens
+        return prompt_tokens
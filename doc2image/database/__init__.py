@@ -6,6 +6,7 @@ from .schema import (
     ChunkSummary,
     ImagePromptsSession,
     ImagePrompt,
+    PipelineJob,
     Base,
     Session,
 )
@@ -48,6 +48,13 @@ class LlmModel(Base):
         name (str): Name of the model.
         available (bool): Availability status of the model.
         provider_id (int): Identifier for the associated provider.
+        context_window (int): Maximum number of tokens of a call, prompt and
+            output included.
+        max_output_tokens (int): Maximum number of tokens generated in a call.
+        supports_structured_output (bool): Whether the model can be constrained
+            to answer with a JSON schema.
+        capabilities_version (str): Version of the registry of known models the
+            capabilities were looked up with.
     """
 
     __tablename__ = "llm_model"
@@ -56,6 +63,10 @@ class LlmModel(Base):
     name: Mapped[str] = mapped_column(sa.String(100), unique=True)
     available: Mapped[bool] = mapped_column(sa.Boolean)
     provider_id: Mapped[int] = mapped_column(sa.ForeignKey("llm_provider.id"))
+    context_window: Mapped[int] = mapped_column(nullable=True)
+    max_output_tokens: Mapped[int] = mapped_column(nullable=True)
+    supports_structured_output: Mapped[bool] = mapped_column(nullable=True)
+    capabilities_version: Mapped[str] = mapped_column(sa.String(20), nullable=True)
 
     provider: Mapped["LlmProvider"] = relationship(back_populates="llm_models")
     document_summary_sessions: Mapped[list["DocumentSummarySession"]] = relationship(
@@ -72,15 +83,22 @@ class Document(Base):
 
     Attributes:
         id (int): Unique identifier for the document.
-        name (str): Name of the document.
+        name (str): Name of the document. Different documents can share a name.
         upload_date (datetime): Date when the document was uploaded.
+        content_hash (str): SHA-256 hash of the document file, identifying the
+            document. Documents created before it was stored have none.
+        size (int): Size of the document file in bytes.
     """
 
     __tablename__ = "document"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    name: Mapped[str] = mapped_column(sa.String(100), unique=True)
+    name: Mapped[str] = mapped_column(sa.String(100))
     upload_date: Mapped[datetime] = mapped_column(default=datetime)
+    content_hash: Mapped[str] = mapped_column(
+        sa.String(64), nullable=True, unique=True, index=True
+    )
+    size: Mapped[int] = mapped_column(sa.BigInteger, nullable=True)
 
     summaries: Mapped[typing.List["DocumentSummarySession"]] = relationship(
         back_populates="document"
@@ -95,7 +113,11 @@ class DocumentSummarySession(Base):
         id (int): Unique identifier for the session.
         document_id (int): Identifier for the associated document.
         document_summary (str): Summary of the document.
-        max_chunk_summary_size (int): Maximum size of chunk summaries.
+        chunk_size (int): Maximum size of the chunks. None if the document was
+            summarized in a single call, without being chunked.
+        chunk_overlap (int): Overlap between chunks.
+        max_chunk_summary_size (int): Maximum size of chunk summaries. None if
+            the document was summarized in a single call.
         max_document_summary_size (int): Maximum size of the document summary.
         llm_model_id (int): Identifier for the associated LLM model.
         llm_temperature (float): Temperature setting for the LLM model.
@@ -103,6 +125,20 @@ class DocumentSummarySession(Base):
         llm_top_k (int): Top-k setting for the LLM model.
         generation_date (datetime): Date when the summary was generated.
         session_time (int): Duration of the session in seconds.
+        duplicate_chunks (int): Number of near-duplicate chunks that were not
+            summarized, i.e. LLM calls saved by deduplication.
+        status (str): "in_progress" while the chunk summaries of a checkpointed
+            run are being stored, "completed" once the document summary is
+            generated. Sessions created before checkpointing have no status and
+            are completed.
+        parameters_hash (str): Hash of the document chunking and summarization
+            settings, used to find the interrupted run to resume.
+        chunk_summary_parameters_hash (str): Hash of the settings a chunk summary
+            depends on, for strategies summarizing each chunk on its own. Chunk
+            summaries of sessions with the same hash can be reused for chunks
+            with the same content.
+        reused_chunks (int): Number of chunk summaries reused from earlier
+            sessions, i.e. LLM calls saved by incremental summarization.
     """
 
     __tablename__ = "document_summary_session"
@@ -110,9 +146,9 @@ class DocumentSummarySession(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     document_id: Mapped[int] = mapped_column(sa.ForeignKey("document.id"))
     document_summary: Mapped[str] = mapped_column(sa.String(10_000))
-    chunk_size: Mapped[int] = mapped_column()
+    chunk_size: Mapped[int] = mapped_column(nullable=True)
     chunk_overlap: Mapped[int] = mapped_column()
-    max_chunk_summary_size: Mapped[int] = mapped_column()
+    max_chunk_summary_size: Mapped[int] = mapped_column(nullable=True)
     max_document_summary_size: Mapped[int] = mapped_column()
     llm_model_id: Mapped[int] = mapped_column(sa.ForeignKey("llm_model.id"))
     llm_temperature: Mapped[float] = mapped_column()
@@ -120,6 +156,13 @@ class DocumentSummarySession(Base):
     llm_top_k: Mapped[int] = mapped_column()
     generation_date: Mapped[datetime] = mapped_column(default=datetime)
     session_time: Mapped[int] = mapped_column()
+    duplicate_chunks: Mapped[int] = mapped_column(nullable=True)
+    status: Mapped[str] = mapped_column(sa.String(20), nullable=True)
+    parameters_hash: Mapped[str] = mapped_column(sa.String(64), nullable=True)
+    chunk_summary_parameters_hash: Mapped[str] = mapped_column(
+        sa.String(64), nullable=True, index=True
+    )
+    reused_chunks: Mapped[int] = mapped_column(nullable=True)
 
     document: Mapped["Document"] = relationship(back_populates="summaries")
     chunk_summaries: Mapped[typing.List["ChunkSummary"]] = relationship(
@@ -141,6 +184,17 @@ class ChunkSummary(Base):
         id (int): Unique identifier for the chunk summary.
         document_summary_session_id (int): Identifier for the associated document summary session.
         chunk_summary (str): Summary of the chunk.
+        level (int): Level of the summary in the reduction tree (0 for chunk
+            summaries, higher for merged summaries).
+        prompt_tokens (int): Estimated number of tokens sent to the LLM to
+            produce the summary.
+        page (int): Page of the document where the summarized chunk starts.
+        chunk_index (int): Index of the summarized chunk in the document chunks.
+        chunk_hash (str): SHA-256 hash of the summarized text: the chunk text for
+            chunk summaries, the merged summaries for higher levels.
+        is_sufficient (bool): Whether the LLM considered the summaries sufficient
+            to infer the document's main idea once the chunk was summarized, so
+            a resumed run stops where the interrupted one would have stopped.
     """
 
     __tablename__ = "chunk_summary"
@@ -150,6 +204,12 @@ class ChunkSummary(Base):
         sa.ForeignKey("document_summary_session.id")
     )
     chunk_summary: Mapped[str] = mapped_column(sa.String(10_000))
+    level: Mapped[int] = mapped_column(default=0, nullable=True)
+    prompt_tokens: Mapped[int] = mapped_column(nullable=True)
+    page: Mapped[int] = mapped_column(nullable=True)
+    chunk_index: Mapped[int] = mapped_column(nullable=True)
+    chunk_hash: Mapped[str] = mapped_column(sa.String(64), nullable=True, index=True)
+    is_sufficient: Mapped[bool] = mapped_column(nullable=True)
 
     document_summary: Mapped["DocumentSummarySession"] = relationship(
         back_populates="chunk_summaries"
@@ -169,6 +229,10 @@ class ImagePromptsSession(Base):
         llm_top_k (int): Top-k setting for the LLM model.
         generation_date (datetime): Date when the prompts were generated.
         session_time (int): Duration of the session in seconds.
+        time_to_first_prompt (float): Seconds elapsed until the first prompt was
+            generated.
+        parameters_hash (str): Hash of the image prompts generation settings,
+            used to return the stored prompts of identical runs.
     """
 
     __tablename__ = "image_prompts_session"
@@ -183,6 +247,8 @@ class ImagePromptsSession(Base):
     llm_top_k: Mapped[int] = mapped_column()
     generation_date: Mapped[datetime] = mapped_column(default=datetime)
     session_time: Mapped[int] = mapped_column()
+    time_to_first_prompt: Mapped[float] = mapped_column(nullable=True)
+    parameters_hash: Mapped[str] = mapped_column(sa.String(64), nullable=True)
 
     document_summary: Mapped["DocumentSummarySession"] = relationship(
         back_populates="image_prompt_sessions"
@@ -216,5 +282,199 @@ class ImagePrompt(Base):
     )
 
 
+class PipelineJob(Base):
+    """
+    Pipeline job model.
+
+    A job is a queued request to summarize a document and generate its image
+    prompts, which is run by a worker process.
+
+    Attributes:
+        id (int): Unique identifier for the job.
+        status (str): Status of the job ("pending", "running", "completed" or
+            "failed").
+        document_path (str): Path to the uploaded document.
+        parameters (dict): Pipeline settings chosen when the job was submitted.
+        llm_api_key (str): API key of the LLM provider, cleared once the job
+            finishes.
+        progress (float): Fraction of the job completed, between 0 and 1.
+        progress_message (str): Description of the current step of the job.
+        error (str): Error message of a failed job.
+        worker_id (str): Identifier of the worker that claimed the job.
+        created_at (datetime): Date when the job was submitted.
+        started_at (datetime): Date when a worker claimed the job.
+        finished_at (datetime): Date when the job completed or failed.
+        heartbeat_at (datetime): Last time the worker reported progress. Jobs
+            whose worker stopped reporting are claimed again.
+        summary_session_id (int): Identifier of the document summary session
+            created by the job.
+        image_prompts (list[str]): Image prompts generated so far, so they can be
+            shown while the job runs.
+    """
+
+    __tablename__ = "pipeline_job"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    status: Mapped[str] = mapped_column(sa.String(20), index=True)
+    document_path: Mapped[str] = mapped_column(sa.String(1000))
+    parameters: Mapped[dict] = mapped_column(sa.JSON)
+    llm_api_key: Mapped[str] = mapped_column(sa.String(100), nullable=True)
+    progress: Mapped[float] = mapped_column(default=0.0)
+    progress_message: Mapped[str] = mapped_column(sa.String(200), nullable=True)
+    error: Mapped[str] = mapped_column(sa.String(10_000), nullable=True)
+    worker_id: Mapped[str] = mapped_column(sa.String(100), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.now)
+    started_at: Mapped[datetime] = mapped_column(nullable=True)
+    finished_at: Mapped[datetime] = mapped_column(nullable=True)
+    heartbeat_at: Mapped[datetime] = mapped_column(nullable=True)
+    summary_session_id: Mapped[int] = mapped_column(
+        sa.ForeignKey("document_summary_session.id"), nullable=True
+    )
+    image_prompts: Mapped[list] = mapped_column(sa.JSON, nullable=True)
+
+    summary_session: Mapped["DocumentSummarySession"] = relationship()
+
+
+def _add_missing_columns(engine: sa.Engine) -> None:
+    """
+    Add columns and indexes that were introduced after a table was first created.
+
+    `create_all` only creates missing tables, so databases created by older
+    versions would otherwise lack new (nullable) columns and their indexes.
+
+    Args:
+        engine (sa.Engine): The database engine.
+    """
+    inspector = sa.inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing_columns = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(
+                    sa.text(
+                        f"ALTER TABLE {table.name} "
+                        f"ADD COLUMN {column.name} {column_type}"
+                    )
+                )
+            existing_indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(connection)
+
+
+def _drop_document_name_unique_constraint(engine: sa.Engine) -> None:
+    """
+    Drop the unique constraint on document names of databases created by older
+    versions, where documents were identified by their name.
+
+    SQLite cannot drop constraints, so the table is copied into a new one
+    without it, which then replaces the old one.
+
+    Args:
+        engine (sa.Engine): The database engine.
+    """
+    inspector = sa.inspect(engine)
+    if not inspector.has_table("document"):
+        return
+    constraints = [
+        constraint
+        for constraint in inspector.get_unique_constraints("document")
+        if constraint["column_names"] == ["name"]
+    ]
+    if not constraints:
+        return
+
+    with engine.begin() as connection:
+        if engine.dialect.name != "sqlite":
+            for constraint in constraints:
+                connection.execute(
+                    sa.text(f"ALTER TABLE document DROP CONSTRAINT {constraint['name']}")
+                )
+            return
+
+        _copy_sqlite_table(connection, inspector, Document.__table__)
+
+
+def _drop_not_null_constraints(engine: sa.Engine) -> None:
+    """
+    Allow null values in the columns that became nullable after a table was
+    first created, e.g. the chunking settings of sessions summarized in a
+    single call.
+
+    SQLite cannot alter columns, so the table is copied into a new one with the
+    current definition, which then replaces the old one.
+
+    Args:
+        engine (sa.Engine): The database engine.
+    """
+    inspector = sa.inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        not_null_columns = {
+            c["name"] for c in inspector.get_columns(table.name) if not c["nullable"]
+        }
+        columns = [
+            column
+            for column in table.columns
+            if column.nullable and column.name in not_null_columns
+        ]
+        if not columns:
+            continue
+
+        with engine.begin() as connection:
+            if engine.dialect.name != "sqlite":
+                for column in columns:
+                    connection.execute(
+                        sa.text(
+                            f"ALTER TABLE {table.name} "
+                            f"ALTER COLUMN {column.name} DROP NOT NULL"
+                        )
+                    )
+                continue
+            _copy_sqlite_table(connection, inspector, table)
+
+
+def _copy_sqlite_table(
+    connection: sa.Connection, inspector: sa.Inspector, table: sa.Table
+) -> None:
+    """
+    Replace a SQLite table by a copy created from its current definition.
+
+    Indexes are created afterwards by `_add_missing_columns`, under their own
+    names.
+
+    Args:
+        connection (sa.Connection): The database connection.
+        inspector (sa.Inspector): Inspector of the database before the copy.
+        table (sa.Table): The current definition of the table.
+    """
+    new_name = f"{table.name}_new"
+    columns = ", ".join(c["name"] for c in inspector.get_columns(table.name))
+    # The tables it references must be defined to create its foreign keys
+    metadata = sa.MetaData()
+    for other_table in Base.metadata.sorted_tables:
+        if other_table is not table:
+            other_table.to_metadata(metadata)
+    connection.execute(
+        sa.schema.CreateTable(table.to_metadata(metadata, name=new_name))
+    )
+    connection.execute(
+        sa.text(
+            f"INSERT INTO {new_name} ({columns}) SELECT {columns} FROM {table.name}"
+        )
+    )
+    connection.execute(sa.text(f"DROP TABLE {table.name}"))
+    connection.execute(sa.text(f"ALTER TABLE {new_name} RENAME TO {table.name}"))
+
+
 # Create tables in the database if they don't exist
+_drop_document_name_unique_constraint(db.engine)
+_drop_not_null_constraints(db.engine)
+_add_missing_columns(db.engine)
 Base.metadata.create_all(db.engine, checkfirst=True)
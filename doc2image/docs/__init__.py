@@ -1,3 +1,13 @@
-from .chunkenizer import chunkenize_document
+from .cache import DocumentCache, hash_file
+from .chunk import Chunk
+from .dedup import deduplicate_chunks
+from .extractive import compress_text
+from .sampling import sample_chunks
+from .chunkenizer import (
+    chunkenize_document,
+    iter_document_chunks,
+    parse_document,
+    parse_short_document,
+)
 
 AVAILABLE_FORMATS = ["pdf", "txt", "md", "docx", "py", "json", "yaml", "yml"]
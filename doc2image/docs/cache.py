@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Optional
+
+from .chunk import Chunk
+from .parser import DocumentParser
+
+_READ_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_file(document_path: str) -> str:
+    """
+    Compute the SHA-256 hash of the bytes of a file.
+
+    Args:
+        document_path (str): Path to the file.
+
+    Returns:
+        str: The hexadecimal hash of the file.
+    """
+    sha256 = hashlib.sha256()
+    with open(document_path, "rb") as file:
+        while block := file.read(_READ_BLOCK_SIZE):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+class DocumentCache:
+    """
+    Content-addressed on-disk cache of parsed and chunked documents.
+
+    The extracted text is keyed by the SHA-256 of the file bytes and the parser
+    type and version, and the chunk list is keyed by the text key and the
+    splitter parameters, so changing the splitter settings still reuses the
+    extracted text. Entries are stored as JSON files, and the least recently
+    used ones are evicted once the cache grows over `max_size_bytes`.
+
+    The directory can be shared by several processes: an entry removed by
+    another process at any point is treated as a miss, or as already evicted.
+    """
+
+    def __init__(self, directory: str, max_size_bytes: int) -> None:
+        """
+        Initialize the document cache.
+
+        Args:
+            directory (str): Directory where the entries are stored.
+            max_size_bytes (int): Maximum total size of the stored entries.
+        """
+        self.directory = directory
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def text_key(document_path: str, parser: DocumentParser) -> str:
+        """
+        Build the key of the text extracted from a document.
+
+        Args:
+            document_path (str): Path to the document.
+            parser (DocumentParser): The parser used to extract the text.
+
+        Returns:
+            str: The hexadecimal key.
+        """
+        payload = {
+            "sha256": hash_file(document_path),
+            "parser": type(parser).__name__,
+            "parser_version": parser.version,
+            "separator": parser.separator,
+        }
+        return DocumentCache._hash(payload)
+
+    @staticmethod
+    def chunks_key(text_key: str, splitter_params: dict[str, Any]) -> str:
+        """
+        Build the key of the chunks of a document.
+
+        Args:
+            text_key (str): The key of the text extracted from the document.
+            splitter_params (dict[str, Any]): The parameters of the text splitter.
+
+        Returns:
+            str: The hexadecimal key.
+        """
+        return DocumentCache._hash({"text": text_key, "splitter": splitter_params})
+
+    def get_text(self, key: str) -> Optional[tuple[str, list[int]]]:
+        """
+        Get the cached text of a document.
+
+        Args:
+            key (str): The text key.
+
+        Returns:
+            Optional[tuple[str, list[int]]]: The extracted text and the offset
+                where each page starts in it, or None if it is not cached.
+        """
+        value = self._get(f"text-{key}")
+        if value is None:
+            return None
+        return value["text"], value["page_offsets"]
+
+    def set_text(self, key: str, text: str, page_offsets: list[int]) -> None:
+        """
+        Store the text extracted from a document.
+
+        Args:
+            key (str): The text key.
+            text (str): The extracted text.
+            page_offsets (list[int]): The offset where each page starts in the text.
+        """
+        self._set(f"text-{key}", {"text": text, "page_offsets": page_offsets})
+
+    def get_chunks(self, key: str) -> Optional[list[Chunk]]:
+        """
+        Get the cached chunks of a document.
+
+        Args:
+            key (str): The chunks key.
+
+        Returns:
+            Optional[list[Chunk]]: The document chunks, or None if they are not cached.
+        """
+        value = self._get(f"chunks-{key}")
+        if value is None:
+            return None
+
+        # Rebuild a single buffer shared by all the chunks
+        buffer = "".join(text for text, _ in value)
+        chunks = []
+        start = 0
+        for text, page in value:
+            chunks.append(Chunk(buffer, start, start + len(text), page))
+            start += len(text)
+        return chunks
+
+    def set_chunks(self, key: str, chunks: list[Chunk]) -> None:
+        """
+        Store the chunks of a document.
+
+        Args:
+            key (str): The chunks key.
+            chunks (list[Chunk]): The document chunks.
+        """
+        self._set(f"chunks-{key}", [[chunk.text, chunk.page] for chunk in chunks])
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        Hit and miss counters of this instance, and the current cache size.
+        """
+        with self._lock:
+            entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "size_bytes": sum(size for _, size, _ in entries),
+        }
+
+    @staticmethod
+    def _hash(payload: dict[str, Any]) -> str:
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.json")
+
+    def _get(self, name: str) -> Any:
+        path = self._path(name)
+        with self._lock:
+            try:
+                with open(path, "r", encoding="utf-8") as file:
+                    value = json.load(file)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self.misses += 1
+                return None
+
+            # The modification time records the last access for LRU eviction
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+            self.hits += 1
+            return value
+
+    def _set(self, name: str, value: Any) -> None:
+        with self._lock:
+            # Write to a temporary file first so readers never see partial entries
+            descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+                json.dump(value, file)
+            os.replace(temp_path, self._path(name))
+            self._evict()
+
+    def _entries(self) -> list[tuple[str, int, float]]:
+        """List the stored entries as (path, size, last access time) tuples."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self) -> None:
+        """Remove the least recently used entries until the cache fits its size cap."""
+        entries = self._entries()
+        total_size = sum(size for _, size, _ in entries)
+        for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            if total_size <= self.max_size_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
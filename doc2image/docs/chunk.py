@@ -0,0 +1,83 @@
+import hashlib
+from bisect import bisect_right
+from typing import Optional
+
+
+class Chunk:
+    """
+    A chunk of a document, stored as offsets into a shared text buffer.
+
+    The chunk text is only sliced out of the buffer when it is needed, so all
+    the chunks of a document share a single copy of its text.
+
+    Attributes:
+        buffer (str): The text buffer the chunk belongs to.
+        start (int): Offset of the first character of the chunk in the buffer.
+        end (int): Offset after the last character of the chunk in the buffer.
+        page (Optional[int]): Index of the page where the chunk starts. Formats
+            without pages use the index of their natural unit of text instead
+            (e.g. paragraphs or lines).
+    """
+
+    __slots__ = ("buffer", "start", "end", "page")
+
+    def __init__(
+        self, buffer: str, start: int, end: int, page: Optional[int] = None
+    ) -> None:
+        self.buffer = buffer
+        self.start = start
+        self.end = end
+        self.page = page
+
+    @property
+    def text(self) -> str:
+        """
+        The text of the chunk.
+        """
+        return self.buffer[self.start : self.end]
+
+    @property
+    def content_hash(self) -> str:
+        """
+        The SHA-256 hash of the chunk text, identifying chunks with the same
+        content across documents and versions of a document.
+        """
+        return hashlib.sha256(self.text.encode("utf-8")).hexdigest()
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __repr__(self) -> str:
+        return f"Chunk(start={self.start}, end={self.end}, page={self.page})"
+
+
+def make_chunks(
+    buffer: str,
+    spans: list[tuple[int, int]],
+    page_offsets: list[int],
+    pages: Optional[list[int]] = None,
+) -> list[Chunk]:
+    """
+    Create the chunks of a text buffer from their offsets.
+
+    Args:
+        buffer (str): The text buffer.
+        spans (list[tuple[int, int]]): The (start, end) offsets of each chunk.
+        page_offsets (list[int]): Offset where each page starts in the buffer,
+            in increasing order.
+        pages (Optional[list[int]]): Page index of each entry of `page_offsets`.
+            Defaults to their position in the list.
+
+    Returns:
+        list[Chunk]: The chunks of the buffer.
+    """
+    chunks = []
+    for start, end in spans:
+        page = bisect_right(page_offsets, start) - 1
+        if page >= 0 and pages is not None:
+            page = pages[page]
+        chunks.append(Chunk(buffer, start, end, page if page >= 0 else None))
+    return chunks
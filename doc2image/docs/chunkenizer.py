@@ -1,34 +1,25 @@
-from typing import Union, Literal
+from typing import Iterator, Optional, Union, Literal
 
+from ..tokenizer import get_tokenizer
+from .cache import DocumentCache
+from .chunk import Chunk, make_chunks
 from .parser import DocumentParser, PdfParser, TxtParser, DocxParser
 from .text_splitter import TextSplitter
 
 
-def chunkenize_document(
-    document_path: str,
-    chunk_size: int,
-    chunk_overlap: int,
-    separators: list[str],
-    is_separator_regex: bool,
-    keep_separator: Union[bool, Literal["start", "end"]],
-    strip_whitespace: bool,
-) -> list[str]:
+def _get_parser(document_path: str, parser_workers: int = 1) -> DocumentParser:
     """
-    Splits a document into smaller parts (chunks) for processing.
+    Get the parser for a document based on its file extension.
 
     Args:
         document_path (str): Path to the document.
-        chunk_size (int): Maximum size of chunks to return
-        chunk_overlap (int): Overlap in characters between chunks
-        separators (list[str]): List of separators to use for splitting
-        is_separator_regex (bool): Whether the separators are regex patterns
-        keep_separator (Union[bool, Literal["start", "end"]]): Whether to keep the
-            separator and where to place it in each corresponding chunk (True='start')
-        strip_whitespace (bool): If `True`, strips whitespace from the start and end of
-            every document
+        parser_workers (int): Number of processes extracting PDF text in parallel.
 
     Returns:
-        list[str]: List of document chunks.
+        DocumentParser: The parser for the document.
+
+    Raises:
+        ValueError: If the file extension is not supported.
     """
     # Determine the file extension
     _, extension = document_path.split(".")
@@ -50,15 +41,274 @@ def chunkenize_document(
             f"Unsupported file extension: {extension}. Supported: {list(parsers.keys())}"
         )
 
-    parser: DocumentParser = parsers[extension]()
-    document_text = parser.parse(document_path)
+    if parsers[extension] is PdfParser:
+        return PdfParser(workers=parser_workers)
+    return parsers[extension]()
+
+
+def parse_document(
+    document_path: str,
+    parser_workers: int = 1,
+    cache: Optional[DocumentCache] = None,
+) -> tuple[str, list[int]]:
+    """
+    Extracts the whole text of a document.
+
+    Args:
+        document_path (str): Path to the document.
+        parser_workers (int): Number of processes extracting PDF text in parallel.
+        cache (Optional[DocumentCache]): If given, the extracted text is served
+            from and stored in this cache.
+
+    Returns:
+        tuple[str, list[int]]: The document text and the offset where each page
+            starts in it.
+    """
+    parser = _get_parser(document_path, parser_workers)
+    text_key = cache.text_key(document_path, parser) if cache is not None else None
+    return _parse_document(document_path, parser, cache, text_key)
 
-    # Create the chunker instance and split the document
-    return TextSplitter(
+
+def parse_short_document(
+    document_path: str,
+    max_length: int,
+    parser_workers: int = 1,
+    cache: Optional[DocumentCache] = None,
+) -> Optional[tuple[str, list[int]]]:
+    """
+    Extracts the whole text of a document, unless it is longer than a given length.
+
+    Pages are extracted one at a time and parsing stops as soon as the text is
+    too long, so long documents are not parsed in full only to be discarded.
+
+    Args:
+        document_path (str): Path to the document.
+        max_length (int): Maximum length of the text, in characters.
+        parser_workers (int): Number of processes extracting PDF text in parallel.
+        cache (Optional[DocumentCache]): If given, the extracted text is served
+            from and stored in this cache.
+
+    Returns:
+        Optional[tuple[str, list[int]]]: The document text and the offset where
+            each page starts in it, or None if the text is longer than `max_length`.
+    """
+    parser = _get_parser(document_path, parser_workers)
+    text_key = cache.text_key(document_path, parser) if cache is not None else None
+    if cache is not None:
+        cached_text = cache.get_text(text_key)
+        if cached_text is not None:
+            return cached_text if len(cached_text[0]) <= max_length else None
+
+    pages = []
+    page_offsets = []
+    offset = 0
+    for page in parser.iter_pages(document_path):
+        pages.append(page)
+        page_offsets.append(offset)
+        offset += len(page) + len(parser.separator)
+        if offset - len(parser.separator) > max_length:
+            return None
+
+    document_text = parser.separator.join(pages)
+    if cache is not None:
+        cache.set_text(text_key, document_text, page_offsets)
+    return document_text, page_offsets
+
+
+def _parse_document(
+    document_path: str,
+    parser: DocumentParser,
+    cache: Optional[DocumentCache],
+    text_key: Optional[str],
+) -> tuple[str, list[int]]:
+    """Extract the text of a document, going through the cache if one is given."""
+    if cache is None:
+        return parser.parse_with_page_offsets(document_path)
+
+    cached_text = cache.get_text(text_key)
+    if cached_text is not None:
+        return cached_text
+
+    document_text, page_offsets = parser.parse_with_page_offsets(document_path)
+    cache.set_text(text_key, document_text, page_offsets)
+    return document_text, page_offsets
+
+
+def iter_document_chunks(
+    document_path: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    separators: list[str],
+    is_separator_regex: bool,
+    keep_separator: Union[bool, Literal["start", "end"]],
+    strip_whitespace: bool,
+    parser_workers: int = 1,
+    tokenizer: Optional[str] = None,
+    content_defined: bool = False,
+) -> Iterator[Chunk]:
+    """
+    Splits a document into chunks page by page, yielding each chunk as soon as
+    it is complete.
+
+    Pages are buffered until they hold about two chunks of text. The buffer is
+    then split, every chunk but the last one is yielded, and the last one is
+    carried over to be merged with the next pages. Only a few pages are kept in
+    memory at a time, no matter the size of the document.
+
+    Args:
+        document_path (str): Path to the document.
+        chunk_size (int): Maximum size of chunks to return
+        chunk_overlap (int): Overlap in characters between chunks
+        separators (list[str]): List of separators to use for splitting
+        is_separator_regex (bool): Whether the separators are regex patterns
+        keep_separator (Union[bool, Literal["start", "end"]]): Whether to keep the
+            separator and where to place it in each corresponding chunk (True='start')
+        strip_whitespace (bool): If `True`, strips whitespace from the start and end of
+            every document
+        parser_workers (int): Number of processes extracting PDF text in parallel.
+        tokenizer (Optional[str]): Name of the tokenizer measuring chunks (e.g.,
+            "approximate", "tiktoken"). If given, `chunk_size` and `chunk_overlap`
+            are in tokens; otherwise they are in characters.
+        content_defined (bool): If `True`, chunk boundaries are chosen from the
+            content of the text, so editing a part of the document only changes
+            the chunks around it. See `TextSplitter`.
+
+    Yields:
+        Chunk: The document chunks, in order. Each chunk points into the buffer
+            of the pages it was split from.
+    """
+    parser = _get_parser(document_path, parser_workers)
+    length_function = get_tokenizer(tokenizer) if tokenizer else len
+    text_splitter = TextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
         separators=separators,
         is_separator_regex=is_separator_regex,
         keep_separator=keep_separator,
         strip_whitespace=strip_whitespace,
-    ).split_text(text=document_text)
+        length_function=length_function,
+        content_defined=content_defined,
+    )
+
+    def split_pages(pages: list[tuple[str, int]]) -> list[Chunk]:
+        buffer, page_offsets = parser.separator.join(p for p, _ in pages), []
+        offset = 0
+        for page, _ in pages:
+            page_offsets.append(offset)
+            offset += len(page) + len(parser.separator)
+        return make_chunks(
+            buffer,
+            text_splitter.split_spans(buffer),
+            page_offsets,
+            pages=[page_index for _, page_index in pages],
+        )
+
+    # Buffered pages, as (text, page index) pairs
+    pages: list[tuple[str, int]] = []
+    buffered_size = 0
+    for page_index, page in enumerate(parser.iter_pages(document_path)):
+        pages.append((page, page_index))
+        buffered_size += length_function(page)
+        if buffered_size < 2 * chunk_size:
+            continue
+
+        chunks = split_pages(pages)
+        yield from chunks[:-1]
+        pages = [(chunk.text, chunk.page) for chunk in chunks[-1:]]
+        buffered_size = sum(length_function(p) for p, _ in pages)
+
+    if pages:
+        yield from split_pages(pages)
+
+
+def chunkenize_document(
+    document_path: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    separators: list[str],
+    is_separator_regex: bool,
+    keep_separator: Union[bool, Literal["start", "end"]],
+    strip_whitespace: bool,
+    stream: bool = False,
+    parser_workers: int = 1,
+    cache: Optional[DocumentCache] = None,
+    tokenizer: Optional[str] = None,
+    content_defined: bool = False,
+) -> list[Chunk]:
+    """
+    Splits a document into smaller parts (chunks) for processing.
+
+    Args:
+        document_path (str): Path to the document.
+        chunk_size (int): Maximum size of chunks to return
+        chunk_overlap (int): Overlap in characters between chunks
+        separators (list[str]): List of separators to use for splitting
+        is_separator_regex (bool): Whether the separators are regex patterns
+        keep_separator (Union[bool, Literal["start", "end"]]): Whether to keep the
+            separator and where to place it in each corresponding chunk (True='start')
+        strip_whitespace (bool): If `True`, strips whitespace from the start and end of
+            every document
+        stream (bool): If `True`, the document is split page by page with
+            `iter_document_chunks` instead of being parsed into a single string
+            first.
+        parser_workers (int): Number of processes extracting PDF text in parallel.
+        cache (Optional[DocumentCache]): If given, the extracted text and the
+            chunks are served from and stored in this cache, so documents with
+            the same content and settings are not parsed again.
+        tokenizer (Optional[str]): Name of the tokenizer measuring chunks (e.g.,
+            "approximate", "tiktoken"). If given, `chunk_size` and `chunk_overlap`
+            are in tokens; otherwise they are in characters.
+        content_defined (bool): If `True`, chunk boundaries are chosen from the
+            content of the text, so editing a part of the document only changes
+            the chunks around it. See `TextSplitter`.
+
+    Returns:
+        list[Chunk]: List of document chunks, sharing the buffer of the document text.
+    """
+    splitter_params = {
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "separators": list(separators),
+        "is_separator_regex": is_separator_regex,
+        "keep_separator": keep_separator,
+        "strip_whitespace": strip_whitespace,
+        "content_defined": content_defined,
+    }
+    parser = _get_parser(document_path, parser_workers)
+
+    if cache is not None:
+        text_key = cache.text_key(document_path, parser)
+        chunks_key = cache.chunks_key(
+            text_key, {**splitter_params, "stream": stream, "tokenizer": tokenizer}
+        )
+        chunks = cache.get_chunks(chunks_key)
+        if chunks is not None:
+            return chunks
+
+    if stream:
+        # The text is never held as a whole when streaming, so only the chunks
+        # are cached
+        chunks = list(
+            iter_document_chunks(
+                document_path,
+                parser_workers=parser_workers,
+                tokenizer=tokenizer,
+                **splitter_params,
+            )
+        )
+    else:
+        document_text, page_offsets = _parse_document(
+            document_path, parser, cache, text_key if cache is not None else None
+        )
+
+        # Create the chunker instance and split the document
+        length_function = get_tokenizer(tokenizer) if tokenizer else len
+        spans = TextSplitter(
+            **splitter_params, length_function=length_function
+        ).split_spans(text=document_text)
+        chunks = make_chunks(document_text, spans, page_offsets)
+
+    if cache is not None:
+        cache.set_chunks(chunks_key, chunks)
+
+    return chunks
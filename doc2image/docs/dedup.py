@@ -0,0 +1,124 @@
+import numpy as np
+
+from .chunk import Chunk
+from .features import hash_shingles, hash_words, tokenize_words
+
+
+def minhash_signatures(
+    texts: list[str],
+    num_permutations: int = 128,
+    shingle_size: int = 5,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Compute the MinHash signature of each text over its word shingles.
+
+    The fraction of equal positions between two signatures estimates the
+    Jaccard similarity of the shingle sets of their texts.
+
+    Args:
+        texts (list[str]): The texts to sign.
+        num_permutations (int): Length of each signature.
+        shingle_size (int): Number of words per shingle.
+        seed (int): Seed of the random permutations.
+
+    Returns:
+        np.ndarray: A (len(texts), num_permutations) uint64 array of signatures.
+    """
+    rng = np.random.default_rng(seed)
+    # Multiply-add-shift universal hashing of the 32-bit shingles: the upper 32
+    # bits of (a * x + b) mod 2**64, with a odd. It avoids a costly modulo.
+    a = rng.integers(0, 1 << 64, size=(num_permutations, 1), dtype=np.uint64)
+    a |= np.uint64(1)
+    b = rng.integers(0, 1 << 64, size=(num_permutations, 1), dtype=np.uint64)
+    shift = np.uint64(32)
+
+    word_cache: dict[str, int] = {}
+    signatures = np.empty((len(texts), num_permutations), dtype=np.uint64)
+    for i, text in enumerate(texts):
+        word_hashes = hash_words(tokenize_words(text), word_cache)
+        shingles = hash_shingles(word_hashes, shingle_size)
+        signatures[i] = ((a * shingles + b) >> shift).min(axis=1)
+    return signatures
+
+
+def deduplicate_chunks(
+    chunks: list[Chunk],
+    threshold: float,
+    num_permutations: int = 128,
+    shingle_size: int = 5,
+    bands: int = 32,
+) -> tuple[list[Chunk], int]:
+    """
+    Drop the chunks that are near-duplicates of an earlier chunk.
+
+    Chunks are compared by the estimated Jaccard similarity of their word
+    shingles. Instead of comparing every pair, the signatures are split into
+    `bands` bands, and only chunks sharing an identical band are compared
+    (locality-sensitive hashing), so the cost grows linearly with the number
+    of chunks for typical documents.
+
+    Args:
+        chunks (list[Chunk]): The document chunks, in order.
+        threshold (float): Similarity from which a chunk is a duplicate, between
+            0 and 1.
+        num_permutations (int): Length of the MinHash signatures. Must be a
+            multiple of `bands`.
+        shingle_size (int): Number of words per shingle.
+        bands (int): Number of LSH bands.
+
+    Returns:
+        tuple[list[Chunk], int]: The chunks that are kept, in order, and the
+            number of chunks dropped.
+
+    Raises:
+        ValueError: If the threshold or the number of bands is invalid.
+    """
+    if not 0 < threshold <= 1:
+        raise ValueError("threshold must be in the (0, 1] interval.")
+    if num_permutations % bands:
+        raise ValueError("num_permutations must be a multiple of bands.")
+    if len(chunks) < 2:
+        return chunks, 0
+
+    signatures = minhash_signatures(
+        [chunk.text for chunk in chunks], num_permutations, shingle_size
+    )
+
+    # Id of the bucket of each chunk in each band: chunks sharing a bucket have
+    # an identical band of their signatures
+    rows = num_permutations // bands
+    buckets = np.stack(
+        [
+            np.unique(
+                signatures[:, band * rows : (band + 1) * rows],
+                axis=0,
+                return_inverse=True,
+            )[1].ravel()
+            for band in range(bands)
+        ],
+        axis=1,
+    )
+
+    # A chunk is dropped if it is similar to an earlier chunk that is kept. Each
+    # bucket remembers the first kept chunk that fell into it, so every chunk is
+    # compared with at most one chunk per band.
+    representatives: list[dict[int, int]] = [{} for _ in range(bands)]
+    duplicate = np.zeros(len(chunks), dtype=bool)
+    for index in range(len(chunks)):
+        candidates = {
+            representatives[band][bucket]
+            for band, bucket in enumerate(buckets[index])
+            if bucket in representatives[band]
+        }
+        if candidates:
+            similarities = (
+                signatures[list(candidates)] == signatures[index]
+            ).mean(axis=1)
+            duplicate[index] = bool((similarities >= threshold).any())
+        if not duplicate[index]:
+            for band, bucket in enumerate(buckets[index]):
+                representatives[band].setdefault(bucket, index)
+
+    kept = [chunk for chunk, drop in zip(chunks, duplicate) if not drop]
+    return kept, int(duplicate.sum())
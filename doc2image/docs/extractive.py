@@ -0,0 +1,102 @@
+import re
+
+import numpy as np
+
+from .features import tfidf_matrix
+
+# Sentences end with terminal punctuation followed by whitespace, or with a
+# blank line
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+
+def split_sentences(text: str) -> list[str]:
+    """
+    Split a text into sentences.
+
+    Args:
+        text (str): The text to split.
+
+    Returns:
+        list[str]: The non-empty sentences of the text, in order.
+    """
+    return [s.strip() for s in _SENTENCE_BOUNDARY.split(text) if s and s.strip()]
+
+
+def textrank_scores(
+    sentences: list[str], damping: float = 0.85, iterations: int = 50
+) -> np.ndarray:
+    """
+    Score sentences by their centrality with TextRank.
+
+    Sentences are nodes of a graph weighted by the cosine similarity of their
+    TF-IDF vectors, and the scores are the PageRank of that graph, computed by
+    power iteration. The similarity matrix is never built: each iteration is
+    computed from the TF-IDF matrix, so memory grows linearly with the number
+    of sentences.
+
+    Args:
+        sentences (list[str]): The sentences to score.
+        damping (float): PageRank damping factor.
+        iterations (int): Maximum number of power iterations.
+
+    Returns:
+        np.ndarray: The score of each sentence.
+    """
+    count = len(sentences)
+    matrix = tfidf_matrix(sentences, max_features=1024)
+    # Similarity of each sentence with itself (1, or 0 for sentences without
+    # words), excluded from the graph
+    self_similarity = (matrix * matrix).sum(axis=1)
+    # Total similarity of each sentence with the other ones
+    out_weights = matrix @ matrix.sum(axis=0) - self_similarity
+    connected = out_weights > 1e-9
+
+    scores = np.full(count, 1 / count, dtype=np.float32)
+    for _ in range(iterations):
+        # Each sentence spreads its score to the others in proportion to their
+        # similarity, or uniformly if it shares no words with any of them
+        shares = np.where(connected, scores / np.where(connected, out_weights, 1), 0)
+        spread = matrix @ (matrix.T @ shares) - self_similarity * shares
+        spread += scores[~connected].sum() / count
+        updated = (1 - damping) / count + damping * spread
+        if np.abs(updated - scores).sum() < 1e-6:
+            return updated
+        scores = updated
+    return scores
+
+
+def compress_text(text: str, ratio: float) -> str:
+    """
+    Shrink a text to at most `ratio` of its length by keeping its most central sentences.
+
+    Args:
+        text (str): The text to compress.
+        ratio (float): Fraction of the text length to keep, between 0 and 1.
+
+    Returns:
+        str: The kept sentences, in their original order. It is only longer than
+            `ratio` of the text when its most central sentence alone is.
+
+    Raises:
+        ValueError: If the ratio is not in the (0, 1] interval.
+    """
+    if not 0 < ratio <= 1:
+        raise ValueError("ratio must be in the (0, 1] interval.")
+
+    sentences = split_sentences(text)
+    if ratio == 1 or len(sentences) < 2:
+        return text
+
+    # Best sentences first, skipping those that no longer fit the budget. The
+    # most central sentence is always kept
+    max_length = ratio * len(text)
+    kept, length = [], -1
+    for index in np.argsort(-textrank_scores(sentences), kind="stable"):
+        # Sentences are joined with a space
+        sentence_length = len(sentences[index]) + 1
+        if kept and length + sentence_length > max_length:
+            continue
+        kept.append(index)
+        length += sentence_length
+
+    return " ".join(sentences[index] for index in sorted(kept))
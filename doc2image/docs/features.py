@@ -0,0 +1,120 @@
+import re
+import zlib
+
+import numpy as np
+
+# Words are runs of letters and digits, compared case-insensitively
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def tokenize_words(text: str) -> list[str]:
+    """
+    Split a text into lowercase words.
+
+    Args:
+        text (str): The text to split.
+
+    Returns:
+        list[str]: The words of the text, in order.
+    """
+    return _WORD_PATTERN.findall(text.lower())
+
+
+def hash_words(words: list[str], cache: dict[str, int]) -> np.ndarray:
+    """
+    Map words to stable 32-bit hashes.
+
+    Unlike the built-in `hash`, the hashes do not depend on the process, so the
+    features computed from them are reproducible across runs.
+
+    Args:
+        words (list[str]): The words to hash.
+        cache (dict[str, int]): Hashes of the words seen so far, updated in place.
+            Sharing it across texts hashes each distinct word only once.
+
+    Returns:
+        np.ndarray: The uint64 hash of each word.
+    """
+    for word in set(words).difference(cache):
+        cache[word] = zlib.crc32(word.encode("utf-8"))
+    return np.fromiter(map(cache.__getitem__, words), dtype=np.uint64, count=len(words))
+
+
+def hash_shingles(word_hashes: np.ndarray, shingle_size: int) -> np.ndarray:
+    """
+    Hash every run of `shingle_size` consecutive words into a 32-bit value.
+
+    Args:
+        word_hashes (np.ndarray): The uint64 hash of each word of a text.
+        shingle_size (int): Number of words per shingle.
+
+    Returns:
+        np.ndarray: The distinct uint64 shingle hashes. Texts shorter than a
+            shingle are hashed as a single shingle.
+    """
+    if not len(word_hashes):
+        return np.zeros(1, dtype=np.uint64)
+    shingle_size = min(shingle_size, len(word_hashes))
+
+    # Polynomial hash of each window, truncated to 32 bits
+    count = len(word_hashes) - shingle_size + 1
+    shingles = np.zeros(count, dtype=np.uint64)
+    for offset in range(shingle_size):
+        shingles *= np.uint64(1_000_003)
+        shingles += word_hashes[offset : offset + count]
+    return np.unique(shingles & np.uint64(0xFFFFFFFF))
+
+
+def tfidf_matrix(texts: list[str], max_features: int = 4096) -> np.ndarray:
+    """
+    Compute the L2-normalized TF-IDF vectors of a list of texts.
+
+    Term frequencies are log-scaled and only the `max_features` words found in
+    the most texts are kept, so the matrix stays small for large documents.
+
+    Args:
+        texts (list[str]): The texts to vectorize.
+        max_features (int): Maximum number of distinct words used as features.
+
+    Returns:
+        np.ndarray: A (len(texts), n_features) float32 array whose rows have
+            unit norm (or are zero for texts without words).
+    """
+    vocabulary: dict[str, int] = {}
+    rows, columns, distinct_columns = [], [], []
+    for row, text in enumerate(texts):
+        words = tokenize_words(text)
+        distinct_words = set(words)
+        for word in distinct_words.difference(vocabulary):
+            vocabulary[word] = len(vocabulary)
+        distinct_columns.extend(map(vocabulary.__getitem__, distinct_words))
+        rows.append(np.full(len(words), row, dtype=np.int64))
+        columns.append(
+            np.fromiter(
+                map(vocabulary.__getitem__, words), dtype=np.int64, count=len(words)
+            )
+        )
+    if not vocabulary:
+        return np.zeros((len(texts), 0), dtype=np.float32)
+
+    row_index, column_index = np.concatenate(rows), np.concatenate(columns)
+    vocabulary_size = len(vocabulary)
+
+    # The features are selected before counting, so the dense count matrix is
+    # never wider than `max_features`
+    document_frequency = np.bincount(distinct_columns, minlength=vocabulary_size)
+    features = np.argsort(-document_frequency, kind="stable")[:max_features]
+    feature_index = np.full(vocabulary_size, -1, dtype=np.int64)
+    feature_index[features] = np.arange(len(features))
+    column_index = feature_index[column_index]
+    kept = column_index >= 0
+    counts = np.bincount(
+        row_index[kept] * len(features) + column_index[kept],
+        minlength=len(texts) * len(features),
+    ).reshape(len(texts), len(features))
+    document_frequency = document_frequency[features]
+
+    idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1
+    matrix = (np.log1p(counts) * idf).astype(np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
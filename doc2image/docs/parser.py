@@ -1,5 +1,11 @@
+import math
+import os
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterator
 
+import pypdf
 from pypdf import PdfReader
 from docx import Document as DocxDocument
 
@@ -9,7 +15,26 @@ class DocumentParser(ABC):
     Abstract base class for document parsers.
     """
 
+    separator: str = "\n"
+    # Bump when a change to the parser alters the text it extracts
+    version: str = "1"
+
     @abstractmethod
+    def iter_pages(self, document_path: str) -> Iterator[str]:
+        """
+        Parse the document one page at a time.
+
+        Formats without pages yield their natural unit of text instead (e.g.
+        paragraphs or lines).
+
+        Args:
+            document_path (str): Path to the document.
+
+        Yields:
+            str: Text of each page of the document.
+        """
+        pass
+
     def parse(self, document_path: str) -> str:
         """
         Parse the document as a string.
@@ -20,7 +45,52 @@ class DocumentParser(ABC):
         Returns:
             str: Parsed document as a string.
         """
-        pass
+        return self.separator.join(self.iter_pages(document_path))
+
+    def parse_with_page_offsets(self, document_path: str) -> tuple[str, list[int]]:
+        """
+        Parse the document as a string, keeping track of where each page starts.
+
+        Args:
+            document_path (str): Path to the document.
+
+        Returns:
+            tuple[str, list[int]]: Parsed document as a string and the offset
+                where each page starts in it.
+        """
+        pages = []
+        page_offsets = []
+        offset = 0
+        for page in self.iter_pages(document_path):
+            pages.append(page)
+            page_offsets.append(offset)
+            offset += len(page) + len(self.separator)
+        return self.separator.join(pages), page_offsets
+
+
+def _available_cpus() -> int:
+    """Number of CPUs the current process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _extract_page_range(document_path: str, start: int, end: int) -> list[str]:
+    """
+    Extract the text of a range of pages of a PDF document.
+
+    Runs in a worker process, which opens the document on its own.
+
+    Args:
+        document_path (str): Path to the PDF document.
+        start (int): Index of the first page to extract.
+        end (int): Index after the last page to extract.
+
+    Returns:
+        list[str]: Text of each page in the range.
+    """
+    reader = PdfReader(document_path)
+    return [reader.pages[i].extract_text() for i in range(start, end)]
 
 
 class PdfParser(DocumentParser):
@@ -30,35 +100,82 @@ class PdfParser(DocumentParser):
     This class is responsible for extracting text from PDF documents.
     """
 
-    def __init__(self, separator: str = "\n"):
+    # Number of page ranges given to each worker, so that faster workers pick
+    # up more ranges and pages are yielded in order without waiting too long
+    RANGES_PER_WORKER = 4
+    # Number of page ranges submitted per worker ahead of the one being yielded.
+    # Bounding them keeps the extracted pages waiting to be consumed, and the
+    # work wasted when the caller stops early, to a few ranges
+    RANGES_IN_FLIGHT_PER_WORKER = 2
+
+    version = f"1-pypdf{pypdf.__version__}"
+
+    def __init__(self, separator: str = "\n", workers: int = 1):
         """
         Initialize the PDF parser.
 
         Args:
             separator (str): Separator to use when joining text from pages.
+            workers (int): Number of processes extracting text in parallel,
+                capped by the CPUs available. With a single worker, pages are
+                extracted in the calling process.
         """
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
+
         self.separator = separator
+        self.workers = workers
 
-    def parse(self, document_path: str) -> str:
+    def iter_pages(self, document_path: str) -> Iterator[str]:
         """
-        Parse text from a PDF document.
+        Parse text from a PDF document one page at a time.
 
         Args:
             document_path (str): Path to the PDF document.
 
-        Returns:
-            str: Parsed text from the PDF document.
+        Yields:
+            str: Text of each page of the PDF document.
         """
         reader = PdfReader(document_path)
-        pdf_text = ""
-        for page in reader.pages:
-            pdf_text += page.extract_text()
-            pdf_text += "\n"
-
-        return pdf_text
-
-
-class DocxParser:
+        total_pages = len(reader.pages)
+        # Processes beyond the available CPUs only add start-up and page tree
+        # parsing costs
+        workers = min(self.workers, _available_cpus())
+        if workers == 1 or total_pages < 2:
+            for page in reader.pages:
+                yield page.extract_text()
+            return
+
+        # Split the pages in ranges extracted in parallel, keeping their order
+        range_size = math.ceil(total_pages / (workers * self.RANGES_PER_WORKER))
+        ranges = (
+            (start, min(start + range_size, total_pages))
+            for start in range(0, total_pages, range_size)
+        )
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending: deque[Future] = deque()
+
+            def submit_next_range() -> None:
+                page_range = next(ranges, None)
+                if page_range is not None:
+                    pending.append(
+                        executor.submit(_extract_page_range, document_path, *page_range)
+                    )
+
+            for _ in range(workers * self.RANGES_IN_FLIGHT_PER_WORKER):
+                submit_next_range()
+            try:
+                while pending:
+                    pages = pending.popleft().result()
+                    submit_next_range()
+                    yield from pages
+            finally:
+                # Ranges not started yet are dropped if the caller stops early
+                for future in pending:
+                    future.cancel()
+
+
+class DocxParser(DocumentParser):
     """
     Parser for Word documents (.docx).
 
@@ -73,18 +190,19 @@ class DocxParser:
         """
         self.separator = separator
 
-    def parse(self, document_path: str) -> str:
+    def iter_pages(self, document_path: str) -> Iterator[str]:
         """
-        Parse a Word document (.docx).
+        Parse a Word document (.docx) one paragraph at a time.
 
         Args:
             document_path (str): Path to the Word document.
 
-        Returns:
-            str: Parsed text from the Word document.
+        Yields:
+            str: Text of each paragraph of the Word document.
         """
         doc = DocxDocument(document_path)
-        return self.separator.join(paragraph.text for paragraph in doc.paragraphs)
+        for paragraph in doc.paragraphs:
+            yield paragraph.text
 
 
 class TxtParser(DocumentParser):
@@ -101,15 +219,15 @@ class TxtParser(DocumentParser):
         """
         self.separator = separator
 
-    def parse(self, document_path: str) -> str:
+    def iter_pages(self, document_path: str) -> Iterator[str]:
         """
-        Parse a text document (.txt, .md, etc.).
+        Parse a text document (.txt, .md, etc.) one line at a time.
 
         Args:
             document_path (str): Path to the text document.
 
-        Returns:
-            str: Parsed text from the text document.
+        Yields:
+            str: Each line of the text document.
         """
         with open(document_path, "r", encoding="utf-8") as file:
-            return self.separator.join(file.readlines())
+            yield from file
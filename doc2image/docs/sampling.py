@@ -0,0 +1,44 @@
+import numpy as np
+
+from .chunk import Chunk
+from .features import tfidf_matrix
+
+
+def sample_chunks(chunks: list[Chunk], max_chunks: int) -> list[Chunk]:
+    """
+    Pick at most `max_chunks` representative chunks spread across the document.
+
+    The document is split into `max_chunks` runs of consecutive chunks, and the
+    chunk closest to the TF-IDF centroid of the whole document is picked from
+    each run. Every part of the document is covered, and within each part the
+    chunk that best reflects the overall topic is preferred over outliers such
+    as tables of contents, references or appendices.
+
+    Args:
+        chunks (list[Chunk]): The document chunks, in order.
+        max_chunks (int): Maximum number of chunks to pick.
+
+    Returns:
+        list[Chunk]: The picked chunks, in their original order.
+
+    Raises:
+        ValueError: If `max_chunks` is not positive.
+    """
+    if max_chunks < 1:
+        raise ValueError("max_chunks must be a positive integer.")
+    if len(chunks) <= max_chunks:
+        return chunks
+
+    matrix = tfidf_matrix([chunk.text for chunk in chunks])
+    centroid = matrix.mean(axis=0)
+    norm = np.linalg.norm(centroid)
+    scores = matrix @ (centroid / norm) if norm > 0 else np.zeros(len(chunks))
+
+    # Runs of (almost) equal length covering the document
+    bounds = np.linspace(0, len(chunks), max_chunks + 1).round().astype(int)
+    picked = [
+        start + int(np.argmax(scores[start:end]))
+        for start, end in zip(bounds[:-1], bounds[1:])
+        if end > start
+    ]
+    return [chunks[index] for index in picked]
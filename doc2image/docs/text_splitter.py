@@ -1,50 +1,85 @@
+import logging
 import re
-from typing import Optional, Union, Literal, Iterable
+import zlib
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Optional, Union, Literal, Iterable
 
+# A span is a (start, end) pair of offsets into the text being split
+Span = tuple[int, int]
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def _compile_separator(separator: str) -> re.Pattern:
+    """Compile a separator regex once and reuse it across calls.
+
+    Args:
+        separator (str): The regex pattern of the separator.
+
+    Returns:
+        re.Pattern: The compiled pattern.
+    """
+    return re.compile(separator)
+
+
+@lru_cache(maxsize=None)
+def _escape(separator: str) -> str:
+    """Escape a literal separator once and reuse it across calls."""
+    return re.escape(separator)
+
+
+def _split_spans_with_regex(
+    text: str,
+    span: Span,
+    separator: str,
+    keep_separator: Union[bool, Literal["start", "end"]],
+) -> list[Span]:
+    """Split a span of text using regex and return the resulting spans.
+
+    The text is never copied: the separator is searched between the span
+    offsets and the pieces are returned as offsets into `text`.
 
-def _split_text_with_regex(
-    text: str, separator: str, keep_separator: Union[bool, Literal["start", "end"]]
-) -> list[str]:
-    """Split text using regex and return the resulting chunks.
-    
     Args:
         text (str): The input text to be split.
+        span (Span): The start and end offsets of the part of `text` to split.
         separator (str): The regex pattern used for splitting the text.
         keep_separator (Union[bool, Literal["start", "end"]]): Whether to keep the
             separator and where to place it in each corresponding chunk (True='start')
 
     Returns:
-        list[str]: A list of text chunks obtained after splitting.
+        list[Span]: A list of non-empty spans obtained after splitting.
     """
-    # Now that we have the separator, split the text
-    if separator:
-        if keep_separator:
-            # The parentheses in the pattern keep the delimiters in the result.
-            _splits = re.split(f"({separator})", text)
-            splits = (
-                ([_splits[i] + _splits[i + 1] for i in range(0, len(_splits) - 1, 2)])
-                if keep_separator == "end"
-                else ([_splits[i] + _splits[i + 1] for i in range(1, len(_splits), 2)])
-            )
-            if len(_splits) % 2 == 0:
-                splits += _splits[-1:]
-            splits = (
-                (splits + [_splits[-1]])
-                if keep_separator == "end"
-                else ([_splits[0]] + splits)
-            )
-        else:
-            splits = re.split(separator, text)
+    start, end = span
+    if not separator:
+        return [(i, i + 1) for i in range(start, end)]
+
+    # Each separator match ends a piece and starts the next one. A kept separator
+    # belongs to the piece it starts ("start") or ends ("end").
+    matches = _compile_separator(separator).finditer(text, start, end)
+    if not keep_separator:
+        spans = [match.span() for match in matches]
+        piece_ends = [match_start for match_start, _ in spans]
+        piece_starts = [match_end for _, match_end in spans]
+    elif keep_separator == "end":
+        piece_ends = piece_starts = [match.end() for match in matches]
     else:
-        splits = list(text)
-    return [s for s in splits if s != ""]
+        piece_ends = piece_starts = [match.start() for match in matches]
+
+    return [
+        (piece_start, piece_end)
+        for piece_start, piece_end in zip([start] + piece_starts, piece_ends + [end])
+        if piece_start < piece_end
+    ]
 
 
 class TextSplitter:
     """Splitting text by recursively look at characters.
 
     Recursively tries to split by different characters to find one
-    that works.
+    that works. Splitting works on offsets into the input text, so no
+    substring is copied until the chunks are materialized.
     """
 
     def __init__(
@@ -55,18 +90,28 @@ class TextSplitter:
         is_separator_regex: bool,
         keep_separator: Union[bool, Literal["start", "end"]],
         strip_whitespace: bool,
+        length_function: Callable[[str], int] = len,
+        content_defined: bool = False,
     ) -> None:
         """Create a new TextSplitter.
 
         Args:
             chunk_size (int): Maximum size of chunks to return
-            chunk_overlap (int): Overlap in characters between chunks
+            chunk_overlap (int): Overlap between chunks
             separators (list[str]): List of separators to use for splitting
             is_separator_regex (bool): Whether the separators are regex patterns
             keep_separator (Union[bool, Literal["start", "end"]]): Whether to keep the
                 separator and where to place it in each corresponding chunk (True='start')
             strip_whitespace (bool): If `True`, strips whitespace from the start and end of
                 every document
+            length_function (Callable[[str], int]): Function measuring the size of
+                a text, in the unit of `chunk_size` and `chunk_overlap`. Defaults
+                to characters; pass a token counter to size chunks in tokens.
+            content_defined (bool): If `True`, chunks also end after the splits
+                whose content hashes to a boundary, once they are half full.
+                Boundaries then depend on the text around them rather than on
+                the start of the document, so an edit only changes the chunks
+                near it instead of shifting every chunk after it.
         """
         self._separators = separators or ["\n\n", "\n", " ", ""]
         self._is_separator_regex = is_separator_regex
@@ -74,100 +119,176 @@ class TextSplitter:
         self._chunk_size = chunk_size
         self._chunk_overlap = chunk_overlap
         self._strip_whitespace = strip_whitespace
+        self._length_function = length_function
+        self._content_defined = content_defined
+        # Sizes of the measured spans and separators, so each one is only
+        # measured once per call to `split_spans`
+        self._length_cache: dict[Span, int] = {}
+        self._separator_length_cache: dict[str, int] = {}
 
-    def _join_docs(self, docs: list[str], separator: str) -> Optional[str]:
-        text = separator.join(docs)
+    def _separator_pattern(self, separator: str) -> str:
+        """Get the regex pattern of a separator."""
+        return separator if self._is_separator_regex else _escape(separator)
+
+    def _join_docs(self, text: str, start: int, end: int) -> Optional[Span]:
+        """Get the span of a chunk covering `text[start:end]`, or None if it is empty."""
         if self._strip_whitespace:
-            text = text.strip()
-        if text == "":
+            while start < end and text[start].isspace():
+                start += 1
+            while end > start and text[end - 1].isspace():
+                end -= 1
+        if start == end:
             return None
         else:
-            return text
+            return start, end
+
+    def _length(self, text: str, span: Span) -> int:
+        """Measure the size of a span of text."""
+        if self._length_function is len:
+            return span[1] - span[0]
+        if span not in self._length_cache:
+            self._length_cache[span] = self._length_function(text[span[0] : span[1]])
+        return self._length_cache[span]
+
+    def _gap_length(self, text: str, end: int, start: int) -> int:
+        """Measure the size of the separator between two consecutive splits."""
+        if self._length_function is len:
+            return start - end
+        separator = text[end:start]
+        if separator not in self._separator_length_cache:
+            self._separator_length_cache[separator] = self._length_function(separator)
+        return self._separator_length_cache[separator]
 
-    def _merge_splits(self, splits: Iterable[str], separator: str) -> list[str]:
-        """Merge smaller splits into larger chunks."""
+    def _is_boundary(self, text: str, split: Span, split_length: int) -> bool:
+        """Whether a content-defined chunk boundary follows a split.
+
+        Each split ends a chunk with a probability proportional to its size, so
+        chunks grow by about a quarter of `chunk_size` past the half before
+        ending on a boundary. The hash is stable across processes.
+        """
+        probability = min(1.0, 4 * split_length / self._chunk_size)
+        checksum = zlib.crc32(text[split[0] : split[1]].encode("utf-8"))
+        return checksum < probability * 2**32
+
+    def _merge_splits(self, text: str, splits: Iterable[Span]) -> list[Span]:
+        """Merge smaller splits into larger chunks.
+
+        Consecutive splits are contiguous in the text, so a chunk spans from the
+        start of its first split to the end of its last one, separators included.
+        """
         # We now want to combine these smaller pieces into medium size
         # chunks to send to the LLM.
-        separator_len = len(separator)
-
         docs = []
-        current_doc: list[str] = []
+        # Splits in the current chunk, with their size and the size of the
+        # separator before them. A deque makes dropping splits from the front
+        # of the window O(1).
+        current_doc: deque[tuple[Span, int, int]] = deque()
         total = 0
+        # Sizes in characters are measured inline, saving two calls per split
+        in_characters = self._length_function is len
         for d in splits:
-            _len = len(d)
-            if (
-                total + _len + (separator_len if len(current_doc) > 0 else 0)
-                > self._chunk_size
-            ):
+            _len = d[1] - d[0] if in_characters else self._length(text, d)
+            gap = 0
+            if current_doc:
+                previous_end = current_doc[-1][0][1]
+                gap = (
+                    d[0] - previous_end
+                    if in_characters
+                    else self._gap_length(text, previous_end, d[0])
+                )
+            # A content-defined boundary after the last split ends the chunk
+            # early, provided it is already half full
+            at_boundary = (
+                self._content_defined
+                and current_doc
+                and total >= self._chunk_size // 2
+                and self._is_boundary(text, current_doc[-1][0], current_doc[-1][1])
+            )
+            if current_doc and (at_boundary or total + gap + _len > self._chunk_size):
                 if total > self._chunk_size:
-                    print(
-                        "WARNING: "
-                        f"Created a chunk of size {total}, "
-                        f"which is longer than the specified {self._chunk_size}"
+                    logger.warning(
+                        "Created a chunk of size %d, which is longer than the specified %d",
+                        total,
+                        self._chunk_size,
                     )
-                if len(current_doc) > 0:
-                    doc = self._join_docs(current_doc, separator)
-                    if doc is not None:
-                        docs.append(doc)
-                    # Keep on popping if:
-                    # - we have a larger chunk than in the chunk overlap
-                    # - or if we still have any chunks and the length is long
-                    while total > self._chunk_overlap or (
-                        total + _len + (separator_len if len(current_doc) > 0 else 0)
-                        > self._chunk_size
-                        and total > 0
-                    ):
-                        total -= len(current_doc[0]) + (
-                            separator_len if len(current_doc) > 1 else 0
-                        )
-                        current_doc = current_doc[1:]
-            current_doc.append(d)
-            total += _len + (separator_len if len(current_doc) > 1 else 0)
-        doc = self._join_docs(current_doc, separator)
-        if doc is not None:
-            docs.append(doc)
+                doc = self._join_docs(
+                    text, current_doc[0][0][0], current_doc[-1][0][1]
+                )
+                if doc is not None:
+                    docs.append(doc)
+                # Keep on popping if:
+                # - we have a larger chunk than in the chunk overlap
+                # - or if we still have any chunks and the length is long
+                while current_doc and (
+                    total > self._chunk_overlap
+                    or total + gap + _len > self._chunk_size
+                ):
+                    _, first_len, _ = current_doc.popleft()
+                    total -= first_len + (current_doc[0][2] if current_doc else 0)
+                if not current_doc:
+                    gap = 0
+            current_doc.append((d, _len, gap))
+            total += _len + gap
+        if current_doc:
+            doc = self._join_docs(text, current_doc[0][0][0], current_doc[-1][0][1])
+            if doc is not None:
+                docs.append(doc)
         return docs
 
-    def _split_text(self, text: str, separators: list[str]) -> list[str]:
-        """Split incoming text and return chunks."""
+    def _split_spans(self, text: str, span: Span, separators: list[str]) -> list[Span]:
+        """Split a span of the incoming text and return the spans of the chunks."""
+        start, end = span
         final_chunks = []
         # Get appropriate separator to use
         separator = separators[-1]
         new_separators = []
         for i, _s in enumerate(separators):
-            _separator = _s if self._is_separator_regex else re.escape(_s)
+            _separator = self._separator_pattern(_s)
             if _s == "":
                 separator = _s
                 break
-            if re.search(_separator, text):
+            if _compile_separator(_separator).search(text, start, end):
                 separator = _s
                 new_separators = separators[i + 1 :]
                 break
 
-        _separator = separator if self._is_separator_regex else re.escape(separator)
-        splits = _split_text_with_regex(text, _separator, self._keep_separator)
+        _separator = self._separator_pattern(separator)
+        splits = _split_spans_with_regex(text, span, _separator, self._keep_separator)
 
         # Now go merging things, recursively splitting longer texts.
         _good_splits = []
-        _separator = "" if self._keep_separator else separator
+        in_characters = self._length_function is len
         for s in splits:
-            if len(s) < self._chunk_size:
+            length = s[1] - s[0] if in_characters else self._length(text, s)
+            if length < self._chunk_size:
                 _good_splits.append(s)
             else:
                 if _good_splits:
-                    merged_text = self._merge_splits(_good_splits, _separator)
+                    merged_text = self._merge_splits(text, _good_splits)
                     final_chunks.extend(merged_text)
                     _good_splits = []
                 if not new_separators:
                     final_chunks.append(s)
                 else:
-                    other_info = self._split_text(s, new_separators)
+                    other_info = self._split_spans(text, s, new_separators)
                     final_chunks.extend(other_info)
         if _good_splits:
-            merged_text = self._merge_splits(_good_splits, _separator)
+            merged_text = self._merge_splits(text, _good_splits)
             final_chunks.extend(merged_text)
         return final_chunks
 
+    def split_spans(self, text: str) -> list[Span]:
+        """Split the input text into chunks, returned as offsets into the text.
+
+        Args:
+            text (str): The input text to be split.
+
+        Returns:
+            list[Span]: The (start, end) offsets of each chunk in `text`.
+        """
+        self._length_cache.clear()
+        return self._split_spans(text, (0, len(text)), self._separators)
+
     def split_text(self, text: str) -> list[str]:
         """Split the input text into smaller chunks based on predefined separators.
 
@@ -177,4 +298,4 @@ class TextSplitter:
         Returns:
             list[str]: A list of text chunks obtained after splitting.
         """
-        return self._split_text(text, self._separators)
+        return [text[start:end] for start, end in self.split_spans(text)]
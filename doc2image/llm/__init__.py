@@ -1,6 +1,9 @@
 from typing import Optional as _Optional
 
 from .base import BaseLLM
+from .cache import LLMCache, CachedLLM
+from .capabilities import ModelCapabilities, REGISTRY_VERSION, lookup_capabilities
+from .streaming import JsonArrayStreamParser
 from .openai import OpenAILLM
 from .ollama import OllamaLLM, OLLAMA_AVAILABLE
 
@@ -20,6 +23,7 @@ def create_llm(
     top_k: int,
     provider: str,
     api_key: _Optional[str] = None,
+    cache: _Optional[LLMCache] = None,
 ) -> BaseLLM:
     """
     Create an instance of the LLM model based on the provided configuration.
@@ -31,6 +35,8 @@ def create_llm(
         top_k (int): The top-k setting for the model.
         provider (str): The name of the API to use (e.g., "ollama", "openai").
         api_key (Optional[str]): The API key for the model (if required).
+        cache (Optional[LLMCache]): If given, responses are served from and stored
+            in this cache.
 
     Returns:
         BaseLLM: The loaded LLM chat model.
@@ -40,10 +46,15 @@ def create_llm(
             f"'{provider}' API is unsupported. Supported APIs are: {', '.join(PROVIDERS)}."
         )
 
-    return PROVIDER_TO_LLM[provider](
+    llm = PROVIDER_TO_LLM[provider](
         model_name=model_name,
         temperature=temperature,
         top_p=top_p,
         top_k=top_k,
         api_key=api_key,
     )
+
+    if cache is not None:
+        llm = CachedLLM(llm, cache)
+
+    return llm
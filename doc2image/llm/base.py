@@ -1,13 +1,18 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 from pydantic import BaseModel
 
+from .capabilities import ModelCapabilities, lookup_capabilities
+
 
 class BaseLLM(ABC):
     """
     Abstract base class for all LLMs.
-    Each LLM must implement the `generate` method.
+    Each LLM must implement the `generate` method, and should override
+    `agenerate` with a native asynchronous implementation and `astream` with a
+    native streaming one.
     """
 
     def __init__(
@@ -52,6 +57,49 @@ class BaseLLM(ABC):
         """
         pass
 
+    async def agenerate(
+        self,
+        messages: list[dict[str, str]],
+        output_format: Optional[type[BaseModel]] = None,
+    ) -> str | BaseModel:
+        """
+        Asynchronously generate a response from the LLM based on the given messages.
+
+        The default implementation runs `generate` in a worker thread.
+
+        Args:
+            messages (list[dict[str, str]]): The messages to send to the LLM.
+            output_format (Optional[type[BaseModel]]): The expected output format.
+
+        Returns:
+            str | BaseModel: The generated response in the expected format or as a string.
+        """
+        return await asyncio.to_thread(
+            self.generate, messages=messages, output_format=output_format
+        )
+
+    async def astream(
+        self,
+        messages: list[dict[str, str]],
+        output_format: Optional[type[BaseModel]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Asynchronously generate a response, yielding its text as it is generated.
+
+        When an output format is given, the concatenated pieces form the JSON
+        representation of the response. The default implementation yields the
+        whole response of `agenerate` as a single piece.
+
+        Args:
+            messages (list[dict[str, str]]): The messages to send to the LLM.
+            output_format (Optional[type[BaseModel]]): The expected output format.
+
+        Yields:
+            str: The next piece of the response text.
+        """
+        output = await self.agenerate(messages=messages, output_format=output_format)
+        yield output if output_format is None else output.model_dump_json()
+
     @staticmethod
     def pull_model(model_name: str, api_key: str) -> None:
         """
@@ -64,3 +112,20 @@ class BaseLLM(ABC):
             api_key (str): The API key for the model.
         """
         raise NotImplementedError("pull_model method is not implemented.")
+
+    @staticmethod
+    def get_capabilities(model_name: str, api_key: str) -> ModelCapabilities:
+        """
+        Get the context window, output limit and structured output support of a model.
+
+        The default implementation looks the model up in the registry of known
+        models. Subclasses can override it to ask the provider instead.
+
+        Args:
+            model_name (str): The name of the model.
+            api_key (str): The API key for the model.
+
+        Returns:
+            ModelCapabilities: The capabilities of the model.
+        """
+        return lookup_capabilities(model_name)
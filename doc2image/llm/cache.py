@@ -0,0 +1,332 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import AsyncIterator, Optional
+
+from pydantic import BaseModel
+
+from .base import BaseLLM
+
+
+def make_cache_key(
+    provider: str,
+    model_name: str,
+    messages: list[dict[str, str]],
+    temperature: float,
+    top_p: float,
+    top_k: int,
+    output_format: Optional[type[BaseModel]] = None,
+) -> str:
+    """
+    Build the cache key of an LLM call as a SHA-256 hash of its canonical JSON form.
+
+    Args:
+        provider (str): The name of the LLM provider.
+        model_name (str): The name of the model.
+        messages (list[dict[str, str]]): The messages sent to the LLM.
+        temperature (float): The temperature setting for the model.
+        top_p (float): The top-p setting for the model.
+        top_k (int): The top-k setting for the model.
+        output_format (Optional[type[BaseModel]]): The expected output format.
+
+    Returns:
+        str: The hexadecimal cache key.
+    """
+    payload = {
+        "provider": provider,
+        "model": model_name,
+        "messages": messages,
+        "temperature": temperature,
+        "top_p": top_p,
+        "top_k": top_k,
+        "schema": output_format.model_json_schema() if output_format else None,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Persistent cache of LLM responses stored in SQLite.
+
+    Entries expire after `ttl_seconds` and the least recently used entries are
+    evicted once the cache grows over `max_size_bytes`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_size_bytes: int,
+        ttl_seconds: Optional[float] = None,
+    ) -> None:
+        """
+        Initialize the LLM cache.
+
+        Args:
+            path (str): Path to the SQLite database file.
+            max_size_bytes (int): Maximum total size of the cached responses.
+            ttl_seconds (Optional[float]): Time to live of each entry. If `None`,
+                entries never expire.
+        """
+        self.path = path
+        self.max_size_bytes = max_size_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS llm_response ("
+                "key TEXT PRIMARY KEY, "
+                "value TEXT NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, "
+                "accessed_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Get a cached response.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[str]: The cached response, or None if it is missing or expired.
+        """
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT value, created_at FROM llm_response WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is not None and self._is_expired(row[1], now):
+                self._connection.execute(
+                    "DELETE FROM llm_response WHERE key = ?", (key,)
+                )
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._connection.execute(
+                "UPDATE llm_response SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Store a response in the cache, evicting entries if needed.
+
+        Args:
+            key (str): The cache key.
+            value (str): The response to store.
+        """
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO llm_response "
+                "(key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now),
+            )
+            self._evict(now)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        Hit and miss counters of this instance, and the current cache size.
+        """
+        with self._lock:
+            entries, size = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_response"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "size_bytes": size,
+        }
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _evict(self, now: float) -> None:
+        """Remove expired entries, then least recently used ones over the size cap."""
+        if self.ttl_seconds is not None:
+            self._connection.execute(
+                "DELETE FROM llm_response WHERE created_at < ?",
+                (now - self.ttl_seconds,),
+            )
+
+        (total_size,) = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM llm_response"
+        ).fetchone()
+        if total_size <= self.max_size_bytes:
+            return
+
+        rows = self._connection.execute(
+            "SELECT key, size FROM llm_response ORDER BY accessed_at ASC"
+        ).fetchall()
+        evicted = []
+        for key, size in rows:
+            if total_size <= self.max_size_bytes:
+                break
+            evicted.append((key,))
+            total_size -= size
+        self._connection.executemany(
+            "DELETE FROM llm_response WHERE key = ?", evicted
+        )
+
+
+class CachedLLM(BaseLLM):
+    """
+    LLM wrapper serving repeated calls from an `LLMCache`.
+
+    Works with any provider: calls that miss the cache are delegated to the
+    wrapped LLM, and structured responses are stored as JSON and validated back
+    into their pydantic model on a hit.
+    """
+
+    def __init__(self, llm: BaseLLM, cache: LLMCache) -> None:
+        """
+        Initialize the cached LLM.
+
+        Args:
+            llm (BaseLLM): The LLM to wrap.
+            cache (LLMCache): The cache to use.
+        """
+        super().__init__(
+            model_name=llm.model_name,
+            temperature=llm.temperature,
+            top_p=llm.top_p,
+            top_k=llm.top_k,
+            api_key=llm.api_key,
+        )
+        self.llm = llm
+        self.cache = cache
+
+    def generate(
+        self,
+        messages: list[dict[str, str]],
+        output_format: Optional[type[BaseModel]] = None,
+    ) -> str | BaseModel:
+        """
+        Generate a response from the cache or the wrapped LLM.
+
+        Args:
+            messages (list[dict[str, str]]): The messages to send to the LLM.
+            output_format (Optional[type[BaseModel]]): The expected output format.
+
+        Returns:
+            str | BaseModel: The generated response in the expected format or as a string.
+        """
+        key = self._cache_key(messages, output_format)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return self._load(cached, output_format)
+
+        output = self.llm.generate(messages=messages, output_format=output_format)
+        self.cache.set(key, self._dump(output, output_format))
+        return output
+
+    async def agenerate(
+        self,
+        messages: list[dict[str, str]],
+        output_format: Optional[type[BaseModel]] = None,
+    ) -> str | BaseModel:
+        """
+        Asynchronously generate a response from the cache or the wrapped LLM.
+
+        Args:
+            messages (list[dict[str, str]]): The messages to send to the LLM.
+            output_format (Optional[type[BaseModel]]): The expected output format.
+
+        Returns:
+            str | BaseModel: The generated response in the expected format or as a string.
+        """
+        key = self._cache_key(messages, output_format)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return self._load(cached, output_format)
+
+        output = await self.llm.agenerate(
+            messages=messages, output_format=output_format
+        )
+        self.cache.set(key, self._dump(output, output_format))
+        return output
+
+    async def astream(
+        self,
+        messages: list[dict[str, str]],
+        output_format: Optional[type[BaseModel]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Asynchronously generate a response from the cache or the wrapped LLM,
+        yielding its text as it is generated.
+
+        A cached response is yielded as a single piece. A streamed response is
+        only stored once it is complete and, with an output format, valid.
+
+        Args:
+            messages (list[dict[str, str]]): The messages to send to the LLM.
+            output_format (Optional[type[BaseModel]]): The expected output format.
+
+        Yields:
+            str: The next piece of the response text.
+        """
+        key = self._cache_key(messages, output_format)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        pieces = []
+        async for piece in self.llm.astream(
+            messages=messages, output_format=output_format
+        ):
+            pieces.append(piece)
+            yield piece
+
+        output = "".join(pieces)
+        if output_format is not None:
+            try:
+                output = self._dump(self._load(output, output_format), output_format)
+            except ValueError:
+                return
+        self.cache.set(key, output)
+
+    def _cache_key(
+        self,
+        messages: list[dict[str, str]],
+        output_format: Optional[type[BaseModel]],
+    ) -> str:
+        return make_cache_key(
+            provider=type(self.llm).__name__,
+            model_name=self.model_name,
+            messages=messages,
+            temperature=self.temperature,
+            top_p=self.top_p,
+            top_k=self.top_k,
+            output_format=output_format,
+        )
+
+    @staticmethod
+    def _dump(output: str | BaseModel, output_format: Optional[type[BaseModel]]) -> str:
+        return output if output_format is None else output.model_dump_json()
+
+    @staticmethod
+    def _load(
+        value: str, output_format: Optional[type[BaseModel]]
+    ) -> str | BaseModel:
+        return value if output_format is None else output_format.model_validate_json(value)
@@ -0,0 +1,99 @@
+import re
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class ModelCapabilities:
+    """
+    A dataclass representing what an LLM model can handle in a single call.
+
+    Attributes:
+        context_window (int): Maximum number of tokens of a call, prompt and
+            output included.
+        max_output_tokens (int): Maximum number of tokens the model can generate
+            in a call.
+        supports_structured_output (bool): Whether the model can be constrained
+            to answer with a JSON schema.
+    """
+
+    context_window: int
+    max_output_tokens: int
+    supports_structured_output: bool
+
+
+# Capabilities assumed for models missing from the registry
+DEFAULT_CAPABILITIES = ModelCapabilities(
+    context_window=8_192,
+    max_output_tokens=2_048,
+    supports_structured_output=True,
+)
+
+# Bump when a change to the registry alters the capabilities of known models,
+# so the capabilities stored for them are looked up again
+REGISTRY_VERSION = "2"
+
+# Known models, keyed by name prefix. A prefix only matches up to a "-", ":"
+# or "@" (or the end of the name), so dated snapshots (e.g.,
+# "gpt-4o-2024-08-06") and Ollama tags (e.g., "gemma3:4b") resolve to their
+# family while other families sharing the characters (e.g., "gpt-4.5" and
+# "gpt-4") do not. The longest matching prefix wins, so variants with their own
+# limits (e.g., "o1-mini") are listed next to their family.
+KNOWN_MODEL_CAPABILITIES: dict[str, ModelCapabilities] = {
+    # OpenAI
+    "gpt-5": ModelCapabilities(400_000, 128_000, True),
+    "gpt-4.5": ModelCapabilities(128_000, 16_384, True),
+    "gpt-4.1": ModelCapabilities(1_047_576, 32_768, True),
+    "gpt-4o": ModelCapabilities(128_000, 16_384, True),
+    "gpt-4-turbo": ModelCapabilities(128_000, 4_096, False),
+    "gpt-4-32k": ModelCapabilities(32_768, 8_192, False),
+    "gpt-4": ModelCapabilities(8_192, 8_192, False),
+    "gpt-3.5-turbo": ModelCapabilities(16_385, 4_096, False),
+    "gpt-3.5-turbo-instruct": ModelCapabilities(4_096, 4_096, False),
+    "o1": ModelCapabilities(200_000, 100_000, True),
+    "o1-mini": ModelCapabilities(128_000, 65_536, False),
+    "o1-preview": ModelCapabilities(128_000, 32_768, False),
+    "o3": ModelCapabilities(200_000, 100_000, True),
+    "o3-mini": ModelCapabilities(200_000, 100_000, True),
+    "o4-mini": ModelCapabilities(200_000, 100_000, True),
+    # Ollama
+    "gemma3": ModelCapabilities(131_072, 8_192, True),
+    "gemma3:1b": ModelCapabilities(32_768, 8_192, True),
+    "gemma2": ModelCapabilities(8_192, 8_192, True),
+    "llama3.1": ModelCapabilities(131_072, 8_192, True),
+    "llama3.2": ModelCapabilities(131_072, 8_192, True),
+    "llama3.3": ModelCapabilities(131_072, 8_192, True),
+    "llama3": ModelCapabilities(8_192, 8_192, True),
+    "mistral": ModelCapabilities(32_768, 8_192, True),
+    "mistral-nemo": ModelCapabilities(131_072, 8_192, True),
+    "qwen2.5": ModelCapabilities(32_768, 8_192, True),
+    "qwen3": ModelCapabilities(40_960, 8_192, True),
+    "phi4": ModelCapabilities(16_384, 8_192, True),
+}
+
+# Characters ending a family name in a model name
+_FAMILY_DELIMITERS = re.compile(r"[-:@]")
+
+
+def lookup_capabilities(model_name: str) -> ModelCapabilities:
+    """
+    Get the capabilities of a model from the registry of known models.
+
+    Args:
+        model_name (str): The name of the model.
+
+    Returns:
+        ModelCapabilities: The capabilities of the model family with the longest
+            prefix of `model_name`, or `DEFAULT_CAPABILITIES` if none matches.
+    """
+    matches = [
+        prefix
+        for prefix in KNOWN_MODEL_CAPABILITIES
+        if model_name.startswith(prefix)
+        and (
+            len(model_name) == len(prefix)
+            or _FAMILY_DELIMITERS.match(model_name, len(prefix))
+        )
+    ]
+    if not matches:
+        return DEFAULT_CAPABILITIES
+    return KNOWN_MODEL_CAPABILITIES[max(matches, key=len)]
@@ -0,0 +1,78 @@
+import asyncio
+import atexit
+import os
+import threading
+from typing import Any, Coroutine, TypeVar
+
+_T = TypeVar("_T")
+
+# Async LLM clients hold connections bound to the event loop that created them.
+# Running every coroutine of a thread on the same loop, instead of a new one
+# per `asyncio.run`, lets later runs reuse these clients and their connections.
+_local = threading.local()
+_runners: list[tuple[int, asyncio.Runner]] = []
+_runners_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Get the persistent event loop of the current thread, creating it if needed.
+
+    Returns:
+        asyncio.AbstractEventLoop: The event loop of the current thread.
+    """
+    return _get_runner().get_loop()
+
+
+def run(coroutine: Coroutine[Any, Any, _T]) -> _T:
+    """
+    Run a coroutine to completion on the persistent event loop of the current thread.
+
+    Like `asyncio.run`, this must not be called from a running event loop, and
+    the tasks the coroutine left running are cancelled once it returns.
+
+    Args:
+        coroutine (Coroutine): The coroutine to run.
+
+    Returns:
+        The result of the coroutine.
+    """
+    try:
+        return _get_runner().run(coroutine)
+    finally:
+        cancel_pending_tasks()
+
+
+def cancel_pending_tasks() -> None:
+    """
+    Cancel the tasks left running on the event loop of the current thread and
+    wait for them to finish, so they do not run during later calls.
+    """
+    loop = get_event_loop()
+    tasks = asyncio.all_tasks(loop)
+    if not tasks:
+        return
+    for task in tasks:
+        task.cancel()
+    loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+
+
+def _get_runner() -> asyncio.Runner:
+    pid = os.getpid()
+    # A forked process does not reuse the loop of its parent
+    if getattr(_local, "pid", None) != pid:
+        _local.runner = asyncio.Runner()
+        _local.pid = pid
+        with _runners_lock:
+            _runners.append((pid, _local.runner))
+    return _local.runner
+
+
+@atexit.register
+def _close_event_loops() -> None:
+    pid = os.getpid()
+    with _runners_lock:
+        for runner_pid, runner in _runners:
+            if runner_pid == pid:
+                runner.close()
+        _runners.clear()
@@ -1,13 +1,19 @@
+import asyncio
 import os
-from typing import Optional
+from typing import AsyncIterator, Optional
+from weakref import WeakKeyDictionary
 
-from ollama import Client
+from ollama import AsyncClient, Client
 from pydantic import BaseModel
 
 from .base import BaseLLM
+from .capabilities import ModelCapabilities, lookup_capabilities
 
 _client = Client(host=os.environ.get("OLLAMA_BASE_URL", None))
 
+# Context length Ollama allocates for models that do not set `num_ctx`
+_default_num_ctx = int(os.environ.get("OLLAMA_CONTEXT_LENGTH", 4096))
+
 try:
     _client.ps()
     OLLAMA_AVAILABLE = True
@@ -15,6 +21,26 @@ except Exception:
     OLLAMA_AVAILABLE = False
     _client = None
 
+# Async clients hold connections bound to the event loop that created them,
+# so one client is kept per running loop. Pipelines run on the persistent loop
+# of their thread (see `event_loop`), so their runs share the same client.
+_async_clients: "WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncClient]" = (
+    WeakKeyDictionary()
+)
+
+
+def _get_async_client() -> AsyncClient:
+    """
+    Get the Ollama async client of the running event loop.
+
+    Returns:
+        AsyncClient: The async client.
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _async_clients:
+        _async_clients[loop] = AsyncClient(host=os.environ.get("OLLAMA_BASE_URL", None))
+    return _async_clients[loop]
+
 
 class OllamaLLM(BaseLLM):
     """
@@ -38,17 +64,91 @@ class OllamaLLM(BaseLLM):
         Returns:
             str | BaseModel: The generated response in the expected format or as a string.
         """
-        response = _client.chat(
-            model=self.model_name,
-            messages=messages,
-            format=output_format.model_json_schema() if output_format else None,
-            options={
+        response = _client.chat(**self._chat_args(messages, output_format))
+        return self._parse_output(response, output_format)
+
+    async def agenerate(
+        self,
+        messages: list[dict[str, str]],
+        output_format: Optional[type[BaseModel]] = None,
+    ) -> str | BaseModel:
+        """
+        Asynchronously generate a response from the LLM based on the given messages.
+
+        Args:
+            messages (list[dict[str, str]]): The messages to send to the LLM.
+            output_format (Optional[type[BaseModel]]): The expected output format.
+
+        Returns:
+            str | BaseModel: The generated response in the expected format or as a string.
+        """
+        response = await _get_async_client().chat(
+            **self._chat_args(messages, output_format)
+        )
+        return self._parse_output(response, output_format)
+
+    async def astream(
+        self,
+        messages: list[dict[str, str]],
+        output_format: Optional[type[BaseModel]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Asynchronously generate a response, yielding its text as it is generated.
+
+        Args:
+            messages (list[dict[str, str]]): The messages to send to the LLM.
+            output_format (Optional[type[BaseModel]]): The expected output format.
+
+        Yields:
+            str: The next piece of the response text.
+        """
+        response = await _get_async_client().chat(
+            **self._chat_args(messages, output_format), stream=True
+        )
+        async for part in response:
+            self.last_response = part
+            if part.message.content:
+                yield part.message.content
+
+    def _chat_args(
+        self,
+        messages: list[dict[str, str]],
+        output_format: Optional[type[BaseModel]],
+    ) -> dict:
+        """
+        Build the arguments of a `chat` request.
+
+        Args:
+            messages (list[dict[str, str]]): The messages to send to the LLM.
+            output_format (Optional[type[BaseModel]]): The expected output format.
+
+        Returns:
+            dict: The request arguments.
+        """
+        return {
+            "model": self.model_name,
+            "messages": messages,
+            "format": output_format.model_json_schema() if output_format else None,
+            "options": {
                 "temperature": self.temperature,
                 "top_p": self.top_p,
                 "top_k": self.top_k,
             },
-        )
+        }
+
+    def _parse_output(
+        self, response, output_format: Optional[type[BaseModel]]
+    ) -> str | BaseModel:
+        """
+        Extract the output of a `chat` response.
+
+        Args:
+            response: The chat response returned by Ollama.
+            output_format (Optional[type[BaseModel]]): The expected output format.
 
+        Returns:
+            str | BaseModel: The generated response in the expected format or as a string.
+        """
         self.last_response = response
         output = response.message.content
 
@@ -75,4 +175,54 @@ class OllamaLLM(BaseLLM):
             raise ValueError(
                 f"Failed to load the model '{model_name}'. "
                 "Visit https://ollama.com/library to see supported models."
-            )
\ No newline at end of file
+            )
+
+    @staticmethod
+    def get_capabilities(model_name: str, api_key: str) -> ModelCapabilities:
+        """
+        Get the capabilities of a model from its Ollama model information.
+
+        Ollama only allocates `num_ctx` tokens of context, which defaults to
+        `OLLAMA_CONTEXT_LENGTH` rather than the length the model was trained on,
+        so the context window is capped accordingly. Falls back to the registry
+        of known models if the model cannot be inspected.
+
+        Args:
+            model_name (str): The name of the model.
+            api_key (str): The API key for the model.
+
+        Returns:
+            ModelCapabilities: The capabilities of the model.
+        """
+        known = lookup_capabilities(model_name)
+        try:
+            info = _client.show(model_name)
+        except Exception:
+            return ModelCapabilities(
+                context_window=min(known.context_window, _default_num_ctx),
+                max_output_tokens=min(known.max_output_tokens, _default_num_ctx),
+                supports_structured_output=known.supports_structured_output,
+            )
+
+        trained_context = next(
+            (
+                int(value)
+                for key, value in (info.modelinfo or {}).items()
+                if key.endswith(".context_length")
+            ),
+            known.context_window,
+        )
+        num_ctx = _default_num_ctx
+        for line in (info.parameters or "").splitlines():
+            name, _, value = line.partition(" ")
+            if name == "num_ctx":
+                num_ctx = int(value.strip())
+
+        context_window = min(trained_context, num_ctx)
+        return ModelCapabilities(
+            context_window=context_window,
+            # Ollama does not limit the output besides the context itself
+            max_output_tokens=context_window,
+            # Ollama constrains the output of every model with `format`
+            supports_structured_output=True,
+        )
\ No newline at end of file
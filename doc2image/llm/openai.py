@@ -1,10 +1,87 @@
-from typing import Optional
+import asyncio
+import os
+import threading
+from typing import AsyncIterator, Optional
+from weakref import WeakKeyDictionary
 
-from openai import OpenAI, AuthenticationError
+import httpx
+from openai import (
+    AsyncOpenAI,
+    OpenAI,
+    AuthenticationError,
+    DefaultAsyncHttpxClient,
+    DefaultHttpxClient,
+)
 from pydantic import BaseModel
 
 from .base import BaseLLM
 
+_base_url = os.environ.get("OPENAI_BASE_URL", None)
+
+# Connection pool settings shared by every OpenAI client
+_pool_limits = httpx.Limits(
+    max_connections=int(os.environ.get("OPENAI_MAX_CONNECTIONS", 100)),
+    max_keepalive_connections=int(
+        os.environ.get("OPENAI_MAX_KEEPALIVE_CONNECTIONS", 20)
+    ),
+    keepalive_expiry=float(os.environ.get("OPENAI_KEEPALIVE_EXPIRY", 30.0)),
+)
+
+# Clients are shared process-wide, keyed by API key and base URL. Async clients
+# hold connections bound to the event loop that created them, so they are also
+# keyed by the running loop: pipelines run on the persistent loop of their
+# thread (see `event_loop`), so their runs share the same clients.
+_ClientKey = tuple[Optional[str], Optional[str]]
+_clients: dict[_ClientKey, OpenAI] = {}
+_async_clients: "WeakKeyDictionary[asyncio.AbstractEventLoop, dict[_ClientKey, AsyncOpenAI]]" = (
+    WeakKeyDictionary()
+)
+_clients_lock = threading.Lock()
+
+
+def _get_client(api_key: Optional[str]) -> OpenAI:
+    """
+    Get the shared OpenAI client for an API key.
+
+    Args:
+        api_key (Optional[str]): The API key of the client.
+
+    Returns:
+        OpenAI: The shared client.
+    """
+    key = (api_key, _base_url)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = OpenAI(
+                api_key=api_key,
+                base_url=_base_url,
+                http_client=DefaultHttpxClient(limits=_pool_limits),
+            )
+        return _clients[key]
+
+
+def _get_async_client(api_key: Optional[str]) -> AsyncOpenAI:
+    """
+    Get the shared OpenAI async client for an API key on the running event loop.
+
+    Args:
+        api_key (Optional[str]): The API key of the client.
+
+    Returns:
+        AsyncOpenAI: The shared async client.
+    """
+    loop = asyncio.get_running_loop()
+    key = (api_key, _base_url)
+    with _clients_lock:
+        loop_clients = _async_clients.setdefault(loop, {})
+        if key not in loop_clients:
+            loop_clients[key] = AsyncOpenAI(
+                api_key=api_key,
+                base_url=_base_url,
+                http_client=DefaultAsyncHttpxClient(limits=_pool_limits),
+            )
+        return loop_clients[key]
+
 
 class OpenAILLM(BaseLLM):
     """
@@ -28,7 +105,70 @@ class OpenAILLM(BaseLLM):
         Returns:
             str | BaseModel: The generated response in the expected format or as a string.
         """
-        client = OpenAI(api_key=self.api_key)
+        client = _get_client(self.api_key)
+        completion = client.responses.parse(**self._parse_args(messages, output_format))
+        return self._parse_output(completion, output_format)
+
+    async def agenerate(
+        self,
+        messages: list[dict[str, str]],
+        output_format: Optional[type[BaseModel]] = None,
+    ) -> str | BaseModel:
+        """
+        Asynchronously generate a response from the LLM based on the given messages.
+
+        Args:
+            messages (list[dict[str, str]]): The messages to send to the LLM.
+            output_format (Optional[type[BaseModel]]): The expected output format.
+
+        Returns:
+            str | BaseModel: The generated response in the expected format or as a string.
+        """
+        client = _get_async_client(self.api_key)
+        completion = await client.responses.parse(
+            **self._parse_args(messages, output_format)
+        )
+        return self._parse_output(completion, output_format)
+
+    async def astream(
+        self,
+        messages: list[dict[str, str]],
+        output_format: Optional[type[BaseModel]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Asynchronously generate a response, yielding its text as it is generated.
+
+        Args:
+            messages (list[dict[str, str]]): The messages to send to the LLM.
+            output_format (Optional[type[BaseModel]]): The expected output format.
+
+        Yields:
+            str: The next piece of the response text.
+        """
+        client = _get_async_client(self.api_key)
+        async with client.responses.stream(
+            **self._parse_args(messages, output_format)
+        ) as stream:
+            async for event in stream:
+                if event.type == "response.output_text.delta":
+                    yield event.delta
+            self.last_response = await stream.get_final_response()
+
+    def _parse_args(
+        self,
+        messages: list[dict[str, str]],
+        output_format: Optional[type[BaseModel]],
+    ) -> dict:
+        """
+        Build the arguments of a `responses.parse` request.
+
+        Args:
+            messages (list[dict[str, str]]): The messages to send to the LLM.
+            output_format (Optional[type[BaseModel]]): The expected output format.
+
+        Returns:
+            dict: The request arguments.
+        """
         args = {
             "model": self.model_name,
             "input": messages,
@@ -38,9 +178,21 @@ class OpenAILLM(BaseLLM):
         }
         if output_format is not None:
             args["text_format"] = output_format
+        return args
+
+    def _parse_output(
+        self, completion, output_format: Optional[type[BaseModel]]
+    ) -> str | BaseModel:
+        """
+        Extract the output of a `responses.parse` completion.
 
-        completion = client.responses.parse(**args)
+        Args:
+            completion: The completion returned by the OpenAI API.
+            output_format (Optional[type[BaseModel]]): The expected output format.
 
+        Returns:
+            str | BaseModel: The generated response in the expected format or as a string.
+        """
         self.last_response = completion
 
         if output_format is None:
@@ -59,7 +211,7 @@ class OpenAILLM(BaseLLM):
             api_key (str): The API key for the model.
         """
         try:
-            client = OpenAI(api_key=api_key)
+            client = _get_client(api_key)
             models = [m.id for m in client.models.list().data]
         except AuthenticationError:
             raise ValueError("Invalid OpenAI API key provided.")
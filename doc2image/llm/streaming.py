@@ -0,0 +1,85 @@
+import json
+
+
+class JsonArrayStreamParser:
+    """
+    Incremental parser of a JSON array of strings inside a streamed JSON object.
+
+    The JSON text is fed in pieces, as they are generated by the LLM, and each
+    string of the array stored under `key` is returned as soon as its closing
+    quote arrives, without waiting for the rest of the object. For example,
+    with `key="prompts"`, feeding `{"prompts": ["a", "b` returns `["a"]`, and
+    feeding `"]}` afterwards returns `["b"]`.
+    """
+
+    def __init__(self, key: str) -> None:
+        """
+        Initialize the parser.
+
+        Args:
+            key (str): The key of the array of strings in the top-level object.
+        """
+        self.key = key
+        # Nesting depth of objects and arrays at the current position
+        self._depth = 0
+        # Depth of the target array while inside it, None otherwise
+        self._array_depth = None
+        # Last string closed directly inside the top-level object, which is the
+        # key of the value that follows it
+        self._last_key = None
+        # Raw characters of the string being read, quotes excluded, or None if
+        # the current position is not inside a string
+        self._string = None
+        self._escaped = False
+
+    def feed(self, text: str) -> list[str]:
+        """
+        Parse the next piece of the JSON text.
+
+        Args:
+            text (str): The next piece of the JSON text.
+
+        Returns:
+            list[str]: The strings of the array completed by this piece, in order.
+        """
+        completed = []
+        for char in text:
+            if self._string is not None:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._close_string(completed)
+                    continue
+                self._string.append(char)
+            elif char == '"':
+                self._string = []
+            elif char in "{[":
+                self._depth += 1
+                if (
+                    char == "["
+                    and self._depth == 2
+                    and self._array_depth is None
+                    and self._last_key == self.key
+                ):
+                    self._array_depth = self._depth
+            elif char in "}]":
+                if self._depth == self._array_depth:
+                    self._array_depth = None
+                self._depth -= 1
+            elif char == ",":
+                # A comma ends the value of the last key
+                if self._depth == 1:
+                    self._last_key = None
+        return completed
+
+    def _close_string(self, completed: list[str]) -> None:
+        """Handle the closing quote of the string being read."""
+        raw = "".join(self._string)
+        self._string = None
+        if self._array_depth is not None and self._depth == self._array_depth:
+            # Escape sequences are decoded by the JSON parser itself
+            completed.append(json.loads(f'"{raw}"'))
+        elif self._depth == 1 and self._last_key is None:
+            self._last_key = json.loads(f'"{raw}"')
@@ -1,7 +1,17 @@
+import asyncio
+import hashlib
+from collections import deque
+from contextlib import aclosing
+from dataclasses import dataclass, replace
+from typing import AsyncIterator, Callable, Iterator, Optional
+
 from pydantic import BaseModel, Field
 
-from .llm import BaseLLM
+from .context import RollingContext
+from .docs import Chunk, compress_text
+from .llm import BaseLLM, JsonArrayStreamParser, ModelCapabilities, event_loop
 from .prompt import Prompt
+from .tokenizer import CHARS_PER_TOKEN, count_message_tokens, count_tokens
 
 
 class _ChunkSummaryOutputFormat(BaseModel):
@@ -15,6 +25,24 @@ class _ChunkSummaryOutputFormat(BaseModel):
     )
 
 
+class _SufficiencyOutputFormat(BaseModel):
+    is_sufficient: bool = Field(
+        ...,
+        description="Indicates if the summaries are sufficient for generating image ideas.",
+    )
+
+
+class _ChunkSummariesBatchOutputFormat(BaseModel):
+    summaries: list[str] = Field(
+        ...,
+        description="Summary of each document chunk, in the order they were given.",
+    )
+    is_sufficient: bool = Field(
+        ...,
+        description="Indicates if the summaries are sufficient for generating image ideas.",
+    )
+
+
 class _ImagePromptsOutputFormat(BaseModel):
     prompts: list[str] = Field(
         ...,
@@ -22,72 +50,908 @@ class _ImagePromptsOutputFormat(BaseModel):
     )
 
 
+class _SummaryAndImagePromptsOutputFormat(BaseModel):
+    summary: str = Field(
+        ...,
+        description="Global summary of the document generated by the LLM.",
+    )
+    prompts: list[str] = Field(
+        ...,
+        description="List of image prompts based on the document summary.",
+    )
+
+
+@dataclass
+class ChunkSummaryResult:
+    """
+    A dataclass representing a summary produced while summarizing a document.
+
+    Attributes:
+        summary (str): The summary text.
+        level (int): Level of the summary in the reduction tree. Level 0 holds
+            the summaries of the document chunks, and each higher level holds
+            the merged summaries of the level below it.
+        prompt_tokens (Optional[int]): Estimated number of tokens sent to the LLM
+            to produce the summary.
+        page (Optional[int]): Page of the document where the summarized chunk
+            starts. None for merged summaries.
+        chunk_index (Optional[int]): Index of the summarized chunk in the list
+            of document chunks. None for merged summaries.
+        content_hash (Optional[str]): SHA-256 hash of the summarized text: the
+            chunk text for chunk summaries, the merged summaries for merged ones.
+        is_sufficient (Optional[bool]): Whether the LLM considered the summaries
+            sufficient to infer the document's main idea once the chunk (or the
+            batch it was summarized with) was summarized. None if unknown.
+    """
+
+    summary: str
+    level: int = 0
+    prompt_tokens: Optional[int] = None
+    page: Optional[int] = None
+    chunk_index: Optional[int] = None
+    content_hash: Optional[str] = None
+    is_sufficient: Optional[bool] = None
+
+
+def hash_summaries(summaries: list[str]) -> str:
+    """
+    Hash a group of summaries merged by the "tree_reduce" strategy.
+
+    Args:
+        summaries (list[str]): The summaries of the group, in order.
+
+    Returns:
+        str: The hexadecimal SHA-256 hash of the group.
+    """
+    return hashlib.sha256("\n\n".join(summaries).encode("utf-8")).hexdigest()
+
+
+SUMMARIZATION_STRATEGIES = ["sequential", "map_reduce", "tree_reduce", "lookahead"]
+
+# Strategies summarizing each chunk without the summaries of the other chunks,
+# so a chunk summary only depends on the chunk content and the settings
+INDEPENDENT_CHUNK_STRATEGIES = ["map_reduce", "tree_reduce"]
+
+# Fraction of the context window left unused, since token counts are estimated
+CONTEXT_SAFETY_MARGIN = 0.1
+
+# Number of output tokens reserved for each generated image prompt
+IMAGE_PROMPT_TOKENS = 100
+
+
+def fit_chunk_size(
+    capabilities: ModelCapabilities,
+    summarize_chunk_prompt: Prompt,
+    max_chunk_summary_size: int,
+    strategy: str = "sequential",
+    context_token_budget: Optional[int] = None,
+    in_tokens: bool = False,
+) -> int:
+    """
+    Compute the largest chunk size whose summarization call fits the model context.
+
+    Larger chunks mean fewer LLM calls, so the chunk gets whatever is left of
+    the context window after the prompt template, the previous chunk summaries
+    sent by the in-order strategies, and the room reserved for the output.
+
+    Args:
+        capabilities (ModelCapabilities): The capabilities of the model.
+        summarize_chunk_prompt (Prompt): Prompt for summarizing each chunk.
+        max_chunk_summary_size (int): Maximum size of each chunk summary.
+        strategy (str): The chunk summarization strategy.
+        context_token_budget (Optional[int]): Maximum number of tokens of the
+            previous chunk summaries sent with each chunk. If `None`, a quarter
+            of the context window is reserved for them.
+        in_tokens (bool): If `True`, the size is returned in tokens; otherwise
+            it is returned in characters.
+
+    Returns:
+        int: The chunk size.
+
+    Raises:
+        ValueError: If the context window is too small to hold any chunk.
+    """
+    template_tokens = count_message_tokens(
+        summarize_chunk_prompt.format(
+            {
+                "chunk_text": "",
+                "max_chunk_summary_size": max_chunk_summary_size,
+                "chunks_summaries": "",
+            }
+        )
+    )
+    output_tokens = min(
+        capabilities.max_output_tokens, _summary_tokens(max_chunk_summary_size)
+    )
+
+    chunk_tokens = int(
+        capabilities.context_window * (1 - CONTEXT_SAFETY_MARGIN)
+        - template_tokens
+        - _context_tokens(capabilities, strategy, context_token_budget)
+        - output_tokens
+    )
+    if chunk_tokens < 1:
+        raise ValueError(
+            f"The context window of {capabilities.context_window} tokens is too "
+            "small to summarize any chunk with the given prompt and budgets."
+        )
+
+    return chunk_tokens if in_tokens else chunk_tokens * CHARS_PER_TOKEN
+
+
+def _context_tokens(
+    capabilities: ModelCapabilities,
+    strategy: str,
+    context_token_budget: Optional[int],
+) -> int:
+    """Tokens reserved for the previous chunk summaries sent with each chunk."""
+    # Only the in-order strategies send previous summaries with each chunk
+    if strategy not in ("sequential", "lookahead"):
+        return 0
+    if context_token_budget is None:
+        return capabilities.context_window // 4
+    return context_token_budget
+
+
+def _summary_tokens(max_summary_size: int) -> int:
+    """Output tokens reserved for a summary of the given maximum size."""
+    # The summary size is interpreted by the LLM (usually as words), so twice as
+    # many tokens are reserved to fit it and its JSON wrapper
+    return 2 * max_summary_size
+
+
+def max_single_call_document_length(capabilities: ModelCapabilities) -> int:
+    """
+    Length, in characters, above which a document cannot fit in a single call
+    of the model, whatever the prompt and expected output.
+
+    Args:
+        capabilities (ModelCapabilities): The capabilities of the model.
+
+    Returns:
+        int: The maximum length of a document passed to `fits_single_call`.
+    """
+    return int(capabilities.context_window * (1 - CONTEXT_SAFETY_MARGIN)) * CHARS_PER_TOKEN
+
+
+def fits_single_call(
+    capabilities: ModelCapabilities,
+    summarize_and_generate_image_prompts_prompt: Prompt,
+    document_text: str,
+    max_document_summary_size: int,
+    total_prompts_to_generate: int,
+) -> bool:
+    """
+    Check whether a document can be summarized and turned into image prompts in
+    a single call of the model.
+
+    Args:
+        capabilities (ModelCapabilities): The capabilities of the model.
+        summarize_and_generate_image_prompts_prompt (Prompt): Prompt for the fused call.
+        document_text (str): The whole text of the document.
+        max_document_summary_size (int): Maximum size of the document summary.
+        total_prompts_to_generate (int): Total number of prompts to generate.
+
+    Returns:
+        bool: Whether the prompt and the expected output fit the model limits.
+    """
+    prompt_tokens = count_message_tokens(
+        summarize_and_generate_image_prompts_prompt.format(
+            {
+                "document_text": document_text,
+                "max_document_summary_size": max_document_summary_size,
+                "total_prompts_to_generate": total_prompts_to_generate,
+            }
+        )
+    )
+    output_tokens = (
+        _summary_tokens(max_document_summary_size)
+        + total_prompts_to_generate * IMAGE_PROMPT_TOKENS
+    )
+    return (
+        output_tokens <= capabilities.max_output_tokens
+        and prompt_tokens + output_tokens
+        <= capabilities.context_window * (1 - CONTEXT_SAFETY_MARGIN)
+    )
+
+
 class DocumentSummarizer:
     def __init__(
         self,
         llm: BaseLLM,
-        document_chunks: list[str],
+        document_chunks: list[Chunk],
         max_document_summary_size: int,
         max_chunk_summary_size: int,
         summarize_chunk_prompt: Prompt,
         generate_document_summary_prompt: Prompt,
+        strategy: str = "sequential",
+        max_concurrency: int = 4,
+        tree_reduce_group_size: int = 4,
+        lookahead: int = 2,
+        context_token_budget: Optional[int] = None,
+        compression_ratio: Optional[float] = None,
+        max_batch_size: int = 1,
+        summarize_chunks_batch_prompt: Optional[Prompt] = None,
+        check_summaries_sufficiency_prompt: Optional[Prompt] = None,
+        capabilities: Optional[ModelCapabilities] = None,
+        on_chunk_summary: Optional[Callable[[ChunkSummaryResult], None]] = None,
+        completed_chunk_summaries: Optional[dict[int, ChunkSummaryResult]] = None,
+        completed_merged_summaries: Optional[dict[str, ChunkSummaryResult]] = None,
     ):
         """
         Initialize the DocumentSummarizer.
 
         Args:
             llm (BaseLLM): The LLM instance to use for summarization.
-            document_chunks (list[str]): List of document chunks to summarize.
+            document_chunks (list[Chunk]): List of document chunks to summarize.
             max_document_summary_size (int): Maximum size of the document summary.
             max_chunk_summary_size (int): Maximum size of each chunk summary.
             summarize_chunk_prompt (Prompt): Prompt for summarizing each chunk.
             generate_document_summary_prompt (Prompt): Prompt for generating the document summary.
+            strategy (str): How chunks are summarized. "sequential" feeds previous
+                chunk summaries into each prompt and stops once the summary is
+                sufficient; "map_reduce" summarizes every chunk independently and
+                concurrently before reducing them into the document summary;
+                "tree_reduce" summarizes chunks like "map_reduce" but merges the
+                summaries in groups, level by level, until one summary is left;
+                "lookahead" works like "sequential" but starts summarizing the
+                next `lookahead` chunks before the current one finishes.
+            max_concurrency (int): Maximum number of LLM calls in flight when using
+                a concurrent strategy.
+            tree_reduce_group_size (int): Number of summaries merged together by
+                each call of the "tree_reduce" strategy.
+            lookahead (int): Number of chunks (or batches of chunks, see
+                `max_batch_size`) summarized ahead of the current one by the
+                "lookahead" strategy.
+            context_token_budget (Optional[int]): Maximum number of tokens of the
+                previous chunk summaries sent with each chunk by the in-order
+                strategies. Older summaries are compacted into a digest when it is
+                exceeded. If `None`, every previous summary is sent.
+            compression_ratio (Optional[float]): If given, each chunk is shrunk
+                to about this fraction of its length before being sent to the
+                LLM, keeping its most central sentences (TextRank). If `None`,
+                chunks are sent as is.
+            max_batch_size (int): Maximum number of consecutive chunks summarized
+                together in a single call, which returns one summary per chunk.
+                Batches are also limited to what fits the context window of the
+                model. 1 summarizes each chunk on its own.
+            summarize_chunks_batch_prompt (Optional[Prompt]): Prompt for
+                summarizing a batch of chunks. Required if `max_batch_size` > 1.
+            check_summaries_sufficiency_prompt (Optional[Prompt]): Prompt for
+                checking whether chunk summaries are sufficient to infer the
+                document's main idea. Required by the "lookahead" strategy, to
+                check the chunks summarized ahead of time against the summaries
+                they did not see.
+            capabilities (Optional[ModelCapabilities]): The capabilities of the
+                model, used to size the batches. If `None`, batches are only
+                limited by `max_batch_size`.
+            on_chunk_summary (Optional[Callable[[ChunkSummaryResult], None]]): If
+                given, called with each chunk summary as soon as it is generated,
+                e.g. to report progress. Chunks summarized concurrently are
+                reported in the order they finish. Chunks summarized ahead of
+                time by the "lookahead" strategy are only reported once they are
+                accepted, in document order.
+            completed_chunk_summaries (Optional[dict[int, ChunkSummaryResult]]):
+                Summaries produced by an interrupted run over the same chunks, or
+                reused from a run over chunks with the same content, keyed by
+                chunk index. These chunks are not sent to the LLM again, and
+                their summaries are used as if they had just been generated.
+            completed_merged_summaries (Optional[dict[str, ChunkSummaryResult]]):
+                Merged summaries of an earlier "tree_reduce" run, keyed by the
+                `hash_summaries` hash of the group they merged. Groups with the
+                same summaries are not merged again.
         """
+        if strategy not in SUMMARIZATION_STRATEGIES:
+            raise ValueError(
+                f"Unsupported summarization strategy: {strategy}. "
+                f"Supported: {SUMMARIZATION_STRATEGIES}"
+            )
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        if tree_reduce_group_size < 2:
+            raise ValueError("tree_reduce_group_size must be at least 2.")
+        if lookahead < 0:
+            raise ValueError("lookahead must be a non-negative integer.")
+        if context_token_budget is not None and context_token_budget < 1:
+            raise ValueError("context_token_budget must be a positive integer.")
+        if compression_ratio is not None and not 0 < compression_ratio <= 1:
+            raise ValueError("compression_ratio must be in the (0, 1] interval.")
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+        if max_batch_size > 1 and summarize_chunks_batch_prompt is None:
+            raise ValueError(
+                "summarize_chunks_batch_prompt is required when max_batch_size > 1."
+            )
+        if strategy == "lookahead" and check_summaries_sufficiency_prompt is None:
+            raise ValueError(
+                "check_summaries_sufficiency_prompt is required by the lookahead strategy."
+            )
+
         self.llm = llm
         self.document_chunks = document_chunks
         self.max_document_summary_size = max_document_summary_size
         self.max_chunk_summary_size = max_chunk_summary_size
         self.summarize_chunk_prompt = summarize_chunk_prompt
         self.generate_document_summary_prompt = generate_document_summary_prompt
+        self.strategy = strategy
+        self.max_concurrency = max_concurrency
+        self.tree_reduce_group_size = tree_reduce_group_size
+        self.lookahead = lookahead
+        self.context_token_budget = context_token_budget
+        self.compression_ratio = compression_ratio
+        self.max_batch_size = max_batch_size
+        self.summarize_chunks_batch_prompt = summarize_chunks_batch_prompt
+        self.check_summaries_sufficiency_prompt = check_summaries_sufficiency_prompt
+        self.capabilities = capabilities
+        self.on_chunk_summary = on_chunk_summary
+        self.completed_chunk_summaries = completed_chunk_summaries or {}
+        self.completed_merged_summaries = completed_merged_summaries or {}
+        # Chunks have identity semantics, so each one maps to its own index
+        self._chunk_indices = {
+            chunk: index for index, chunk in enumerate(document_chunks)
+        }
 
-    def run(self) -> tuple[str, list[str]]:
+    def run(self) -> tuple[str, list[ChunkSummaryResult]]:
         """
         Summarize the document chunks and generate a global summary.
 
+        This is a blocking wrapper around `arun` and must not be called from a
+        running event loop.
+
         Returns:
-            tuple[str, list[str]]: A tuple containing the global document summary and a list of chunk summaries.
+            tuple[str, list[ChunkSummaryResult]]: A tuple containing the global
+                document summary and the chunk summaries. When using the
+                "tree_reduce" strategy, the intermediate merged summaries are
+                included after the chunk summaries with their tree level.
         """
-        # Summarize each chunk of the document until the summary is sufficient or
-        # all chunks are processed
-        chunk_summaries = []
+        return event_loop.run(self.arun())
+
+    async def arun(self) -> tuple[str, list[ChunkSummaryResult]]:
+        """
+        Summarize the document chunks and generate a global summary.
+
+        Returns:
+            tuple[str, list[ChunkSummaryResult]]: A tuple containing the global
+                document summary and the chunk summaries. When using the
+                "tree_reduce" strategy, the intermediate merged summaries are
+                included after the chunk summaries with their tree level.
+        """
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._batches = self._create_batches()
+
+        if self.strategy == "sequential":
+            chunk_summaries = await self._summarize_chunks_sequentially()
+        elif self.strategy == "lookahead":
+            chunk_summaries = await self._summarize_chunks_with_lookahead()
+        else:
+            chunk_summaries = await self._summarize_chunks_concurrently()
+
+        summaries = [chunk_summary.summary for chunk_summary in chunk_summaries]
+        if self.strategy == "tree_reduce":
+            document_summary, intermediate_summaries = await self._tree_reduce(
+                summaries
+            )
+        else:
+            document_summary, _ = await self._generate_document_summary(summaries)
+            intermediate_summaries = []
+
+        return document_summary, chunk_summaries + intermediate_summaries
+
+    async def _generate(
+        self,
+        messages: list[dict[str, str]],
+        output_format: Optional[type[BaseModel]] = None,
+    ) -> str | BaseModel:
+        """
+        Call the LLM, keeping at most `max_concurrency` calls in flight.
+
+        Args:
+            messages (list[dict[str, str]]): The messages to send to the LLM.
+            output_format (Optional[type[BaseModel]]): The expected output format.
+
+        Returns:
+            str | BaseModel: The generated response in the expected format or as a string.
+        """
+        async with self._semaphore:
+            return await self.llm.agenerate(
+                messages=messages, output_format=output_format
+            )
+
+    def _create_rolling_context(self) -> RollingContext:
+        """
+        Create the rolling context of chunk summaries used by the in-order
+        strategies. Older summaries are compacted into a digest once the context
+        exceeds `context_token_budget`.
+
+        Returns:
+            RollingContext: An empty rolling context.
+        """
+
+        async def compact(summaries: list[str], max_tokens: int) -> tuple[str, int]:
+            # Summary sizes are interpreted by the LLM, see `_summary_tokens`
+            return await self._generate_document_summary(
+                summaries, max_summary_size=max(max_tokens // 2, 1)
+            )
+
+        return RollingContext(
+            token_budget=self.context_token_budget,
+            compact=compact,
+        )
+
+    def _create_batches(self) -> list[list[Chunk]]:
+        """
+        Group consecutive chunks into the batches summarized by each call.
+
+        A batch grows until it holds `max_batch_size` chunks, or until one more
+        chunk would overflow the context window or the output limit of the model.
+
+        Returns:
+            list[list[Chunk]]: The batches, in document order.
+        """
+        if self.max_batch_size == 1:
+            return [[chunk] for chunk in self.document_chunks]
+
+        max_input_tokens = max_output_tokens = None
+        if self.capabilities is not None:
+            template_tokens = count_message_tokens(
+                self.summarize_chunks_batch_prompt.format(
+                    {
+                        "chunks_text": "",
+                        "total_chunks": self.max_batch_size,
+                        "max_chunk_summary_size": self.max_chunk_summary_size,
+                        "chunks_summaries": "",
+                    }
+                )
+            )
+            max_input_tokens = (
+                self.capabilities.context_window * (1 - CONTEXT_SAFETY_MARGIN)
+                - template_tokens
+                - _context_tokens(
+                    self.capabilities, self.strategy, self.context_token_budget
+                )
+            )
+            max_output_tokens = self.capabilities.max_output_tokens
+        ratio = self.compression_ratio or 1
+        summary_tokens = _summary_tokens(self.max_chunk_summary_size)
+
+        batches, batch = [], []
+        input_tokens = output_tokens = 0
         for chunk in self.document_chunks:
-            messages = self.summarize_chunk_prompt.format(
-                {
-                    "chunk_text": chunk,
-                    "max_chunk_summary_size": self.max_chunk_summary_size,
-                    "chunks_summaries": "\n\n".join(chunk_summaries),
-                }
+            chunk_tokens = int(count_tokens(chunk.text) * ratio) + summary_tokens
+            if batch and (
+                len(batch) == self.max_batch_size
+                or (
+                    max_input_tokens is not None
+                    and (
+                        input_tokens + output_tokens + chunk_tokens > max_input_tokens
+                        or output_tokens + summary_tokens > max_output_tokens
+                    )
+                )
+            ):
+                batches.append(batch)
+                batch, input_tokens, output_tokens = [], 0, 0
+            batch.append(chunk)
+            input_tokens += chunk_tokens - summary_tokens
+            output_tokens += summary_tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def _chunk_text(self, chunk: Chunk) -> str:
+        """
+        Get the text of a chunk as it is sent to the LLM.
+
+        Args:
+            chunk (Chunk): The chunk.
+
+        Returns:
+            str: The chunk text, compressed if `compression_ratio` is set.
+        """
+        if self.compression_ratio is None:
+            return chunk.text
+        # Compression is CPU bound, so it runs off the event loop to keep the
+        # other LLM calls in flight
+        return await asyncio.to_thread(
+            compress_text, chunk.text, self.compression_ratio
+        )
+
+    async def _summarize_batch(
+        self, batch: list[Chunk], chunks_summaries: str, report: bool = True
+    ) -> tuple[list[ChunkSummaryResult], bool]:
+        """
+        Summarize a batch of consecutive chunks with a single call.
+
+        If the LLM does not return one summary per chunk, the chunks of the
+        batch are summarized one by one instead.
+
+        Args:
+            batch (list[Chunk]): The chunks to summarize.
+            chunks_summaries (str): Summaries used as context for the chunks.
+            report (bool): Whether the new chunk summaries are passed to
+                `on_chunk_summary`. Callers not reporting them are responsible
+                for doing it.
+
+        Returns:
+            tuple[list[ChunkSummaryResult], bool]: The summary of each chunk and
+                whether the LLM considers the summaries sufficient to infer the
+                document's main idea. The tokens of the call are split evenly
+                between the chunk summaries.
+        """
+        # Chunks summarized by an interrupted run are not summarized again
+        completed = [
+            self.completed_chunk_summaries.get(self._chunk_indices[chunk])
+            for chunk in batch
+        ]
+        completed_sufficient = any(done.is_sufficient for done in completed if done)
+        if all(completed):
+            return completed, completed_sufficient
+        if any(completed):
+            missing = [chunk for chunk, done in zip(batch, completed) if done is None]
+            new_summaries, is_sufficient = await self._summarize_batch(
+                missing, chunks_summaries, report
+            )
+            new_summaries = iter(new_summaries)
+            return (
+                [done or next(new_summaries) for done in completed],
+                is_sufficient or completed_sufficient,
+            )
+
+        if len(batch) == 1:
+            chunk_summary, is_sufficient = await self._summarize_chunk(
+                batch[0], chunks_summaries
+            )
+            if report:
+                self._report_chunk_summaries([chunk_summary])
+            return [chunk_summary], is_sufficient
+
+        chunk_texts = await asyncio.gather(*(self._chunk_text(c) for c in batch))
+        messages = self.summarize_chunks_batch_prompt.format(
+            {
+                "chunks_text": "\n\n".join(
+                    f"<chunk {i}>\n{text}\n</chunk {i}>"
+                    for i, text in enumerate(chunk_texts, start=1)
+                ),
+                "total_chunks": len(batch),
+                "max_chunk_summary_size": self.max_chunk_summary_size,
+                "chunks_summaries": chunks_summaries,
+            }
+        )
+        output: _ChunkSummariesBatchOutputFormat = await self._generate(
+            messages=messages, output_format=_ChunkSummariesBatchOutputFormat
+        )
+
+        if len(output.summaries) != len(batch):
+            results = await asyncio.gather(
+                *(self._summarize_chunk(chunk, chunks_summaries) for chunk in batch)
             )
-            chunk_summary: _ChunkSummaryOutputFormat = self.llm.generate(
-                messages=messages, output_format=_ChunkSummaryOutputFormat
+            chunk_summaries = [summary for summary, _ in results]
+            if report:
+                self._report_chunk_summaries(chunk_summaries)
+            return chunk_summaries, any(is_sufficient for _, is_sufficient in results)
+
+        prompt_tokens = count_message_tokens(messages) // len(batch)
+        chunk_summaries = [
+            ChunkSummaryResult(
+                summary=summary,
+                prompt_tokens=prompt_tokens,
+                page=chunk.page,
+                chunk_index=self._chunk_indices[chunk],
+                content_hash=chunk.content_hash,
+                is_sufficient=output.is_sufficient,
             )
+            for summary, chunk in zip(output.summaries, batch)
+        ]
+        if report:
+            self._report_chunk_summaries(chunk_summaries)
+        return chunk_summaries, output.is_sufficient
+
+    def _report_chunk_summaries(self, chunk_summaries: list[ChunkSummaryResult]) -> None:
+        """Pass newly generated chunk summaries to `on_chunk_summary`, if given."""
+        if self.on_chunk_summary is not None:
+            for chunk_summary in chunk_summaries:
+                self.on_chunk_summary(chunk_summary)
+
+    def _new_summaries(
+        self, batch_summaries: list[ChunkSummaryResult]
+    ) -> list[ChunkSummaryResult]:
+        """Keep the summaries of a batch that do not come from `completed_chunk_summaries`."""
+        return [
+            chunk_summary
+            for chunk_summary in batch_summaries
+            if self.completed_chunk_summaries.get(chunk_summary.chunk_index)
+            is not chunk_summary
+        ]
+
+    def _accept_batch(
+        self,
+        batch_summaries: list[ChunkSummaryResult],
+        prompt_tokens: int,
+        is_sufficient: bool,
+    ) -> list[ChunkSummaryResult]:
+        """
+        Accept the summaries of a batch summarized by an in-order strategy,
+        passing the new ones to `on_chunk_summary`.
+
+        Args:
+            batch_summaries (list[ChunkSummaryResult]): The summaries of the batch.
+            prompt_tokens (int): Tokens sent to the LLM after the batch was
+                summarized (context compaction, sufficiency check), accounted
+                to the last new summary of the batch.
+            is_sufficient (bool): The final verdict on the batch, recorded on
+                its last new summary.
+
+        Returns:
+            list[ChunkSummaryResult]: The summaries of the batch, as accepted.
+        """
+        new_summaries = self._new_summaries(batch_summaries)
+        if new_summaries:
+            last = new_summaries[-1]
+            new_summaries[-1] = replace(
+                last,
+                prompt_tokens=last.prompt_tokens + prompt_tokens,
+                is_sufficient=is_sufficient,
+            )
+            batch_summaries = [
+                new_summaries[-1] if chunk_summary is last else chunk_summary
+                for chunk_summary in batch_summaries
+            ]
+        self._report_chunk_summaries(new_summaries)
+        return batch_summaries
+
+    async def _check_summaries_sufficiency(
+        self, chunks_summaries: str
+    ) -> tuple[bool, int]:
+        """
+        Ask the LLM whether chunk summaries are sufficient to infer the
+        document's main idea.
 
-            chunk_summaries.append(chunk_summary.summary)
+        Args:
+            chunks_summaries (str): The chunk summaries to check.
+
+        Returns:
+            tuple[bool, int]: Whether the summaries are sufficient and the
+                estimated number of tokens sent to the LLM.
+        """
+        messages = self.check_summaries_sufficiency_prompt.format(
+            {"chunks_summaries": chunks_summaries}
+        )
+        output: _SufficiencyOutputFormat = await self._generate(
+            messages=messages, output_format=_SufficiencyOutputFormat
+        )
+        return output.is_sufficient, count_message_tokens(messages)
+
+    async def _summarize_chunk(
+        self, chunk: Chunk, chunks_summaries: str
+    ) -> tuple[ChunkSummaryResult, bool]:
+        """
+        Summarize a single chunk given the summaries of the chunks seen before it.
+
+        Args:
+            chunk (Chunk): The chunk to summarize.
+            chunks_summaries (str): Summaries used as context for the chunk.
+
+        Returns:
+            tuple[ChunkSummaryResult, bool]: The chunk summary and whether the
+                LLM considers the summaries sufficient to infer the document's
+                main idea.
+        """
+        messages = self.summarize_chunk_prompt.format(
+            {
+                "chunk_text": await self._chunk_text(chunk),
+                "max_chunk_summary_size": self.max_chunk_summary_size,
+                "chunks_summaries": chunks_summaries,
+            }
+        )
+        chunk_summary: _ChunkSummaryOutputFormat = await self._generate(
+            messages=messages, output_format=_ChunkSummaryOutputFormat
+        )
+        result = ChunkSummaryResult(
+            summary=chunk_summary.summary,
+            prompt_tokens=count_message_tokens(messages),
+            page=chunk.page,
+            chunk_index=self._chunk_indices[chunk],
+            content_hash=chunk.content_hash,
+            is_sufficient=chunk_summary.is_sufficient,
+        )
+        return result, chunk_summary.is_sufficient
+
+    async def _summarize_chunks_sequentially(self) -> list[ChunkSummaryResult]:
+        """
+        Summarize each chunk of the document until the summary is sufficient or
+        all chunks are processed.
 
-            if chunk_summary.is_sufficient:
+        Returns:
+            list[ChunkSummaryResult]: The chunk summaries, in document order.
+        """
+        chunk_summaries = []
+        context = self._create_rolling_context()
+        for batch in self._batches:
+            batch_summaries, is_sufficient = await self._summarize_batch(
+                batch, context.text, report=False
+            )
+            compaction_tokens = 0
+            for chunk_summary in batch_summaries:
+                compaction_tokens += await context.append(chunk_summary.summary)
+
+            chunk_summaries.extend(
+                self._accept_batch(batch_summaries, compaction_tokens, is_sufficient)
+            )
+            if is_sufficient:
                 break
 
-        # Generate the global summary of the document
+        return chunk_summaries
+
+    async def _summarize_chunks_with_lookahead(self) -> list[ChunkSummaryResult]:
+        """
+        Summarize chunks in order like `_summarize_chunks_sequentially`, keeping
+        the next `lookahead` chunks (or batches) in flight while the current one
+        finishes.
+
+        Chunks started ahead of time only see the summaries that were available
+        when they were submitted. Their results are accepted in document order,
+        and only accepted summaries are passed to `on_chunk_summary`. The
+        summary is kept, since it covers the same chunk text, but an
+        "insufficient" verdict reached without the summaries accepted since the
+        batch was submitted is checked again against the whole context, so the
+        run stops where it would have stopped in order. A "sufficient" verdict
+        is trusted as is, because more context could only make the summaries
+        more sufficient. Once the summaries are sufficient, the calls still in
+        flight are cancelled.
+
+        Returns:
+            list[ChunkSummaryResult]: The chunk summaries, in document order.
+        """
+        chunk_summaries = []
+        context = self._create_rolling_context()
+        # Each batch in flight is kept with the context it was submitted with
+        pending: deque[tuple[asyncio.Task, str]] = deque()
+        next_batch = 0
+        try:
+            while next_batch < len(self._batches) or pending:
+                # Keep the current batch and the next `lookahead` ones in flight
+                while (
+                    next_batch < len(self._batches)
+                    and len(pending) <= self.lookahead
+                ):
+                    task = asyncio.create_task(
+                        self._summarize_batch(
+                            self._batches[next_batch], context.text, report=False
+                        )
+                    )
+                    pending.append((task, context.text))
+                    next_batch += 1
+
+                task, submitted_context = pending.popleft()
+                batch_summaries, is_sufficient = await task
+                stale = context.text != submitted_context
+                prompt_tokens = 0
+                for chunk_summary in batch_summaries:
+                    prompt_tokens += await context.append(chunk_summary.summary)
+
+                # Verdicts of resumed batches were reached with the whole context
+                if stale and not is_sufficient and self._new_summaries(batch_summaries):
+                    is_sufficient, check_tokens = (
+                        await self._check_summaries_sufficiency(context.text)
+                    )
+                    prompt_tokens += check_tokens
+
+                chunk_summaries.extend(
+                    self._accept_batch(batch_summaries, prompt_tokens, is_sufficient)
+                )
+                if is_sufficient:
+                    break
+        finally:
+            # Speculative calls whose results are not needed are cancelled, and
+            # awaited so none is left running and their errors are retrieved
+            for task, _ in pending:
+                task.cancel()
+            await asyncio.gather(*(task for task, _ in pending), return_exceptions=True)
+
+        return chunk_summaries
+
+    async def _summarize_chunks_concurrently(self) -> list[ChunkSummaryResult]:
+        """
+        Summarize every chunk independently, keeping at most `max_concurrency`
+        LLM calls in flight.
+
+        Returns:
+            list[ChunkSummaryResult]: The chunk summaries, in document order.
+        """
+        results = await asyncio.gather(
+            *(self._summarize_batch(batch, "") for batch in self._batches)
+        )
+        return [
+            chunk_summary
+            for batch_summaries, _ in results
+            for chunk_summary in batch_summaries
+        ]
+
+    async def _generate_document_summary(
+        self, chunk_summaries: list[str], max_summary_size: Optional[int] = None
+    ) -> tuple[str, int]:
+        """
+        Reduce the chunk summaries into the global summary of the document.
+
+        Args:
+            chunk_summaries (list[str]): The chunk summaries to merge.
+            max_summary_size (Optional[int]): Maximum size of the summary. If
+                `None`, `max_document_summary_size` is used.
+
+        Returns:
+            tuple[str, int]: The document summary and the estimated number of
+                tokens sent to the LLM.
+        """
         messages = self.generate_document_summary_prompt.format(
             {
                 "chunks_summaries": "\n\n".join(chunk_summaries),
-                "max_document_summary_size": self.max_document_summary_size,
+                "max_document_summary_size": max_summary_size
+                or self.max_document_summary_size,
             }
         )
 
-        document_summary: str = self.llm.generate(messages=messages, output_format=None)
+        document_summary: str = await self._generate(
+            messages=messages, output_format=None
+        )
+
+        return document_summary, count_message_tokens(messages)
+
+    async def _merge_summaries(self, summaries: list[str]) -> tuple[str, int]:
+        """
+        Merge a group of summaries, reusing the merged summary of an earlier run
+        if it merged the same summaries.
+
+        Args:
+            summaries (list[str]): The summaries to merge.
+
+        Returns:
+            tuple[str, int]: The merged summary and the estimated number of
+                tokens sent to the LLM (0 if it was reused).
+        """
+        completed = self.completed_merged_summaries.get(hash_summaries(summaries))
+        if completed is not None:
+            return completed.summary, 0
+        return await self._generate_document_summary(summaries)
+
+    async def _tree_reduce(
+        self, chunk_summaries: list[str]
+    ) -> tuple[str, list[ChunkSummaryResult]]:
+        """
+        Merge the chunk summaries in groups of `tree_reduce_group_size`, level by
+        level, until a single summary is left. Groups of the same level are merged
+        concurrently.
+
+        Args:
+            chunk_summaries (list[str]): The chunk summaries to merge.
 
-        return document_summary, chunk_summaries
+        Returns:
+            tuple[str, list[ChunkSummaryResult]]: The document summary and the
+                intermediate summaries produced on the way to it.
+        """
+        intermediate_summaries = []
+        summaries = chunk_summaries
+        level = 0
+        while True:
+            groups = [
+                summaries[i : i + self.tree_reduce_group_size]
+                for i in range(0, len(summaries), self.tree_reduce_group_size)
+            ] or [[]]
+            results = await asyncio.gather(
+                *(self._merge_summaries(group) for group in groups)
+            )
+            summaries = [summary for summary, _ in results]
+            if len(summaries) == 1:
+                return summaries[0], intermediate_summaries
+
+            level += 1
+            intermediate_summaries.extend(
+                ChunkSummaryResult(
+                    summary=summary,
+                    level=level,
+                    prompt_tokens=prompt_tokens,
+                    content_hash=hash_summaries(group),
+                )
+                for group, (summary, prompt_tokens) in zip(groups, results)
+            )
 
 
 class ImagePromptsGenerator:
@@ -97,37 +961,315 @@ class ImagePromptsGenerator:
         document_summary: str,
         total_prompts_to_generate: int,
         generate_image_prompts_prompt: Prompt,
+        max_prompts_per_call: Optional[int] = None,
+        max_concurrency: int = 4,
+        max_top_up_calls: int = 0,
+        generate_image_prompts_shard_prompt: Optional[Prompt] = None,
     ):
         """
         Initialize the ImagePromptsGenerator.
 
+        Large prompt counts are split into shards of at most
+        `max_prompts_per_call` prompts, generated concurrently. The results are
+        merged and deduplicated, and missing prompts are requested again by up
+        to `max_top_up_calls` follow-up calls, which are shown the prompts
+        generated so far.
+
         Args:
             llm (BaseLLM): The LLM instance to use for generating image prompts.
             document_summary (str): The summary of the document to base prompts on.
             total_prompts_to_generate (int): Total number of prompts to generate.
             generate_image_prompts_prompt (Prompt): Prompt for generating image prompts.
+            max_prompts_per_call (Optional[int]): Maximum number of prompts
+                requested by a single call. If `None`, all the prompts are
+                requested by one call.
+            max_concurrency (int): Maximum number of calls in flight.
+            max_top_up_calls (int): Maximum number of follow-up calls made to
+                replace duplicated or missing prompts.
+            generate_image_prompts_shard_prompt (Optional[Prompt]): Message
+                appended to the prompt of each shard and follow-up call, telling
+                it which shard it is and which prompts already exist, so that
+                shards do not repeat each other. Required if the prompts are
+                sharded or topped up.
         """
+        if max_prompts_per_call is not None and max_prompts_per_call < 1:
+            raise ValueError("max_prompts_per_call must be at least 1.")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        if max_top_up_calls < 0:
+            raise ValueError("max_top_up_calls must be a non-negative integer.")
+        sharded = (
+            max_prompts_per_call is not None
+            and total_prompts_to_generate > max_prompts_per_call
+        )
+        needs_shard_prompt = sharded or max_top_up_calls > 0
+        if needs_shard_prompt and generate_image_prompts_shard_prompt is None:
+            raise ValueError(
+                "generate_image_prompts_shard_prompt is required to shard or top up "
+                "the prompts."
+            )
+
         self.llm = llm
         self.document_summary = document_summary
         self.total_prompts_to_generate = total_prompts_to_generate
         self.generate_image_prompts_prompt = generate_image_prompts_prompt
+        self.max_prompts_per_call = max_prompts_per_call or total_prompts_to_generate
+        self.max_concurrency = max_concurrency
+        self.max_top_up_calls = max_top_up_calls
+        self.generate_image_prompts_shard_prompt = generate_image_prompts_shard_prompt
 
     def run(self) -> list[str]:
         """
         Generate image prompts based on the document summary.
 
+        This is a blocking wrapper around `arun` and must not be called from a
+        running event loop.
+
         Returns:
             list[str]: A list of generated image prompts.
         """
+        return event_loop.run(self.arun())
+
+    async def arun(self) -> list[str]:
+        """
+        Generate image prompts based on the document summary.
+
+        Returns:
+            list[str]: A list of generated image prompts, without duplicates and
+                with at most `total_prompts_to_generate` prompts.
+        """
+        return [prompt async for prompt in self.astream()]
+
+    def stream(self) -> Iterator[str]:
+        """
+        Generate image prompts, yielding each one as soon as it is generated.
+
+        This is a blocking wrapper around `astream` and must not be called from
+        a running event loop.
+
+        Yields:
+            str: The next image prompt.
+        """
+        loop = event_loop.get_event_loop()
+        image_prompts = self.astream()
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(anext(image_prompts))
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(image_prompts.aclose())
+            event_loop.cancel_pending_tasks()
+
+    async def astream(self) -> AsyncIterator[str]:
+        """
+        Generate image prompts, yielding each one as soon as it is generated.
+
+        The LLM responses are streamed, and each prompt is yielded once its JSON
+        string is complete, without waiting for the rest of the response. With
+        several shards, prompts are yielded in the order they arrive.
+
+        Yields:
+            str: The next image prompt. Duplicates are skipped, and at most
+                `total_prompts_to_generate` prompts are yielded.
+        """
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        image_prompts: list[str] = []
+        seen: set[str] = set()
+
+        # The first round requests every prompt. Duplicated, missing or
+        # truncated prompts are then replaced by follow-up rounds that are
+        # shown the prompts generated so far.
+        for round_index in range(1 + self.max_top_up_calls):
+            missing = self.total_prompts_to_generate - len(image_prompts)
+            if missing <= 0:
+                break
+            shard_sizes = self._shard_sizes(missing)
+            if round_index == 0 and len(shard_sizes) == 1:
+                shards = [(shard_sizes[0], None, None, None)]
+            else:
+                shards = [
+                    (size, i, len(shard_sizes), list(image_prompts))
+                    for i, size in enumerate(shard_sizes)
+                ]
+
+            async with aclosing(self._stream_shards(shards)) as new_prompts:
+                async for prompt in new_prompts:
+                    # Prompts differing only by case or whitespace are duplicates
+                    key = " ".join(prompt.lower().split())
+                    if not key or key in seen:
+                        continue
+                    seen.add(key)
+                    image_prompts.append(prompt)
+                    yield prompt
+                    if len(image_prompts) == self.total_prompts_to_generate:
+                        return
+
+    def _shard_sizes(self, total: int) -> list[int]:
+        """
+        Split a number of prompts into shards of at most `max_prompts_per_call`.
+
+        Args:
+            total (int): The number of prompts to split.
+
+        Returns:
+            list[int]: The number of prompts of each shard, as even as possible.
+        """
+        shards = -(-total // self.max_prompts_per_call)
+        return [total // shards + (i < total % shards) for i in range(shards)]
+
+    async def _stream_shards(
+        self,
+        shards: list[tuple[int, Optional[int], Optional[int], Optional[list[str]]]],
+    ) -> AsyncIterator[str]:
+        """
+        Generate several shards of image prompts concurrently.
+
+        Args:
+            shards (list[tuple[int, Optional[int], Optional[int], Optional[list[str]]]]):
+                The arguments of `_stream_prompts` for each shard.
+
+        Yields:
+            str: The next prompt generated by any of the shards.
+        """
+        queue: asyncio.Queue[Optional[str]] = asyncio.Queue()
+
+        async def generate_shard(*args) -> None:
+            try:
+                async for prompt in self._stream_prompts(*args):
+                    await queue.put(prompt)
+            finally:
+                # Signals that the shard is done, even if it failed
+                await queue.put(None)
+
+        tasks = [asyncio.create_task(generate_shard(*shard)) for shard in shards]
+        try:
+            pending = len(tasks)
+            while pending:
+                prompt = await queue.get()
+                if prompt is None:
+                    pending -= 1
+                else:
+                    yield prompt
+            # Raises the error of the first shard that failed, if any
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _stream_prompts(
+        self,
+        total: int,
+        shard_index: Optional[int] = None,
+        total_shards: Optional[int] = None,
+        previous_prompts: Optional[list[str]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Generate a shard of image prompts with a single streamed call.
+
+        Args:
+            total (int): Number of prompts to request.
+            shard_index (Optional[int]): Index of the shard. If `None`, the prompts
+                are requested without the shard message.
+            total_shards (Optional[int]): Number of shards requested together.
+            previous_prompts (Optional[list[str]]): Prompts that already exist and
+                must not be repeated.
+
+        Yields:
+            str: The next generated prompt.
+        """
         messages = self.generate_image_prompts_prompt.format(
             {
                 "document_summary": self.document_summary,
+                "total_prompts_to_generate": total,
+            }
+        )
+        if shard_index is not None:
+            messages += self.generate_image_prompts_shard_prompt.format(
+                {
+                    "shard_index": shard_index + 1,
+                    "total_shards": total_shards,
+                    "previous_prompts": "\n".join(
+                        f"- {prompt}" for prompt in previous_prompts
+                    )
+                    or "None",
+                }
+            )
+
+        parser = JsonArrayStreamParser("prompts")
+        async with self._semaphore:
+            async for piece in self.llm.astream(
+                messages=messages, output_format=_ImagePromptsOutputFormat
+            ):
+                for prompt in parser.feed(piece):
+                    yield prompt
+
+
+class SummaryAndImagePromptsGenerator:
+    def __init__(
+        self,
+        llm: BaseLLM,
+        document_text: str,
+        max_document_summary_size: int,
+        total_prompts_to_generate: int,
+        summarize_and_generate_image_prompts_prompt: Prompt,
+    ):
+        """
+        Initialize the SummaryAndImagePromptsGenerator.
+
+        Short documents that fit in the context window of the model (see
+        `fits_single_call`) are summarized and turned into image prompts with a
+        single structured call, instead of the chunk summary, document summary
+        and image prompts calls of `DocumentSummarizer` and `ImagePromptsGenerator`.
+
+        Args:
+            llm (BaseLLM): The LLM instance to use.
+            document_text (str): The whole text of the document.
+            max_document_summary_size (int): Maximum size of the document summary.
+            total_prompts_to_generate (int): Total number of prompts to generate.
+            summarize_and_generate_image_prompts_prompt (Prompt): Prompt for the fused call.
+        """
+        self.llm = llm
+        self.document_text = document_text
+        self.max_document_summary_size = max_document_summary_size
+        self.total_prompts_to_generate = total_prompts_to_generate
+        self.summarize_and_generate_image_prompts_prompt = (
+            summarize_and_generate_image_prompts_prompt
+        )
+
+    def run(self) -> tuple[str, list[str], int]:
+        """
+        Summarize the document and generate image prompts from it.
+
+        This is a blocking wrapper around `arun` and must not be called from a
+        running event loop.
+
+        Returns:
+            tuple[str, list[str], int]: The document summary, the image prompts
+                and the estimated number of tokens sent to the LLM.
+        """
+        return event_loop.run(self.arun())
+
+    async def arun(self) -> tuple[str, list[str], int]:
+        """
+        Summarize the document and generate image prompts from it.
+
+        Returns:
+            tuple[str, list[str], int]: The document summary, the image prompts
+                and the estimated number of tokens sent to the LLM.
+        """
+        messages = self.summarize_and_generate_image_prompts_prompt.format(
+            {
+                "document_text": self.document_text,
+                "max_document_summary_size": self.max_document_summary_size,
                 "total_prompts_to_generate": self.total_prompts_to_generate,
             }
         )
 
-        image_prompts: _ImagePromptsOutputFormat = self.llm.generate(
-            messages=messages, output_format=_ImagePromptsOutputFormat
+        output: _SummaryAndImagePromptsOutputFormat = await self.llm.agenerate(
+            messages=messages, output_format=_SummaryAndImagePromptsOutputFormat
         )
 
-        return image_prompts.prompts
+        return output.summary, output.prompts, count_message_tokens(messages)
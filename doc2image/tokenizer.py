@@ -0,0 +1,77 @@
+import math
+from functools import lru_cache
+from typing import Callable
+
+try:
+    import tiktoken
+
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# Average number of characters per token for English text on BPE tokenizers
+CHARS_PER_TOKEN = 4
+
+# Encoding used by the tiktoken tokenizer (GPT-4o family)
+TIKTOKEN_ENCODING = "o200k_base"
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a text without calling the LLM provider.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def count_message_tokens(messages: list[dict[str, str]]) -> int:
+    """
+    Estimate the number of tokens sent to the LLM for a list of messages.
+
+    Args:
+        messages (list[dict[str, str]]): The messages, each containing a role and content.
+
+    Returns:
+        int: The estimated number of tokens of the messages contents.
+    """
+    return sum(count_tokens(message["content"]) for message in messages)
+
+
+def _tiktoken_counter() -> Callable[[str], int]:
+    encoding = tiktoken.get_encoding(TIKTOKEN_ENCODING)
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+TOKENIZERS: dict[str, Callable[[], Callable[[str], int]]] = {
+    "approximate": lambda: count_tokens,
+}
+
+if TIKTOKEN_AVAILABLE:
+    TOKENIZERS["tiktoken"] = _tiktoken_counter
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(name: str) -> Callable[[str], int]:
+    """
+    Get a local token counting function by name.
+
+    Args:
+        name (str): The name of the tokenizer (e.g., "approximate", "tiktoken").
+
+    Returns:
+        Callable[[str], int]: A function returning the number of tokens of a text.
+
+    Raises:
+        ValueError: If the tokenizer is not available.
+    """
+    if name not in TOKENIZERS:
+        raise ValueError(
+            f"'{name}' tokenizer is unavailable. Available tokenizers are: "
+            f"{', '.join(TOKENIZERS)}."
+        )
+    return TOKENIZERS[name]()
@@ -1,5 +1,6 @@
 import os
-import tempfile
+import time
+import uuid
 
 import streamlit as st
 import hydra
@@ -101,14 +102,50 @@ def render_prompt_creation(session):
 
     with st.expander("⚙️ Advanced Configuration"):
         st.markdown("**Parser**")
+        auto_chunk_size = st.checkbox(
+            "auto_chunk_size",
+            value=cfg.parser.auto_chunk_size,
+            help="Fit chunks to the context window of the selected model. With large context windows, most documents become one or two chunks.",
+        )
         chunk_size = st.number_input(
-            "chunk_size", value=cfg.parser.chunk_size, key="chunk_size"
+            "chunk_size",
+            value=cfg.parser.chunk_size,
+            key="chunk_size",
+            disabled=auto_chunk_size,
         )
         chunk_overlap = st.number_input(
             "chunk_overlap", value=cfg.parser.chunk_overlap, key="chunk_overlap"
         )
 
         st.markdown("**Document Summarizer**")
+        summarizer_strategies = api.get_summarization_strategies()
+        strategy = st.selectbox(
+            "strategy",
+            options=summarizer_strategies,
+            index=summarizer_strategies.index(
+                cfg.pipeline.document_summarizer.strategy
+            ),
+        )
+        max_concurrency = st.number_input(
+            "max_concurrency",
+            min_value=1,
+            value=cfg.pipeline.document_summarizer.max_concurrency,
+        )
+        tree_reduce_group_size = st.number_input(
+            "tree_reduce_group_size",
+            min_value=2,
+            value=cfg.pipeline.document_summarizer.tree_reduce_group_size,
+        )
+        lookahead = st.number_input(
+            "lookahead",
+            min_value=0,
+            value=cfg.pipeline.document_summarizer.lookahead,
+        )
+        context_token_budget = st.number_input(
+            "context_token_budget",
+            min_value=1,
+            value=cfg.pipeline.document_summarizer.context_token_budget,
+        )
         max_chunk_summary_size = st.number_input(
             "max_chunk_summary_size",
             value=cfg.pipeline.document_summarizer.max_chunk_summary_size,
@@ -152,8 +189,14 @@ def render_prompt_creation(session):
         )
 
     config = {
+        "auto_chunk_size": auto_chunk_size,
         "chunk_size": chunk_size,
         "chunk_overlap": chunk_overlap,
+        "strategy": strategy,
+        "max_concurrency": max_concurrency,
+        "tree_reduce_group_size": tree_reduce_group_size,
+        "lookahead": lookahead,
+        "context_token_budget": context_token_budget,
         "max_chunk_summary_size": max_chunk_summary_size,
         "max_document_summary_size": max_document_summary_size,
         "doc_temp": doc_temp,
@@ -166,18 +209,27 @@ def render_prompt_creation(session):
 
     if uploaded_file and st.session_state.get("model_selected"):
         if st.button("🚀 Generate Images"):
-            file_path = os.path.join(tempfile.gettempdir(), uploaded_file.name)
+            # Uploads are kept in the data directory, where the workers can
+            # read them for as long as the job is queued. The worker deletes
+            # them once the job completes or fails.
+            upload_directory = os.path.join(
+                cfg.pipeline.jobs.upload_directory, uuid.uuid4().hex
+            )
+            os.makedirs(upload_directory, exist_ok=True)
+            file_path = os.path.join(upload_directory, uploaded_file.name)
             with open(file_path, "wb") as f:
                 f.write(uploaded_file.read())
-            with st.spinner("Processing document and generating prompts..."):
-                run_pipeline(
-                    file_path, st.session_state["model_selected"], total_prompts, config
-                )
-            st.success("Pipeline completed! See results in History.")
+            job = submit_pipeline_job(
+                file_path, st.session_state["model_selected"], total_prompts, config
+            )
+            st.session_state.job_id = job.id
+            # The job is also kept in the URL, so it survives page refreshes
+            st.query_params["job_id"] = str(job.id)
+            st.rerun()
 
 
 @database_session_decorator
-def run_pipeline(
+def submit_pipeline_job(
     session,
     file_path: str,
     model_selected: str,
@@ -188,49 +240,63 @@ def run_pipeline(
     api_key = (
         st.session_state.get("openai_api_key", None) if provider == "OpenAI" else None
     )
-    summary_session = api.summerize_document(
+    return api.submit_pipeline_job(
         session,
         document_path=file_path,
-        chunk_size=config["chunk_size"],
-        chunk_overlap=config["chunk_overlap"],
-        separators=cfg.parser.separators,
-        is_separator_regex=cfg.parser.is_separator_regex,
-        keep_separator=cfg.parser.keep_separator,
-        strip_whitespace=cfg.parser.strip_whitespace,
+        parameters={
+            "provider": provider,
+            "llm_model_name": model_selected,
+            "total_prompts": total_prompts,
+            "config": config,
+        },
         llm_api_key=api_key,
-        llm_model_name=model_selected,
-        llm_temperature=config["doc_temp"],
-        llm_top_p=config["doc_top_p"],
-        llm_top_k=config["doc_top_k"],
-        llm_provider=provider,
-        max_document_summary_size=config["max_document_summary_size"],
-        max_chunk_summary_size=config["max_chunk_summary_size"],
-        summarize_chunk_prompt_messages=cfg.prompts.summarize_chunk.messages,
-        summarize_chunk_prompt_parameters=cfg.prompts.summarize_chunk.parameters,
-        generate_document_summary_prompt_messages=cfg.prompts.generate_document_summary.messages,
-        generate_document_summary_prompt_parameters=cfg.prompts.generate_document_summary.parameters,
     )
 
-    api.generate_image_prompts(
-        session,
-        summary_session=summary_session,
-        document_path=file_path,
-        document_summary=summary_session.document_summary,
-        total_prompts_to_generate=total_prompts,
-        generate_image_prompts_prompt_messages=cfg.prompts.generate_image_prompts.messages,
-        generate_image_prompts_prompt_parameters=cfg.prompts.generate_image_prompts.parameters,
-        llm_api_key=api_key,
-        llm_model_name=model_selected,
-        llm_temperature=config["prompt_temp"],
-        llm_top_p=config["prompt_top_p"],
-        llm_top_k=config["prompt_top_k"],
-        provider_name=provider,
-    )
-    st.session_state.generated_summary_id = summary_session.id
-    session.commit()
+
+@database_session_decorator
+def show_job_status(session):
+    job = api.get_pipeline_job(session, st.session_state.job_id)
+    if job is None:
+        forget_job()
+        st.rerun()
+
+    if job.status == "completed":
+        forget_job()
+        st.session_state.generated_summary_id = job.summary_session_id
+        st.rerun()
+
+    if job.status == "failed":
+        st.error("The pipeline failed.")
+        with st.expander("Error details"):
+            st.code(job.error)
+        if st.button("Back"):
+            forget_job()
+            st.rerun()
+        return
+
+    if job.status == "pending":
+        st.info("Waiting for a worker to start the job...")
+    st.progress(job.progress, text=job.progress_message or "Starting...")
+
+    # Prompts are shown as soon as the worker generates them
+    if job.image_prompts:
+        st.markdown("#### 🖼️ Generated Prompts")
+        st.markdown(
+            "\n".join(
+                f"{i}. {prompt}" for i, prompt in enumerate(job.image_prompts, 1)
+            )
+        )
+
+    # The page polls the job until it finishes
+    time.sleep(cfg.pipeline.jobs.poll_interval_seconds)
     st.rerun()
 
 
+def forget_job():
+    st.session_state.job_id = None
+    st.query_params.pop("job_id", None)
+
+
 def show_results():
     render_output(st.session_state.generated_summary_id)
     if st.button("Back"):
@@ -238,7 +304,12 @@ def show_results():
         st.rerun()
 
 
-if st.session_state.get("generated_summary_id", None) is None:
-    render_prompt_creation()
-else:
+if st.session_state.get("job_id", None) is None and "job_id" in st.query_params:
+    st.session_state.job_id = int(st.query_params["job_id"])
+
+if st.session_state.get("generated_summary_id", None) is not None:
     show_results()
+elif st.session_state.get("job_id", None) is not None:
+    show_job_status()
+else:
+    render_prompt_creation()
@@ -5,6 +5,10 @@ from doc2image.database import database_session_decorator
 from doc2image import api
 
 
+def _format_seconds(seconds) -> str:
+    return "-" if seconds is None else f"{seconds:.1f}s"
+
+
 @database_session_decorator
 def render_output(session, summary_session_id: int):
     summary_session = api.get_summary_by_id(session, summary_session_id)
@@ -29,12 +33,15 @@ def render_output(session, summary_session_id: int):
             f"Temperature: {summary_session.image_prompt_sessions[0].llm_temperature}\n"
             f"Top-p: {summary_session.image_prompt_sessions[0].llm_top_p}\n"
             f"Top-k: {summary_session.image_prompt_sessions[0].llm_top_k}\n"
+            f"Time to First Prompt: {_format_seconds(summary_session.image_prompt_sessions[0].time_to_first_prompt)}"
         )
         st.markdown("**Chunking & Summary Settings**")
         st.code(
-            f"Max Chunk Summary Size: {summary_session.max_chunk_summary_size}\n"
+            f"Max Chunk Summary Size: {summary_session.max_chunk_summary_size or '-'}\n"
             f"Max Document Summary Size: {summary_session.max_document_summary_size}\n"
-            f"Chunk Count: {len(summary_session.chunk_summaries)}"
+            f"Chunk Count: {sum(1 for c in summary_session.chunk_summaries if not c.level)}\n"
+            f"Skipped Duplicate Chunks: {summary_session.duplicate_chunks or 0}\n"
+            f"Reused Chunk Summaries: {summary_session.reused_chunks or 0}"
         )
 
     # -- Generated Prompts
@@ -76,6 +83,9 @@ def render_output(session, summary_session_id: int):
     chunk_data = [
         {
             "Chunk": i + 1,
+            "Level": chunk.level or 0,
+            "Page": chunk.page + 1 if chunk.page is not None else None,
+            "Prompt tokens": chunk.prompt_tokens,
             "Summary": chunk.chunk_summary,
         }
         for i, chunk in enumerate(summary_session.chunk_summaries)
@@ -0,0 +1,438 @@
+"""
+Worker processes running the queued pipeline jobs.
+
+Jobs are submitted with `api.submit_pipeline_job` (the UI does it) and stored
+in the database, so they survive browser refreshes and restarts of the UI.
+Start a worker with:
+
+    python -m doc2image.worker [--processes N]
+
+Any number of workers, on any number of machines sharing the database, can
+run at the same time: each job is claimed by exactly one of them, so the
+throughput grows with the number of workers.
+"""
+
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+from typing import Optional
+
+import hydra
+import sqlalchemy as sa
+from hydra.core.global_hydra import GlobalHydra
+from omegaconf import DictConfig
+
+from . import api
+from .database import DocumentSummarySession, PipelineJob, Session
+from .database.schema import db
+
+# Share of the job progress taken by the document summary, the rest being the
+# image prompts generation
+_SUMMARY_PROGRESS = 0.8
+
+# Minimum number of seconds between two progress updates written to the database
+_PROGRESS_INTERVAL = 1.0
+
+# Maximum number of seconds between two heartbeats of a running job
+_HEARTBEAT_INTERVAL = 30.0
+
+
+def load_config() -> DictConfig:
+    """
+    Load the Hydra configuration of the application.
+
+    Returns:
+        DictConfig: The composed configuration.
+    """
+    if not GlobalHydra.instance().is_initialized():
+        hydra.initialize(config_path="configs", version_base=None)
+    return hydra.compose(config_name="config")
+
+
+class _ProgressReporter:
+    """
+    Write the progress of a job to the database, at most once per
+    `_PROGRESS_INTERVAL` seconds, committing it so the UI can poll it.
+    """
+
+    def __init__(self, session: Session, job: PipelineJob) -> None:
+        self.session = session
+        self.job = job
+        self._last_update = 0.0
+
+    def __call__(
+        self,
+        progress: float,
+        message: str,
+        force: bool = False,
+        image_prompts: Optional[list[str]] = None,
+    ) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_update < _PROGRESS_INTERVAL:
+            return
+        self._last_update = now
+        api.update_pipeline_job_progress(
+            self.session, self.job, progress, message, image_prompts
+        )
+        self.session.commit()
+
+
+class _Heartbeat(threading.Thread):
+    """
+    Refresh the heartbeat of a running job every `interval` seconds, from its
+    own database session, so long steps reporting no progress (e.g., parsing a
+    large PDF or a single long LLM call) do not make the job look abandoned.
+    """
+
+    def __init__(self, job_id: int, worker_id: str, interval: float) -> None:
+        super().__init__(daemon=True)
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            with Session() as session:
+                try:
+                    api.refresh_pipeline_job_heartbeat(
+                        session, self.job_id, self.worker_id
+                    )
+                    session.commit()
+                except sa.exc.OperationalError:
+                    # The database is busy: the next beat tries again
+                    session.rollback()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+
+def run_pipeline_job(
+    session: Session, job: PipelineJob, cfg: DictConfig
+) -> DocumentSummarySession:
+    """
+    Summarize the document of a job and generate its image prompts.
+
+    Args:
+        session (Session): The database session.
+        job (PipelineJob): The claimed job.
+        cfg (DictConfig): The application configuration.
+
+    Returns:
+        DocumentSummarySession: The document summary session created.
+    """
+    parameters = job.parameters
+    config = parameters["config"]
+    provider = parameters["provider"]
+    model_selected = parameters["llm_model_name"]
+    total_prompts = parameters["total_prompts"]
+    report_progress = _ProgressReporter(session, job)
+
+    document_cache = None
+    if cfg.parser.cache.enabled:
+        document_cache = api.get_document_cache(
+            directory=cfg.parser.cache.directory,
+            max_size_bytes=cfg.parser.cache.max_size_mb * 1024 * 1024,
+        )
+    llm_cache = None
+    if cfg.pipeline.llm_cache.enabled:
+        ttl_hours = cfg.pipeline.llm_cache.ttl_hours
+        llm_cache = api.get_llm_cache(
+            path=cfg.pipeline.llm_cache.path,
+            max_size_bytes=cfg.pipeline.llm_cache.max_size_mb * 1024 * 1024,
+            ttl_seconds=ttl_hours * 3600 if ttl_hours is not None else None,
+        )
+
+    # Short documents are summarized and turned into prompts with a single call
+    if cfg.pipeline.single_call.enabled:
+        report_progress(0.0, "Summarizing document and generating prompts", force=True)
+        sessions = api.summerize_document_and_generate_image_prompts(
+            session,
+            document_path=job.document_path,
+            llm_api_key=job.llm_api_key,
+            llm_model_name=model_selected,
+            llm_temperature=config["prompt_temp"],
+            llm_top_p=config["prompt_top_p"],
+            llm_top_k=config["prompt_top_k"],
+            llm_provider=provider,
+            max_document_summary_size=config["max_document_summary_size"],
+            total_prompts_to_generate=total_prompts,
+            summarize_and_generate_image_prompts_prompt_messages=cfg.prompts.summarize_document_and_generate_image_prompts.messages,
+            summarize_and_generate_image_prompts_prompt_parameters=cfg.prompts.summarize_document_and_generate_image_prompts.parameters,
+            llm_cache=llm_cache,
+            parser_workers=cfg.parser.workers,
+            document_cache=document_cache,
+            memoize=cfg.pipeline.memoize,
+        )
+        if sessions is not None:
+            summary_session, _ = sessions
+            return summary_session
+
+    # Content-defined boundaries only pay off when the summaries of unchanged
+    # chunks are reused, so edits only change the chunks near them
+    reuse_chunk_summaries = (
+        cfg.pipeline.document_summarizer.reuse_chunk_summaries
+        and config["strategy"] in api.INDEPENDENT_CHUNK_STRATEGIES
+    )
+    report_progress(0.0, "Summarizing document", force=True)
+    summary_session = api.summerize_document(
+        session,
+        document_path=job.document_path,
+        chunk_size=config["chunk_size"],
+        chunk_overlap=config["chunk_overlap"],
+        separators=cfg.parser.separators,
+        is_separator_regex=cfg.parser.is_separator_regex,
+        keep_separator=cfg.parser.keep_separator,
+        strip_whitespace=cfg.parser.strip_whitespace,
+        stream=cfg.parser.stream,
+        parser_workers=cfg.parser.workers,
+        document_cache=document_cache,
+        tokenizer=cfg.parser.tokenizer,
+        content_defined_chunking=cfg.parser.content_defined or reuse_chunk_summaries,
+        auto_chunk_size=config["auto_chunk_size"],
+        dedup_threshold=cfg.parser.dedup_threshold,
+        llm_api_key=job.llm_api_key,
+        llm_model_name=model_selected,
+        llm_temperature=config["doc_temp"],
+        llm_top_p=config["doc_top_p"],
+        llm_top_k=config["doc_top_k"],
+        llm_provider=provider,
+        max_document_summary_size=config["max_document_summary_size"],
+        max_chunk_summary_size=config["max_chunk_summary_size"],
+        summarize_chunk_prompt_messages=cfg.prompts.summarize_chunk.messages,
+        summarize_chunk_prompt_parameters=cfg.prompts.summarize_chunk.parameters,
+        generate_document_summary_prompt_messages=cfg.prompts.generate_document_summary.messages,
+        generate_document_summary_prompt_parameters=cfg.prompts.generate_document_summary.parameters,
+        strategy=config["strategy"],
+        max_concurrency=config["max_concurrency"],
+        tree_reduce_group_size=config["tree_reduce_group_size"],
+        lookahead=config["lookahead"],
+        context_token_budget=config["context_token_budget"],
+        max_chunks=cfg.pipeline.document_summarizer.max_chunks,
+        compression_ratio=cfg.pipeline.document_summarizer.compression_ratio,
+        max_batch_size=cfg.pipeline.document_summarizer.max_batch_size,
+        summarize_chunks_batch_prompt_messages=cfg.prompts.summarize_chunks_batch.messages,
+        summarize_chunks_batch_prompt_parameters=cfg.prompts.summarize_chunks_batch.parameters,
+        check_summaries_sufficiency_prompt_messages=cfg.prompts.check_summaries_sufficiency.messages,
+        check_summaries_sufficiency_prompt_parameters=cfg.prompts.check_summaries_sufficiency.parameters,
+        llm_cache=llm_cache,
+        checkpoint=cfg.pipeline.document_summarizer.checkpoint,
+        reuse_chunk_summaries=reuse_chunk_summaries,
+        memoize=cfg.pipeline.memoize,
+        on_chunk_summary=lambda summarized, total: report_progress(
+            _SUMMARY_PROGRESS * summarized / max(total, 1),
+            f"Summarized {summarized}/{total} chunks",
+        ),
+    )
+    session.commit()
+
+    report_progress(_SUMMARY_PROGRESS, "Generating image prompts", force=True)
+    # Prompts are stored in the job as they are generated, so the UI shows them
+    # before the job completes
+    generated_prompts = []
+
+    def report_image_prompt(image_prompt: str):
+        generated_prompts.append(image_prompt)
+        report_progress(
+            _SUMMARY_PROGRESS
+            + (1 - _SUMMARY_PROGRESS) * len(generated_prompts) / total_prompts,
+            f"Generated {len(generated_prompts)}/{total_prompts} image prompts",
+            image_prompts=generated_prompts,
+        )
+
+    api.generate_image_prompts(
+        session,
+        summary_session=summary_session,
+        document_path=job.document_path,
+        document_summary=summary_session.document_summary,
+        total_prompts_to_generate=total_prompts,
+        generate_image_prompts_prompt_messages=cfg.prompts.generate_image_prompts.messages,
+        generate_image_prompts_prompt_parameters=cfg.prompts.generate_image_prompts.parameters,
+        llm_api_key=job.llm_api_key,
+        llm_model_name=model_selected,
+        llm_temperature=config["prompt_temp"],
+        llm_top_p=config["prompt_top_p"],
+        llm_top_k=config["prompt_top_k"],
+        provider_name=provider,
+        llm_cache=llm_cache,
+        max_prompts_per_call=cfg.pipeline.image_prompts_generator.max_prompts_per_call,
+        max_concurrency=cfg.pipeline.image_prompts_generator.max_concurrency,
+        max_top_up_calls=cfg.pipeline.image_prompts_generator.max_top_up_calls,
+        generate_image_prompts_shard_prompt_messages=cfg.prompts.generate_image_prompts_shard.messages,
+        generate_image_prompts_shard_prompt_parameters=cfg.prompts.generate_image_prompts_shard.parameters,
+        on_image_prompt=report_image_prompt,
+        memoize=cfg.pipeline.memoize,
+    )
+    return summary_session
+
+
+def _remove_upload(document_path: str, upload_directory: str) -> None:
+    """
+    Delete the uploaded document of a finished job, along with the directory
+    it was uploaded to. Documents outside `upload_directory` are left as is.
+
+    Args:
+        document_path (str): Path to the document of the job.
+        upload_directory (str): Directory where the UI stores the uploads.
+    """
+    upload_directory = os.path.abspath(upload_directory)
+    document_directory = os.path.dirname(os.path.abspath(document_path))
+    if os.path.dirname(document_directory) != upload_directory:
+        return
+    try:
+        os.remove(document_path)
+        os.rmdir(document_directory)
+    except OSError:
+        pass
+
+
+def process_next_job(
+    worker_id: str,
+    cfg: DictConfig,
+    stale_after_seconds: Optional[float] = None,
+    heartbeat_interval: float = _HEARTBEAT_INTERVAL,
+) -> bool:
+    """
+    Claim the next queued job and run it.
+
+    Args:
+        worker_id (str): Identifier of the worker.
+        cfg (DictConfig): The application configuration.
+        stale_after_seconds (Optional[float]): If given, running jobs whose
+            worker has not reported progress for this long are claimed again.
+        heartbeat_interval (float): Seconds between two heartbeats of the job
+            while it runs.
+
+    Returns:
+        bool: Whether a job was claimed.
+    """
+    with Session() as session:
+        try:
+            job = api.claim_pipeline_job(session, worker_id, stale_after_seconds)
+            session.commit()
+        except sa.exc.OperationalError:
+            # The database is busy (e.g., SQLite is locked by another worker)
+            session.rollback()
+            return False
+        if job is None:
+            return False
+
+        job_id = job.id
+        heartbeat = _Heartbeat(job_id, worker_id, heartbeat_interval)
+        heartbeat.start()
+        try:
+            summary_session = run_pipeline_job(session, job, cfg)
+            heartbeat.stop()
+            api.finish_pipeline_job(session, job, summary_session=summary_session)
+            session.commit()
+        except KeyboardInterrupt:
+            heartbeat.stop()
+            # The worker is stopping: the job is queued again for another worker
+            session.rollback()
+            job = api.get_pipeline_job(session, job_id)
+            job.status = "pending"
+            session.commit()
+            raise
+        except Exception:
+            heartbeat.stop()
+            session.rollback()
+            job = api.get_pipeline_job(session, job_id)
+            api.finish_pipeline_job(session, job, error=traceback.format_exc())
+            session.commit()
+        _remove_upload(job.document_path, cfg.pipeline.jobs.upload_directory)
+        return True
+
+
+def work(
+    poll_interval: float,
+    stale_after_seconds: Optional[float] = None,
+    worker_id: Optional[str] = None,
+) -> None:
+    """
+    Run queued jobs until the process is stopped.
+
+    Args:
+        poll_interval (float): Seconds to wait before checking the queue again
+            when it is empty.
+        stale_after_seconds (Optional[float]): If given, running jobs whose
+            worker has not reported progress for this long are claimed again.
+        worker_id (Optional[str]): Identifier of the worker. Defaults to the
+            host name and process ID.
+    """
+    # Forked workers inherit the pooled connections of the parent, which SQLite
+    # connections do not support: they are dropped (without closing them, as
+    # they still belong to the parent) so the worker opens its own
+    db.dispose(close=False)
+
+    # Stopping the worker (e.g., `docker stop`) queues its running job again
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    cfg = load_config()
+    # Beat often enough that a job never looks stale while it runs
+    heartbeat_interval = _HEARTBEAT_INTERVAL
+    if stale_after_seconds is not None:
+        heartbeat_interval = min(heartbeat_interval, stale_after_seconds / 4)
+    try:
+        while True:
+            if not process_next_job(
+                worker_id, cfg, stale_after_seconds, heartbeat_interval
+            ):
+                time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def main() -> None:
+    cfg = load_config()
+    parser = argparse.ArgumentParser(description="Run queued doc2image pipeline jobs.")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=cfg.pipeline.jobs.processes,
+        help="Number of worker processes.",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=cfg.pipeline.jobs.poll_interval_seconds,
+        help="Seconds to wait before checking the queue again when it is empty.",
+    )
+    args = parser.parse_args()
+
+    stale_after_minutes = cfg.pipeline.jobs.stale_after_minutes
+    stale_after_seconds = (
+        stale_after_minutes * 60 if stale_after_minutes is not None else None
+    )
+    if args.processes <= 1:
+        work(args.poll_interval, stale_after_seconds)
+        return
+
+    processes = [
+        multiprocessing.Process(
+            target=work, args=(args.poll_interval, stale_after_seconds)
+        )
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Each worker queues its running job again before exiting
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
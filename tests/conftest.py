@@ -0,0 +1,214 @@
+import hashlib
+import os
+import random
+import tempfile
+import threading
+import uuid
+from typing import Callable, Optional
+
+# The database engine is created when `doc2image.database` is imported, so the
+# tests must point it to their own database first
+os.environ["DATABASE_URL"] = (
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'doc2image.db')}"
+)
+
+import pytest  # noqa: E402
+from pydantic import BaseModel  # noqa: E402
+
+from doc2image import api  # noqa: E402
+from doc2image.database import (  # noqa: E402
+    DocumentSummarySession,
+    LlmModel,
+    LlmProvider,
+    Session,
+)
+from doc2image.llm import BaseLLM  # noqa: E402
+from doc2image.llm.capabilities import REGISTRY_VERSION  # noqa: E402
+
+
+class FakeLLM(BaseLLM):
+    """
+    Deterministic LLM counting its calls.
+
+    Responses only depend on the messages: text fields are filled with a hash
+    of their contents and boolean fields (the sufficiency verdicts) with
+    `is_sufficient` applied to the last message.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "fake-model",
+        temperature: float = 0.5,
+        top_p: float = 0.9,
+        top_k: int = 40,
+        api_key: Optional[str] = None,
+        is_sufficient: Optional[Callable[[str], bool]] = None,
+        fail: Optional[Callable[[list[dict[str, str]], Optional[type[BaseModel]]], bool]] = None,
+    ) -> None:
+        super().__init__(
+            model_name=model_name,
+            temperature=temperature,
+            top_p=top_p,
+            top_k=top_k,
+            api_key=api_key,
+        )
+        self.is_sufficient = is_sufficient or (lambda text: False)
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate(
+        self,
+        messages: list[dict[str, str]],
+        output_format: Optional[type[BaseModel]] = None,
+    ) -> str | BaseModel:
+        with self._lock:
+            self.calls += 1
+        if self.fail is not None and self.fail(messages, output_format):
+            raise RuntimeError("LLM call failed")
+
+        digest = hashlib.sha256(
+            "".join(message["content"] for message in messages).encode("utf-8")
+        ).hexdigest()[:12]
+        if output_format is None:
+            return f"document-summary-{digest}"
+
+        values = {}
+        for name, field in output_format.model_fields.items():
+            if field.annotation is bool:
+                values[name] = self.is_sufficient(messages[-1]["content"])
+            elif field.annotation is str:
+                values[name] = f"{name}-{digest}"
+            else:
+                values[name] = [f"{name}-{digest}-{index}" for index in range(3)]
+        return output_format(**values)
+
+
+def make_paragraphs(count: int, seed: int = 0) -> list[str]:
+    """Build `count` pseudo-random paragraphs of about 300 characters."""
+    rng = random.Random(seed)
+    words = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 10)))
+        for _ in range(500)
+    ]
+    return [" ".join(rng.choice(words) for _ in range(50)) for _ in range(count)]
+
+
+@pytest.fixture
+def session():
+    with Session() as session:
+        yield session
+
+
+@pytest.fixture
+def llm_model(session) -> LlmModel:
+    """A new model of its own provider, so sessions of other tests are never reused."""
+    provider = LlmProvider(name=f"provider-{uuid.uuid4().hex}", available=True)
+    session.add(provider)
+    session.flush()
+    model = LlmModel(
+        name=f"model-{uuid.uuid4().hex}",
+        provider_id=provider.id,
+        available=True,
+        context_window=128_000,
+        max_output_tokens=16_384,
+        supports_structured_output=True,
+        capabilities_version=REGISTRY_VERSION,
+    )
+    session.add(model)
+    session.commit()
+    return model
+
+
+@pytest.fixture
+def fake_llm(monkeypatch) -> FakeLLM:
+    llm = FakeLLM()
+    monkeypatch.setattr(api, "create_llm", lambda **kwargs: llm)
+    return llm
+
+
+@pytest.fixture(scope="session")
+def prompts():
+    from doc2image.worker import load_config
+
+    return load_config().prompts
+
+
+@pytest.fixture
+def write_document(tmp_path) -> Callable[[list[str], str], str]:
+    """Write paragraphs to a new file, each file in its own directory."""
+
+    def write(paragraphs: list[str], name: str = "document.txt") -> str:
+        directory = tmp_path / uuid.uuid4().hex
+        directory.mkdir()
+        path = directory / name
+        path.write_text("\n\n".join(paragraphs))
+        return str(path)
+
+    return write
+
+
+@pytest.fixture
+def summarize(session, llm_model, prompts) -> Callable[..., DocumentSummarySession]:
+    """Summarize a document with the test model, overriding any setting."""
+
+    def summarize(document_path: str, **kwargs):
+        settings = dict(
+            chunk_size=1000,
+            chunk_overlap=0,
+            separators=["\n\n", "\n", " ", ""],
+            is_separator_regex=False,
+            keep_separator=True,
+            strip_whitespace=True,
+            llm_api_key=None,
+            llm_model_name=llm_model.name,
+            llm_temperature=0.5,
+            llm_top_p=0.9,
+            llm_top_k=40,
+            llm_provider=llm_model.provider.name,
+            max_document_summary_size=1000,
+            max_chunk_summary_size=200,
+            summarize_chunk_prompt_messages=prompts.summarize_chunk.messages,
+            summarize_chunk_prompt_parameters=prompts.summarize_chunk.parameters,
+            generate_document_summary_prompt_messages=prompts.generate_document_summary.messages,
+            generate_document_summary_prompt_parameters=prompts.generate_document_summary.parameters,
+        )
+        settings.update(kwargs)
+        summary_session = api.summerize_document(
+            session, document_path=document_path, **settings
+        )
+        session.commit()
+        return summary_session
+
+    return summarize
+
+
+@pytest.fixture
+def summarize_and_generate_prompts(session, llm_model, prompts):
+    """Summarize a short document and generate its image prompts in a single call."""
+
+    def summarize_and_generate(document_path, **kwargs):
+        settings = dict(
+            llm_api_key=None,
+            llm_model_name=llm_model.name,
+            llm_temperature=0.8,
+            llm_top_p=0.9,
+            llm_top_k=40,
+            llm_provider=llm_model.provider.name,
+            max_document_summary_size=1000,
+            total_prompts_to_generate=3,
+            summarize_and_generate_image_prompts_prompt_messages=(
+                prompts.summarize_document_and_generate_image_prompts.messages
+            ),
+            summarize_and_generate_image_prompts_prompt_parameters=(
+                prompts.summarize_document_and_generate_image_prompts.parameters
+            ),
+        )
+        settings.update(kwargs)
+        sessions = api.summerize_document_and_generate_image_prompts(
+            session, document_path=document_path, **settings
+        )
+        session.commit()
+        return sessions
+
+    return summarize_and_generate
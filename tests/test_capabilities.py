@@ -0,0 +1,41 @@
+import pytest
+
+from doc2image.llm.capabilities import (
+    DEFAULT_CAPABILITIES,
+    KNOWN_MODEL_CAPABILITIES,
+    lookup_capabilities,
+)
+
+
+@pytest.mark.parametrize(
+    "model_name, family",
+    [
+        ("gpt-4o", "gpt-4o"),
+        ("gpt-4o-2024-08-06", "gpt-4o"),
+        ("gpt-4o-mini", "gpt-4o"),
+        ("gpt-4", "gpt-4"),
+        ("gpt-4-0613", "gpt-4"),
+        ("gpt-4-32k-0613", "gpt-4-32k"),
+        ("gpt-4-turbo-2024-04-09", "gpt-4-turbo"),
+        ("gpt-4.5-preview", "gpt-4.5"),
+        ("gpt-4.1-mini", "gpt-4.1"),
+        ("o1", "o1"),
+        ("o1-2024-12-17", "o1"),
+        ("o1-mini", "o1-mini"),
+        ("o1-mini-2024-09-12", "o1-mini"),
+        ("o3-mini", "o3-mini"),
+        ("gemma3:4b", "gemma3"),
+        ("gemma3:1b", "gemma3:1b"),
+        ("llama3.3:70b", "llama3.3"),
+        ("llama3:8b", "llama3"),
+        ("mistral-nemo:12b", "mistral-nemo"),
+        ("mistral:7b", "mistral"),
+    ],
+)
+def test_longest_family_prefix_wins(model_name, family):
+    assert lookup_capabilities(model_name) == KNOWN_MODEL_CAPABILITIES[family]
+
+
+@pytest.mark.parametrize("model_name", ["gpt-4x", "llama3.9", "o10", "unknown-model"])
+def test_prefixes_only_match_whole_family_names(model_name):
+    assert lookup_capabilities(model_name) == DEFAULT_CAPABILITIES
@@ -0,0 +1,112 @@
+import pytest
+
+from conftest import make_paragraphs
+from doc2image.database import DocumentSummarySession
+
+MARKER = "sufficientmarker"
+
+
+def _fail_document_summary(messages, output_format) -> bool:
+    # The document summary is the only call without an output format
+    return output_format is None
+
+
+def _interrupted_session(session, llm_model) -> DocumentSummarySession:
+    session.rollback()
+    return (
+        session.query(DocumentSummarySession)
+        .filter_by(llm_model_id=llm_model.id, status="in_progress")
+        .one()
+    )
+
+
+def _chunk_summaries(summary_session: DocumentSummarySession) -> list:
+    return sorted(
+        (c for c in summary_session.chunk_summaries if not c.level),
+        key=lambda c: c.chunk_index,
+    )
+
+
+def test_resume_only_makes_the_interrupted_call(
+    session, llm_model, fake_llm, summarize, write_document
+):
+    path = write_document(make_paragraphs(12))
+    fake_llm.fail = _fail_document_summary
+    with pytest.raises(RuntimeError):
+        summarize(path, checkpoint=True)
+    interrupted = _interrupted_session(session, llm_model)
+    chunk_calls = fake_llm.calls - 1
+    assert len(_chunk_summaries(interrupted)) == chunk_calls > 1
+
+    fake_llm.fail = None
+    fake_llm.calls = 0
+    summary_session = summarize(path, checkpoint=True)
+    assert fake_llm.calls == 1
+    assert summary_session.id == interrupted.id
+    assert summary_session.status == "completed"
+    assert summary_session.document_summary.startswith("document-summary-")
+    assert [c.chunk_index for c in _chunk_summaries(summary_session)] == list(
+        range(chunk_calls)
+    )
+
+
+def test_resume_keeps_the_sufficiency_verdict(
+    session, llm_model, fake_llm, summarize, write_document
+):
+    paragraphs = make_paragraphs(24)
+    paragraphs[6] += f" {MARKER}"
+    path = write_document(paragraphs)
+    fake_llm.is_sufficient = lambda text: MARKER in text
+    fake_llm.fail = _fail_document_summary
+    with pytest.raises(RuntimeError):
+        summarize(path, checkpoint=True)
+    chunk_summaries = _chunk_summaries(_interrupted_session(session, llm_model))
+    assert [c.is_sufficient for c in chunk_summaries][-2:] == [False, True]
+
+    # Without the stored verdict, the resumed run would summarize the chunks
+    # after the sufficient one
+    fake_llm.fail = None
+    fake_llm.calls = 0
+    summary_session = summarize(path, checkpoint=True)
+    assert fake_llm.calls == 1
+    assert len(_chunk_summaries(summary_session)) == len(chunk_summaries)
+
+
+def test_resume_summarizes_chunks_whose_content_changed(
+    session, llm_model, fake_llm, summarize, write_document
+):
+    path = write_document(make_paragraphs(12))
+    fake_llm.fail = _fail_document_summary
+    with pytest.raises(RuntimeError):
+        summarize(path, checkpoint=True)
+    chunk_summaries = _chunk_summaries(_interrupted_session(session, llm_model))
+    chunk_summaries[1].chunk_hash = "0" * 64
+    session.commit()
+
+    fake_llm.fail = None
+    fake_llm.calls = 0
+    summary_session = summarize(path, checkpoint=True)
+    assert fake_llm.calls == 2
+    assert [c.chunk_index for c in _chunk_summaries(summary_session)] == list(
+        range(len(chunk_summaries))
+    )
+
+
+def test_edited_document_is_not_resumed(
+    session, llm_model, fake_llm, summarize, write_document
+):
+    paragraphs = make_paragraphs(12)
+    path = write_document(paragraphs)
+    fake_llm.fail = _fail_document_summary
+    with pytest.raises(RuntimeError):
+        summarize(path, checkpoint=True)
+    interrupted = _interrupted_session(session, llm_model)
+    chunk_calls = fake_llm.calls - 1
+
+    with open(path, "w") as file:
+        file.write("\n\n".join(paragraphs + ["An appended paragraph."]))
+    fake_llm.fail = None
+    fake_llm.calls = 0
+    summary_session = summarize(path, checkpoint=True)
+    assert summary_session.id != interrupted.id
+    assert fake_llm.calls >= chunk_calls + 1
@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+
+from doc2image.docs import cache as cache_module
+from doc2image.docs.cache import DocumentCache
+
+
+@pytest.fixture
+def cache(tmp_path) -> DocumentCache:
+    return DocumentCache(str(tmp_path / "cache"), max_size_bytes=1_000_000)
+
+
+def test_text_round_trip(cache):
+    cache.set_text("key", "first page\n\nsecond page", [0, 12])
+    assert cache.get_text("key") == ("first page\n\nsecond page", [0, 12])
+    assert cache.get_text("other-key") is None
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 1
+
+
+def test_entry_removed_during_a_read_is_still_served(cache, monkeypatch):
+    cache.set_text("key", "text", [0])
+
+    # Another process evicts the entry once it is read, before its access
+    # time is updated
+    load = json.load
+
+    def load_and_evict(file):
+        value = load(file)
+        os.remove(file.name)
+        return value
+
+    monkeypatch.setattr(cache_module.json, "load", load_and_evict)
+    assert cache.get_text("key") == ("text", [0])
+    monkeypatch.undo()
+    assert cache.get_text("key") is None
+
+
+def test_entry_removed_while_listing_entries_is_skipped(cache, monkeypatch):
+    cache.set_text("kept", "text", [0])
+    cache.set_text("removed", "text", [0])
+
+    scandir = os.scandir
+
+    # Another process evicts an entry after the directory is listed, before it
+    # is inspected
+    def scandir_and_evict(directory):
+        entries = list(scandir(directory))
+        os.remove(cache._path("text-removed"))
+        return iter(entries)
+
+    monkeypatch.setattr(cache_module.os, "scandir", scandir_and_evict)
+    assert cache.stats["entries"] == 1
+
+
+def test_entry_evicted_by_another_process_is_not_evicted_again(cache, monkeypatch):
+    cache.set_text("old", "x" * 100, [0])
+    cache.set_text("new", "y" * 100, [0])
+    os.utime(cache._path("text-old"), (0, 0))
+    entries = cache._entries()
+
+    # Another process evicts the oldest entry after this one listed it
+    os.remove(cache._path("text-old"))
+    monkeypatch.setattr(cache, "_entries", lambda: entries)
+    cache.max_size_bytes = 150
+    cache._evict()
+    assert cache.get_text("new") == ("y" * 100, [0])
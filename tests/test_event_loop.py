@@ -0,0 +1,48 @@
+import asyncio
+import threading
+
+from doc2image.llm import event_loop
+from doc2image.llm.openai import _get_async_client
+
+
+async def _running_loop() -> asyncio.AbstractEventLoop:
+    return asyncio.get_running_loop()
+
+
+def test_runs_share_the_event_loop_of_their_thread():
+    loop = event_loop.run(_running_loop())
+    assert event_loop.run(_running_loop()) is loop
+    assert not loop.is_closed()
+
+    other_thread_loops = []
+    thread = threading.Thread(
+        target=lambda: other_thread_loops.append(event_loop.run(_running_loop()))
+    )
+    thread.start()
+    thread.join()
+    assert other_thread_loops[0] is not loop
+
+
+def test_async_clients_are_reused_across_runs():
+    async def get_client():
+        return _get_async_client("sk-test")
+
+    assert event_loop.run(get_client()) is event_loop.run(get_client())
+
+
+def test_tasks_left_running_are_cancelled():
+    started = []
+
+    async def leave_task_running():
+        async def background():
+            started.append(True)
+            await asyncio.sleep(3600)
+
+        task = asyncio.create_task(background())
+        await asyncio.sleep(0)
+        return task
+
+    task = event_loop.run(leave_task_running())
+    assert started
+    assert task.cancelled()
+    assert not asyncio.all_tasks(event_loop.get_event_loop())
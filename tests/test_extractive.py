@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from doc2image.docs.extractive import compress_text, split_sentences, textrank_scores
+
+
+def _make_text(sentences: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 10)))
+        for _ in range(200)
+    ]
+    return " ".join(
+        " ".join(rng.choice(words) for _ in range(rng.randint(4, 30))).capitalize() + "."
+        for _ in range(sentences)
+    )
+
+
+def test_split_sentences():
+    text = "First sentence. Second one!  Third?\n\nA paragraph\nwithout a stop\n\n"
+    assert split_sentences(text) == [
+        "First sentence.",
+        "Second one!",
+        "Third?",
+        "A paragraph\nwithout a stop",
+    ]
+
+
+def test_central_sentences_score_higher():
+    sentences = [
+        "The castle stands on the hill above the river.",
+        "An old castle guards the river and the hill.",
+        "The river flows around the castle hill.",
+        "Bananas are yellow.",
+    ]
+    scores = textrank_scores(sentences)
+    assert scores.argmin() == 3
+    assert scores.sum() == pytest.approx(1, abs=1e-3)
+
+
+@pytest.mark.parametrize("ratio", [0.1, 0.3, 0.5, 0.8])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_compression_keeps_sentence_order_within_budget(ratio, seed):
+    text = _make_text(60, seed=seed)
+    compressed = compress_text(text, ratio)
+
+    assert len(compressed) <= ratio * len(text)
+    sentences = split_sentences(text)
+    kept = split_sentences(compressed)
+    assert kept
+    indices = [sentences.index(sentence) for sentence in kept]
+    assert indices == sorted(indices)
+
+
+def test_most_central_sentence_is_kept_even_over_budget():
+    text = "A long sentence about the castle and the river. The castle. The river."
+    compressed = compress_text(text, 0.1)
+    assert compressed == "A long sentence about the castle and the river."
+
+
+def test_texts_that_cannot_be_compressed_are_returned_as_is():
+    assert compress_text("A single sentence.", 0.5) == "A single sentence."
+    text = _make_text(10)
+    assert compress_text(text, 1) == text
+
+
+@pytest.mark.parametrize("ratio", [0, -0.5, 1.5])
+def test_invalid_ratio(ratio):
+    with pytest.raises(ValueError):
+        compress_text("First sentence. Second sentence.", ratio)
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from conftest import FakeLLM
+from doc2image.llm import cache as cache_module
+from doc2image.llm.cache import CachedLLM, LLMCache, make_cache_key
+from doc2image.pipeline import _ChunkSummaryOutputFormat
+
+MESSAGES = [{"role": "user", "content": "Summarize this chunk."}]
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> _Clock:
+    # Entries are ordered by their access time, which must not tie
+    clock = _Clock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    return clock
+
+
+def test_least_recently_used_entries_are_evicted_over_the_size_cap(tmp_path, clock):
+    cache = LLMCache(str(tmp_path / "cache.db"), max_size_bytes=10)
+    cache.set("a", "aaaa")
+    clock.now += 1
+    cache.set("b", "bbbb")
+    clock.now += 1
+    assert cache.get("a") == "aaaa"
+    clock.now += 1
+    cache.set("c", "cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "aaaa"
+    assert cache.get("c") == "cccc"
+    assert cache.stats == {"hits": 3, "misses": 1, "entries": 2, "size_bytes": 8}
+
+
+def test_entries_expire_after_their_ttl(tmp_path, clock):
+    cache = LLMCache(str(tmp_path / "cache.db"), max_size_bytes=1_000, ttl_seconds=60)
+    cache.set("a", "aaaa")
+    clock.now += 30
+    cache.set("b", "bbbb")
+    clock.now += 40
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "bbbb"
+    assert cache.stats["entries"] == 1
+
+
+def test_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    LLMCache(path, max_size_bytes=1_000).set("a", "aaaa")
+    assert LLMCache(path, max_size_bytes=1_000).get("a") == "aaaa"
+
+
+def test_cache_key_depends_on_sampling_and_output_format():
+    kwargs = dict(
+        provider="FakeLLM",
+        model_name="fake-model",
+        messages=MESSAGES,
+        temperature=0.5,
+        top_p=0.9,
+        top_k=40,
+    )
+    key = make_cache_key(**kwargs)
+    assert make_cache_key(**kwargs) == key
+    assert make_cache_key(**{**kwargs, "temperature": 0.7}) != key
+    assert make_cache_key(**kwargs, output_format=_ChunkSummaryOutputFormat) != key
+
+
+def test_cached_llm_serves_repeated_calls(tmp_path):
+    llm = FakeLLM()
+    cached_llm = CachedLLM(llm, LLMCache(str(tmp_path / "cache.db"), max_size_bytes=10_000))
+
+    output = cached_llm.generate(MESSAGES)
+    assert cached_llm.generate(MESSAGES) == output
+    structured = cached_llm.generate(MESSAGES, output_format=_ChunkSummaryOutputFormat)
+    assert (
+        asyncio.run(cached_llm.agenerate(MESSAGES, output_format=_ChunkSummaryOutputFormat))
+        == structured
+    )
+    assert llm.calls == 2
+    assert cached_llm.cache.stats["hits"] == 2
+
+
+def test_cached_llm_stores_streamed_responses(tmp_path):
+    llm = FakeLLM()
+    cached_llm = CachedLLM(llm, LLMCache(str(tmp_path / "cache.db"), max_size_bytes=10_000))
+
+    async def stream() -> str:
+        pieces = cached_llm.astream(MESSAGES, output_format=_ChunkSummaryOutputFormat)
+        return "".join([piece async for piece in pieces])
+
+    assert asyncio.run(stream()) == asyncio.run(stream())
+    assert llm.calls == 1
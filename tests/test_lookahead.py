@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from conftest import FakeLLM, make_paragraphs
+from doc2image.docs import Chunk
+from doc2image.pipeline import DocumentSummarizer
+from doc2image.prompt import Prompt
+
+MARKER = "sufficientmarker"
+
+
+def _summarized_chunks(summary_session) -> list[int]:
+    return sorted(c.chunk_index for c in summary_session.chunk_summaries if not c.level)
+
+
+@pytest.mark.parametrize("marked_paragraph", [0, 9, 20])
+def test_lookahead_stops_at_the_same_chunk_as_sequential(
+    fake_llm, summarize, write_document, prompts, marked_paragraph
+):
+    paragraphs = make_paragraphs(30)
+    paragraphs[marked_paragraph] += f" {MARKER}"
+    path = write_document(paragraphs)
+    fake_llm.is_sufficient = lambda text: MARKER in text
+
+    sequential = summarize(path)
+    reported = []
+    lookahead = summarize(
+        path,
+        strategy="lookahead",
+        lookahead=3,
+        check_summaries_sufficiency_prompt_messages=prompts.check_summaries_sufficiency.messages,
+        check_summaries_sufficiency_prompt_parameters=prompts.check_summaries_sufficiency.parameters,
+        on_chunk_summary=lambda done, total: reported.append(done),
+    )
+    assert _summarized_chunks(lookahead) == _summarized_chunks(sequential)
+    # Summaries computed ahead of time but not used are not reported
+    assert reported == list(range(1, len(_summarized_chunks(lookahead)) + 1))
+
+
+class _SlowFakeLLM(FakeLLM):
+    """Fake LLM whose chunk summaries take a while, and so do cancelled calls."""
+
+    def __init__(self, delays: dict[str, float], **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.delays = delays
+        self.tasks = []
+
+    async def agenerate(self, messages, output_format=None):
+        self.tasks.append(asyncio.current_task())
+        text = messages[-1]["content"]
+        try:
+            await asyncio.sleep(
+                next((delay for key, delay in self.delays.items() if key in text), 0)
+            )
+        except asyncio.CancelledError:
+            # E.g. closing the connection of the cancelled request
+            await asyncio.sleep(0.05)
+            raise
+        return self.generate(messages, output_format)
+
+
+def test_lookahead_cancels_and_awaits_calls_after_a_sufficient_verdict(prompts):
+    texts = [f"chunk{index} " + "text " * 20 for index in range(8)]
+    texts[1] += MARKER
+    buffer = "".join(texts)
+    chunks, start = [], 0
+    for text in texts:
+        chunks.append(Chunk(buffer, start, start + len(text), 0))
+        start += len(text)
+
+    # The verdict of the second chunk arrives while the next chunks are in flight
+    llm = _SlowFakeLLM(
+        delays={"chunk0 ": 0.05, MARKER: 0.01, "chunk": 0.2},
+        is_sufficient=lambda text: MARKER in text,
+    )
+    reported = []
+    summarizer = DocumentSummarizer(
+        llm=llm,
+        document_chunks=chunks,
+        max_document_summary_size=1000,
+        max_chunk_summary_size=200,
+        summarize_chunk_prompt=Prompt(**prompts.summarize_chunk),
+        generate_document_summary_prompt=Prompt(**prompts.generate_document_summary),
+        strategy="lookahead",
+        lookahead=3,
+        check_summaries_sufficiency_prompt=Prompt(**prompts.check_summaries_sufficiency),
+        on_chunk_summary=reported.append,
+    )
+
+    async def run():
+        result = await summarizer.arun()
+        current_task = asyncio.current_task()
+        return result, [
+            task for task in llm.tasks if task is not current_task and not task.done()
+        ]
+
+    (_, chunk_summaries), pending_tasks = asyncio.run(run())
+    assert [c.chunk_index for c in chunk_summaries] == [0, 1]
+    assert [c.chunk_index for c in reported] == [0, 1]
+    assert len(llm.tasks) > 3
+    assert pending_tasks == []
@@ -0,0 +1,98 @@
+import pytest
+
+from conftest import make_paragraphs
+from doc2image import api
+
+
+@pytest.fixture
+def generate_prompts(session, llm_model, prompts):
+    """Generate image prompts with the test model, overriding any setting."""
+
+    def generate(summary_session, **kwargs):
+        settings = dict(
+            document_path="document.txt",
+            document_summary=summary_session.document_summary,
+            total_prompts_to_generate=3,
+            generate_image_prompts_prompt_messages=prompts.generate_image_prompts.messages,
+            generate_image_prompts_prompt_parameters=prompts.generate_image_prompts.parameters,
+            llm_api_key=None,
+            llm_model_name=llm_model.name,
+            llm_temperature=0.8,
+            llm_top_p=0.9,
+            llm_top_k=40,
+            provider_name=llm_model.provider.name,
+        )
+        settings.update(kwargs)
+        image_prompts_session = api.generate_image_prompts(
+            session, summary_session=summary_session, **settings
+        )
+        session.commit()
+        return image_prompts_session
+
+    return generate
+
+
+def test_same_content_returns_the_stored_session(fake_llm, summarize, write_document):
+    paragraphs = make_paragraphs(12)
+    first = summarize(write_document(paragraphs))
+    assert fake_llm.calls > 0
+
+    # The document is identified by its content, whatever its path and name
+    fake_llm.calls = 0
+    second = summarize(write_document(paragraphs, name="copy.txt"))
+    assert fake_llm.calls == 0
+    assert second.id == first.id
+
+
+def test_other_settings_or_content_are_summarized_again(
+    fake_llm, summarize, write_document
+):
+    paragraphs = make_paragraphs(12)
+    path = write_document(paragraphs)
+    first = summarize(path)
+
+    for kwargs in ({"llm_temperature": 0.7}, {"chunk_size": 800}, {"memoize": False}):
+        fake_llm.calls = 0
+        assert summarize(path, **kwargs).id != first.id
+        assert fake_llm.calls > 0
+
+    fake_llm.calls = 0
+    assert summarize(write_document(paragraphs[:-1])).id != first.id
+    assert fake_llm.calls > 0
+
+
+def test_image_prompts_are_memoized(fake_llm, summarize, write_document, generate_prompts):
+    summary_session = summarize(write_document(make_paragraphs(12)))
+
+    fake_llm.calls = 0
+    first = generate_prompts(summary_session)
+    assert fake_llm.calls > 0
+    assert first.prompts
+
+    fake_llm.calls = 0
+    assert generate_prompts(summary_session).id == first.id
+    assert fake_llm.calls == 0
+
+    for kwargs in ({"total_prompts_to_generate": 4}, {"memoize": False}):
+        fake_llm.calls = 0
+        assert generate_prompts(summary_session, **kwargs).id != first.id
+        assert fake_llm.calls > 0
+
+
+def test_single_call_pipeline_is_memoized(
+    fake_llm, write_document, summarize_and_generate_prompts
+):
+    paragraphs = make_paragraphs(3)
+    summary_session, image_prompts_session = summarize_and_generate_prompts(
+        write_document(paragraphs)
+    )
+    assert fake_llm.calls == 1
+    assert image_prompts_session.document_summary_id == summary_session.id
+
+    fake_llm.calls = 0
+    memoized = summarize_and_generate_prompts(write_document(paragraphs, name="copy.txt"))
+    assert fake_llm.calls == 0
+    assert [s.id for s in memoized] == [summary_session.id, image_prompts_session.id]
+
+    assert summarize_and_generate_prompts(write_document(paragraphs), memoize=False)
+    assert fake_llm.calls == 1
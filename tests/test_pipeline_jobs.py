@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from doc2image import api
+
+STALE_AFTER_SECONDS = 3600
+
+
+@pytest.fixture
+def submit(session):
+    """Submit a pending job, left claimed or finished by each test."""
+
+    def submit():
+        job = api.submit_pipeline_job(
+            session,
+            "/tmp/document.txt",
+            {"provider": "OpenAI", "llm_model_name": "fake-model"},
+            llm_api_key="sk-test",
+        )
+        session.commit()
+        return job
+
+    return submit
+
+
+def test_pending_job_is_claimed_once(session, submit):
+    job = submit()
+    assert job.status == "pending"
+
+    claimed = api.claim_pipeline_job(session, "worker-1", STALE_AFTER_SECONDS)
+    session.commit()
+    assert claimed.id == job.id
+    assert claimed.status == "running"
+    assert claimed.worker_id == "worker-1"
+    assert claimed.heartbeat_at is not None
+
+    assert api.claim_pipeline_job(session, "worker-2", STALE_AFTER_SECONDS) is None
+
+
+def test_oldest_pending_job_is_claimed_first(session, submit):
+    first, second = submit(), submit()
+    assert api.claim_pipeline_job(session, "worker-1").id == first.id
+    assert api.claim_pipeline_job(session, "worker-2").id == second.id
+    session.commit()
+
+
+def test_stale_running_job_is_reclaimed(session, submit):
+    job = submit()
+    api.claim_pipeline_job(session, "worker-1", STALE_AFTER_SECONDS)
+    job.heartbeat_at = datetime.now() - timedelta(seconds=STALE_AFTER_SECONDS + 60)
+    session.commit()
+
+    # Running jobs are only reclaimed when a stale window is given
+    assert api.claim_pipeline_job(session, "worker-2") is None
+
+    reclaimed = api.claim_pipeline_job(session, "worker-2", STALE_AFTER_SECONDS)
+    session.commit()
+    assert reclaimed.id == job.id
+    assert reclaimed.worker_id == "worker-2"
+    assert reclaimed.heartbeat_at > datetime.now() - timedelta(seconds=60)
+
+    assert api.claim_pipeline_job(session, "worker-3", STALE_AFTER_SECONDS) is None
+
+
+def test_running_job_with_recent_heartbeat_is_not_reclaimed(session, submit):
+    job = submit()
+    api.claim_pipeline_job(session, "worker-1", STALE_AFTER_SECONDS)
+    api.update_pipeline_job_progress(session, job, 0.5, "Summarizing")
+    session.commit()
+
+    assert api.claim_pipeline_job(session, "worker-2", STALE_AFTER_SECONDS) is None
+    assert job.worker_id == "worker-1"
+
+
+def test_heartbeat_is_only_refreshed_by_the_worker_running_the_job(session, submit):
+    job = submit()
+    api.claim_pipeline_job(session, "worker-1", STALE_AFTER_SECONDS)
+    session.commit()
+
+    assert api.refresh_pipeline_job_heartbeat(session, job.id, "worker-1")
+    assert not api.refresh_pipeline_job_heartbeat(session, job.id, "worker-2")
+
+    api.finish_pipeline_job(session, job)
+    session.commit()
+    assert job.status == "completed"
+    assert job.llm_api_key is None
+    assert not api.refresh_pipeline_job_heartbeat(session, job.id, "worker-1")
+
+
+def test_failed_job_keeps_its_error(session, submit):
+    job = submit()
+    api.claim_pipeline_job(session, "worker-1")
+    api.finish_pipeline_job(session, job, error="Traceback")
+    session.commit()
+
+    assert api.get_pipeline_job(session, job.id).status == "failed"
+    assert job.error == "Traceback"
+    assert job.llm_api_key is None
@@ -0,0 +1,39 @@
+import hashlib
+
+from conftest import make_paragraphs
+from doc2image.docs import parse_short_document
+
+
+def test_single_call_stores_the_document_as_one_chunk(
+    fake_llm, write_document, summarize_and_generate_prompts
+):
+    path = write_document(make_paragraphs(3))
+    summary_session, image_prompts_session = summarize_and_generate_prompts(path)
+    assert fake_llm.calls == 1
+
+    # The chunking settings do not apply to a document that was not chunked
+    assert summary_session.chunk_size is None
+    assert summary_session.max_chunk_summary_size is None
+
+    (chunk_summary,) = summary_session.chunk_summaries
+    assert chunk_summary.level == 0
+    assert chunk_summary.chunk_index == 0
+    assert chunk_summary.page == 0
+    assert chunk_summary.chunk_summary == summary_session.document_summary
+    assert chunk_summary.prompt_tokens > 0
+    document_text, _ = parse_short_document(path, max_length=100_000)
+    assert (
+        chunk_summary.chunk_hash
+        == hashlib.sha256(document_text.encode("utf-8")).hexdigest()
+    )
+    assert [p.prompt for p in image_prompts_session.prompts]
+
+
+def test_long_document_is_not_summarized_in_a_single_call(
+    fake_llm, llm_model, session, write_document, summarize_and_generate_prompts
+):
+    llm_model.context_window = 1_000
+    session.commit()
+
+    assert summarize_and_generate_prompts(write_document(make_paragraphs(30))) is None
+    assert fake_llm.calls == 0
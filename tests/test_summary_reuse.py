@@ -0,0 +1,72 @@
+import pytest
+
+from conftest import make_paragraphs
+
+
+def _level_0(summary_session) -> list:
+    return sorted(
+        (c for c in summary_session.chunk_summaries if not c.level),
+        key=lambda c: c.chunk_index,
+    )
+
+
+@pytest.mark.parametrize("strategy", ["map_reduce", "tree_reduce"])
+def test_edited_document_reuses_unchanged_chunk_summaries(
+    fake_llm, summarize, write_document, strategy
+):
+    paragraphs = make_paragraphs(40)
+    first = summarize(
+        write_document(paragraphs), strategy=strategy, content_defined_chunking=True
+    )
+    first_calls = fake_llm.calls
+    assert first.reused_chunks == 0
+
+    paragraphs[20] = "An edited paragraph in the middle of the document."
+    fake_llm.calls = 0
+    second = summarize(
+        write_document(paragraphs), strategy=strategy, content_defined_chunking=True
+    )
+    chunk_summaries = _level_0(second)
+    assert 0 < second.reused_chunks < len(chunk_summaries)
+    assert fake_llm.calls < first_calls
+    assert {c.chunk_summary for c in _level_0(first)} & {
+        c.chunk_summary for c in chunk_summaries
+    }
+
+
+def test_summaries_are_not_reused_with_other_settings(fake_llm, summarize, write_document):
+    paragraphs = make_paragraphs(20)
+    summarize(write_document(paragraphs), strategy="map_reduce")
+
+    fake_llm.calls = 0
+    paragraphs[0] = "An edited first paragraph."
+    summary_session = summarize(
+        write_document(paragraphs), strategy="map_reduce", llm_temperature=0.7
+    )
+    assert summary_session.reused_chunks == 0
+    assert fake_llm.calls == len(_level_0(summary_session)) + 1
+
+
+def test_summaries_are_not_reused_by_sequential_summaries(
+    fake_llm, summarize, write_document
+):
+    # Each summary of the "sequential" strategy depends on the previous ones
+    paragraphs = make_paragraphs(20)
+    summarize(write_document(paragraphs))
+
+    paragraphs[-1] = "An edited last paragraph."
+    summary_session = summarize(write_document(paragraphs))
+    assert summary_session.reused_chunks == 0
+
+
+def test_reuse_can_be_disabled(fake_llm, summarize, write_document):
+    paragraphs = make_paragraphs(20)
+    summarize(write_document(paragraphs), strategy="map_reduce")
+
+    fake_llm.calls = 0
+    paragraphs[0] = "An edited first paragraph."
+    summary_session = summarize(
+        write_document(paragraphs), strategy="map_reduce", reuse_chunk_summaries=False
+    )
+    assert summary_session.reused_chunks == 0
+    assert fake_llm.calls == len(_level_0(summary_session)) + 1
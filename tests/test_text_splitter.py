@@ -0,0 +1,143 @@
+import contextlib
+import io
+import random
+
+import pytest
+
+from doc2image.docs.text_splitter import TextSplitter
+from legacy_text_splitter import TextSplitter as LegacyTextSplitter
+
+SEPARATORS = ["\n\n", "\n", " ", ""]
+
+
+def _make_text(min_size: int, paragraph_breaks: bool = True, seed: int = 0) -> str:
+    """Build a pseudo-random text of at least `min_size` characters."""
+    rng = random.Random(seed)
+    words = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(1, 12)))
+        for _ in range(2000)
+    ]
+    parts, size = [], 0
+    while size < min_size:
+        paragraph = " ".join(rng.choice(words) for _ in range(rng.randint(5, 120)))
+        separator = rng.choice(["\n\n", "\n", "\n\n\n", " ", ". "])
+        parts.append(paragraph + (separator if paragraph_breaks else " "))
+        size += len(parts[-1])
+    return "".join(parts)
+
+
+def _legacy_split(text: str, **kwargs) -> list[str]:
+    # The legacy implementation prints a warning for every oversized chunk
+    with contextlib.redirect_stdout(io.StringIO()):
+        return LegacyTextSplitter(**kwargs).split_text(text)
+
+
+@pytest.fixture(scope="module")
+def text() -> str:
+    return _make_text(100_000)
+
+
+# `keep_separator=False` is not compared: the legacy implementation dropped the
+# empty splits between repeated separators and joined the others with a single
+# separator, so its chunks were not slices of the text
+@pytest.mark.parametrize("keep_separator", [True, "start", "end"])
+@pytest.mark.parametrize("strip_whitespace", [True, False])
+@pytest.mark.parametrize(
+    "chunk_size, chunk_overlap", [(50, 10), (300, 250), (1000, 100), (4000, 400)]
+)
+@pytest.mark.parametrize(
+    "separators", [SEPARATORS, ["\n\n", "\n", ". ", " ", ""], ["\n"]]
+)
+def test_matches_legacy_implementation(
+    text, separators, chunk_size, chunk_overlap, keep_separator, strip_whitespace
+):
+    kwargs = dict(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=separators,
+        is_separator_regex=False,
+        keep_separator=keep_separator,
+        strip_whitespace=strip_whitespace,
+    )
+    assert TextSplitter(**kwargs).split_text(text) == _legacy_split(text, **kwargs)
+
+
+@pytest.mark.parametrize("keep_separator", [True, "start", "end"])
+@pytest.mark.parametrize("chunk_size, chunk_overlap", [(300, 50), (1000, 100)])
+def test_matches_legacy_implementation_with_regex_separators(
+    text, chunk_size, chunk_overlap, keep_separator
+):
+    kwargs = dict(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=[r"\n{2,}", r"\n", r"\s+", ""],
+        is_separator_regex=True,
+        keep_separator=keep_separator,
+        strip_whitespace=True,
+    )
+    assert TextSplitter(**kwargs).split_text(text) == _legacy_split(text, **kwargs)
+
+
+@pytest.mark.parametrize("paragraph_breaks", [True, False])
+def test_matches_legacy_implementation_on_large_input(paragraph_breaks):
+    text = _make_text(3_000_000, paragraph_breaks=paragraph_breaks, seed=1)
+    kwargs = dict(
+        chunk_size=4000,
+        chunk_overlap=400,
+        separators=SEPARATORS,
+        is_separator_regex=False,
+        keep_separator=True,
+        strip_whitespace=True,
+    )
+    assert TextSplitter(**kwargs).split_text(text) == _legacy_split(text, **kwargs)
+
+
+def test_split_spans_match_split_text(text):
+    splitter = TextSplitter(
+        chunk_size=1000,
+        chunk_overlap=100,
+        separators=SEPARATORS,
+        is_separator_regex=False,
+        keep_separator=True,
+        strip_whitespace=True,
+    )
+    spans = splitter.split_spans(text)
+    assert [text[start:end] for start, end in spans] == splitter.split_text(text)
+
+
+# Chunks are slices of the text: with `keep_separator=False`, the separators
+# between the splits of a chunk are kept as they are (repeated ones included)
+# and the separators between chunks are left out
+@pytest.mark.parametrize(
+    "separators, is_separator_regex, chunk_size, chunk_overlap, expected",
+    [
+        (
+            SEPARATORS,
+            False,
+            25,
+            0,
+            [(0, 25), (27, 50)],
+        ),
+        (
+            [r"\s+"],
+            True,
+            12,
+            6,
+            [(0, 10), (14, 25), (27, 39), (35, 43), (40, 50)],
+        ),
+    ],
+)
+def test_keep_separator_false_boundaries(
+    separators, is_separator_regex, chunk_size, chunk_overlap, expected
+):
+    text = "alpha beta\n\n\n\ngamma delta\n\nepsilon zeta eta\n\ntheta"
+    splitter = TextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=separators,
+        is_separator_regex=is_separator_regex,
+        keep_separator=False,
+        strip_whitespace=True,
+    )
+    assert splitter.split_spans(text) == expected
+